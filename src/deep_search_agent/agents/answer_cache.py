@@ -0,0 +1,123 @@
+"""Agent-level cache of finished answers, keyed on normalized (and optionally similar) queries."""
+
+from __future__ import annotations
+
+import re
+import threading
+import unicodedata
+from dataclasses import replace
+from typing import List, Optional
+
+import numpy as np
+
+from .types import AgentResult
+from ..infra.cache import CacheStats, TTLCache
+from ..retrieval.embeddings import Embedder
+
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and whitespace-insensitive form of ``query``."""
+
+    return _NON_WORD.sub(" ", unicodedata.normalize("NFKC", query).casefold()).strip()
+
+
+class AnswerCache:
+    """Caches ``AgentResult`` objects in front of the workflow.
+
+    Lookups first try the normalized query (a dict hit). When an ``embedder`` is
+    given, a miss falls back to the most similar cached query, accepted if its
+    cosine similarity reaches ``similarity_threshold``. The embedding matrix is
+    bounded like the exact cache; entries it points at still honour the TTL, and
+    a match whose answer has expired falls through to the next best match.
+
+    Results are copied in and out, so callers may modify what they get back.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600,
+        max_entries: int = 1024,
+        embedder: Optional[Embedder] = None,
+        similarity_threshold: float = 0.95,
+    ) -> None:
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self._results = TTLCache[str, AgentResult](ttl_seconds=ttl_seconds, max_entries=max_entries, name="answers")
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        self._vectors: Optional[np.ndarray] = None
+
+    def get(self, query: str) -> Optional[AgentResult]:
+        key = normalize_query(query)
+        result = self._results.get(key)
+        if result is None and self.embedder is not None:
+            result = self._similar(key)
+        return _copy(result) if result is not None else None
+
+    def set(self, query: str, result: AgentResult) -> None:
+        key = normalize_query(query)
+        self._results.set(key, _copy(result))
+        if self.embedder is None:
+            return
+        vector = self.embedder.encode([key])
+        with self._lock:
+            if key in self._keys:
+                return
+            self._keys.append(key)
+            self._vectors = vector if self._vectors is None else np.vstack([self._vectors, vector])
+            if len(self._keys) > self.max_entries:
+                self._keys = self._keys[-self.max_entries :]
+                self._vectors = self._vectors[-self.max_entries :]
+
+    def invalidate(self, query: str) -> None:
+        key = normalize_query(query)
+        self._results.delete(key)
+        self._forget([key])
+
+    def clear(self) -> None:
+        self._results.clear()
+        with self._lock:
+            self._keys = []
+            self._vectors = None
+
+    def stats(self) -> CacheStats:
+        return self._results.stats()
+
+    def _similar(self, key: str) -> Optional[AgentResult]:
+        with self._lock:
+            if not self._keys:
+                return None
+            keys, vectors = self._keys, self._vectors
+        assert self.embedder is not None and vectors is not None
+        similarities = vectors @ self.embedder.encode([key])[0]
+        expired: List[str] = []
+        result = None
+        for index in np.argsort(-similarities):
+            if similarities[index] < self.similarity_threshold:
+                break
+            result = self._results.get(keys[index])
+            if result is not None:
+                break
+            expired.append(keys[index])
+        # Keys whose answers expired or were evicted are dropped so they stop shadowing live ones.
+        self._forget(expired)
+        return result
+
+    def _forget(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        with self._lock:
+            dead = [index for index, key in enumerate(self._keys) if key in keys]
+            if not dead:
+                return
+            assert self._vectors is not None
+            self._keys = [key for key in self._keys if key not in keys]
+            self._vectors = np.delete(self._vectors, dead, axis=0) if self._keys else None
+
+
+def _copy(result: AgentResult) -> AgentResult:
+    return replace(result, plan=list(result.plan), findings=[replace(finding) for finding in result.findings])
@@ -2,55 +2,230 @@
 
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, AsyncContextManager, ContextManager, Dict, Iterator, List, Optional, Sequence
 
-from .types import AgentResult, ResearchFinding
+from .answer_cache import AnswerCache
+from .types import (
+    AgentEvent,
+    AgentResult,
+    BatchResult,
+    FindingsEvent,
+    PlanEvent,
+    ResearchFinding,
+    ResultEvent,
+    SummaryTokenEvent,
+)
 from ..config import Settings, settings
 from ..context.memory import ConversationMemory
-from ..models.base import BaseLLM
-from ..models.local_backend import LocalLLM
-from ..models.openai_backend import OpenAILLM
-from ..retrieval.base import BaseRetriever
-from ..retrieval.stub import StubRetriever
-from ..retrieval.web_search import DuckDuckGoRetriever
+from ..infra.http import get_http_client
+from ..infra.logger import get_logger
+from ..infra.metrics import start_metrics_server
+from ..infra.rate_limiter import AdmissionController, get_admission_controller, get_rate_limiter
+from ..infra.tracing import activate, span
+from ..models.base import AsyncBaseLLM, BaseLLM, BatchLLM
+from ..models.batching import MicroBatchingLLM
+from ..models.cached import AsyncCachedLLM, CachedLLM, get_llm_cache
+from ..models.local_backend import AsyncLocalLLM, LocalLLM
+from ..models.openai_backend import AsyncOpenAILLM, OpenAILLM
+from ..retrieval.base import AsyncBaseRetriever, AsyncRetrieverAdapter, BaseRetriever
+from ..retrieval.embeddings import get_embedder
+from ..retrieval.federated import FederatedRetriever
+from ..retrieval.rerank import EmbeddingReranker
+from ..retrieval.search_providers import BraveRetriever, TavilyRetriever
+from ..retrieval.stub import AsyncStubRetriever, StubRetriever
+from ..retrieval.web_search import AsyncDuckDuckGoRetriever, DuckDuckGoRetriever
 
 if TYPE_CHECKING:
+    from ..retrieval.vector_store import FaissVectorStore
     from ..workflows.langgraph_based import LangGraphWorkflow
     from ..workflows.basic import BasicWorkflow
     from ..workflows.production import ProductionWorkflow
 
 
+logger = get_logger(__name__)
+
+
 @dataclass
 class AgentDependencies:
     llm: BaseLLM
     retriever: BaseRetriever
     workflow_name: str = "basic"
+    settings: Optional[Settings] = None
+    async_llm: Optional[AsyncBaseLLM] = None
+    async_retriever: Optional[AsyncBaseRetriever] = None
+    answer_cache: Optional[AnswerCache] = None
+    admission: Optional[AdmissionController] = None
 
 
 class DeepSearchAgent:
-    """High-level façade coordinating workflows and dependencies."""
+    """High-level façade coordinating workflows and dependencies.
+
+    With ``ENABLE_RATE_LIMITING`` every query first passes the process-wide
+    ``AdmissionController``: at most ``MAX_CONCURRENT_REQUESTS`` run at once and
+    each ``tenant`` is held to ``RATE_LIMIT_PER_MINUTE``.
+    """
 
     def __init__(self, deps: AgentDependencies) -> None:
         self.deps = deps
+        self.settings = deps.settings or settings
         self.memory = ConversationMemory()
+        self.answer_cache = deps.answer_cache or _build_answer_cache(self.settings)
+        self.admission = deps.admission or get_admission_controller(self.settings)
         self.workflow = self._build_workflow(deps.workflow_name)
 
-    def _build_workflow(self, name: str):
+    def _build_workflow(self, name: str, llm: Optional[BaseLLM] = None):
+        llm = llm or self.deps.llm
+        options = self._workflow_options()
         if name == "production":
             from ..workflows.production import ProductionWorkflow
-            return ProductionWorkflow(llm=self.deps.llm, retriever=self.deps.retriever)
+            return ProductionWorkflow(llm=llm, retriever=self.deps.retriever, **options)
         if name == "langgraph":
             from ..workflows.langgraph_based import LangGraphWorkflow
-            return LangGraphWorkflow(llm=self.deps.llm, retriever=self.deps.retriever)
+            return LangGraphWorkflow(llm=llm, retriever=self.deps.retriever, workflow_options=options)
         from ..workflows.basic import BasicWorkflow
-        return BasicWorkflow(llm=self.deps.llm, retriever=self.deps.retriever)
+        return BasicWorkflow(llm=llm, retriever=self.deps.retriever, **options)
+
+    def _workflow_options(self) -> Dict[str, Any]:
+        return {
+            "rag_top_k": self.settings.rag_top_k,
+            "search_concurrency": self.settings.search_concurrency,
+            "search_timeout": self.settings.search_timeout,
+            "async_llm": self.deps.async_llm,
+            "async_retriever": self.deps.async_retriever,
+            "reranker": _build_reranker(self.settings),
+            "context_tokens": self.settings.llm_max_tokens,
+            "max_source_chars": self.settings.max_content_length,
+            "max_search_steps": self.settings.max_tools_per_query,
+            "coverage_threshold": self.settings.search_coverage_threshold,
+        }
+
+    def run(self, query: str, tenant: str = "default") -> AgentResult:
+        with self._admit(tenant), span("query", workflow=self.deps.workflow_name) as root:
+            result = self._cached(query)
+            root.attributes["cached"] = result is not None
+            if result is None:
+                result = self.workflow.run(query, memory=self.memory)
+                self._store(query, result)
+        self.memory.add(query, result.summary)
+        return result
+
+    def stream(self, query: str, tenant: str = "default") -> Iterator[AgentEvent]:
+        """Yield the plan, document batches, findings and summary tokens as they are produced.
+
+        The last event is a ``ResultEvent`` carrying the same ``AgentResult`` ``run`` returns.
+        """
+
+        admission = self._admit(tenant)
+        with admission, span("query", activate=False, workflow=self.deps.workflow_name, streamed=True) as root:
+            cached = self._cached(query)
+            root.attributes["cached"] = cached is not None
+            if cached is not None:
+                yield PlanEvent(plan=cached.plan)
+                yield FindingsEvent(findings=cached.findings)
+                yield SummaryTokenEvent(token=cached.summary)
+                self.memory.add(query, cached.summary)
+                yield ResultEvent(result=cached)
+                return
+            events = self.workflow.stream(query, memory=self.memory)
+            while True:
+                # The trace is only current while the workflow runs, not while the consumer handles an event.
+                with activate(root):
+                    event = next(events, None)
+                if event is None:
+                    return
+                if isinstance(event, ResultEvent):
+                    self._store(query, event.result)
+                    self.memory.add(query, event.result.summary)
+                yield event
 
-    def run(self, query: str) -> AgentResult:
-        result = self.workflow.run(query, memory=self.memory)
+    async def arun(self, query: str, tenant: str = "default") -> AgentResult:
+        """Non-blocking ``run`` for hosts that already own an event loop (FastAPI, aiohttp)."""
+
+        async with self._aadmit(tenant):
+            with span("query", workflow=self.deps.workflow_name) as root:
+                # Lookups and stores may embed the query, so they stay off the event loop.
+                result = await asyncio.to_thread(self._cached, query)
+                root.attributes["cached"] = result is not None
+                if result is None:
+                    result = await self.workflow.arun(query, memory=self.memory)
+                    await asyncio.to_thread(self._store, query, result)
         self.memory.add(query, result.summary)
         return result
 
+    def iter_batch(
+        self, queries: Sequence[str], max_concurrency: Optional[int] = None, tenant: str = "default"
+    ) -> Iterator[BatchResult]:
+        """Answer ``queries`` on a bounded thread pool, yielding each result as it finishes.
+
+        Queries share this agent's retriever and caches, so repeated searches and
+        page fetches across the batch are made once. Backends implementing
+        ``BatchLLM`` receive concurrent plan and summary prompts in batches. A query
+        that fails yields a ``BatchResult`` with ``error`` set instead of stopping
+        the batch. Batch answers are not added to conversation memory.
+        """
+
+        if not queries:
+            return
+        workers = max(1, min(max_concurrency or self.settings.batch_concurrency, len(queries)))
+        workflow = self.workflow
+        if isinstance(self.deps.llm, BatchLLM) and workers > 1:
+            workflow = self._build_workflow(self.deps.workflow_name, llm=MicroBatchingLLM(self.deps.llm, workers))
+
+        def answer(query: str) -> AgentResult:
+            with self._admit(tenant), span("query", workflow=self.deps.workflow_name, batch=True) as root:
+                result = self._cached(query)
+                root.attributes["cached"] = result is not None
+                if result is None:
+                    result = workflow.run(query, memory=ConversationMemory())
+                    self._store(query, result)
+                return result
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+            futures = {executor.submit(answer, query): index for index, query in enumerate(queries)}
+            for future in as_completed(futures):
+                index = futures[future]
+                error = future.exception()
+                if error is not None:
+                    logger.warning("Batch query failed", extra={"query": queries[index], "error": repr(error)})
+                    yield BatchResult(index=index, query=queries[index], error=repr(error))
+                else:
+                    yield BatchResult(index=index, query=queries[index], result=future.result())
+
+    def run_batch(
+        self, queries: Sequence[str], max_concurrency: Optional[int] = None, tenant: str = "default"
+    ) -> List[BatchResult]:
+        """Collect ``iter_batch`` results in the order of ``queries``."""
+
+        return sorted(self.iter_batch(queries, max_concurrency, tenant), key=lambda item: item.index)
+
+    def invalidate_cache(self, query: Optional[str] = None) -> None:
+        """Forget the cached answer for ``query``, or every cached answer when omitted."""
+
+        if self.answer_cache is None:
+            return
+        if query is None:
+            self.answer_cache.clear()
+        else:
+            self.answer_cache.invalidate(query)
+
+    def _admit(self, tenant: str) -> ContextManager[None]:
+        return self.admission.admit(tenant) if self.admission is not None else nullcontext()
+
+    def _aadmit(self, tenant: str) -> AsyncContextManager[None]:
+        return self.admission.aadmit(tenant) if self.admission is not None else nullcontext()
+
+    def _cached(self, query: str) -> Optional[AgentResult]:
+        return self.answer_cache.get(query) if self.answer_cache is not None else None
+
+    def _store(self, query: str, result: AgentResult) -> None:
+        if self.answer_cache is not None:
+            self.answer_cache.set(query, result)
+
     @classmethod
     def from_settings(cls, settings_obj: Settings, *, workflow_name: str = "basic") -> "DeepSearchAgent":
         """Factory for embedding into SmartBuyer or other hosts.
@@ -64,9 +239,15 @@ class DeepSearchAgent:
             result = agent.run("best LLM frameworks 2024")
         """
 
-        llm = _build_llm(settings_obj)
-        retriever = _build_retriever(settings_obj)
-        deps = AgentDependencies(llm=llm, retriever=retriever, workflow_name=workflow_name)
+        start_metrics_server(settings_obj)
+        deps = AgentDependencies(
+            llm=_build_llm(settings_obj),
+            retriever=_build_retriever(settings_obj),
+            workflow_name=workflow_name,
+            settings=settings_obj,
+            async_llm=_build_async_llm(settings_obj),
+            async_retriever=_build_async_retriever(settings_obj),
+        )
         return cls(deps)
 
 def default_agent(llm: BaseLLM, retriever: BaseRetriever | None = None, workflow: str = "basic") -> DeepSearchAgent:
@@ -80,10 +261,124 @@ def _build_llm(settings_obj: Settings) -> BaseLLM:
         return LocalLLM()
     if not settings_obj.openai_api_key:
         return LocalLLM()
-    return OpenAILLM(api_key=settings_obj.openai_api_key, model=settings_obj.openai_model)
+    llm = OpenAILLM(
+        api_key=settings_obj.openai_api_key,
+        model=settings_obj.openai_model,
+        limiter=get_rate_limiter(settings_obj, "llm"),
+    )
+    if not settings_obj.enable_llm_cache:
+        return llm
+    return CachedLLM(llm, get_llm_cache(settings_obj), settings_obj.llm_cache_nondeterministic)
 
 
 def _build_retriever(settings_obj: Settings) -> BaseRetriever:
     if settings_obj.offline:
         return StubRetriever()
-    return DuckDuckGoRetriever(max_results=settings_obj.web_max_results)
+    retriever = _build_web_retriever(settings_obj) or DuckDuckGoRetriever(
+        max_results=settings_obj.web_max_results, client=get_http_client(settings_obj)
+    )
+    if not settings_obj.enable_vector_store:
+        return retriever
+    from ..retrieval.vector_store import VectorStoreRetriever
+
+    return VectorStoreRetriever(retriever, _build_vector_store(settings_obj), settings_obj.vector_store_min_score)
+
+
+@lru_cache(maxsize=4)
+def _build_web_retriever(settings_obj: Settings) -> Optional[BaseRetriever]:
+    """Federated search over ``SEARCH_PROVIDERS``; ``None`` when only DuckDuckGo is configured.
+
+    Cached per settings so the sync and async paths share one set of provider
+    latency statistics.
+    """
+
+    keys = {"tavily": settings_obj.tavily_api_key, "brave": settings_obj.brave_api_key}
+    client = get_http_client(settings_obj)
+    providers: List[BaseRetriever] = []
+    for name in (part.strip() for part in settings_obj.search_providers.split(",")):
+        if name == "duckduckgo":
+            providers.append(DuckDuckGoRetriever(max_results=settings_obj.web_max_results, client=client))
+        elif name in keys and keys[name]:
+            cls = TavilyRetriever if name == "tavily" else BraveRetriever
+            providers.append(cls(keys[name], max_results=settings_obj.web_max_results, client=client))
+        elif name:
+            logger.warning("Skipping search provider without an API key", extra={"provider": name})
+    if len(providers) == 1 and not isinstance(providers[0], DuckDuckGoRetriever):
+        return providers[0]
+    if len(providers) <= 1:
+        return None
+    return FederatedRetriever(
+        providers,
+        hedge_percentile=settings_obj.search_hedge_percentile,
+        hedge_delay=settings_obj.search_hedge_delay,
+    )
+
+
+def _build_vector_store(settings_obj: Settings) -> "FaissVectorStore":
+    from ..retrieval.vector_store import get_vector_store
+
+    embedder = get_embedder(
+        settings_obj.embedding_model_name,
+        device=settings_obj.embedding_device,
+        batch_size=settings_obj.embedding_batch_size,
+    )
+    return get_vector_store(settings_obj.vector_store_dir, embedder)
+
+
+def _build_reranker(settings_obj: Settings) -> Optional[EmbeddingReranker]:
+    if not settings_obj.enable_rerank:
+        return None
+    embedder = get_embedder(
+        settings_obj.embedding_model_name,
+        device=settings_obj.embedding_device,
+        batch_size=settings_obj.embedding_batch_size,
+    )
+    return EmbeddingReranker(embedder, similarity_threshold=settings_obj.similarity_threshold)
+
+
+def _build_answer_cache(settings_obj: Settings) -> Optional[AnswerCache]:
+    if not settings_obj.enable_cache:
+        return None
+    embedder = None
+    if settings_obj.answer_cache_similarity > 0:
+        embedder = get_embedder(
+            settings_obj.embedding_model_name,
+            device=settings_obj.embedding_device,
+            batch_size=settings_obj.embedding_batch_size,
+        )
+    return AnswerCache(
+        ttl_seconds=settings_obj.cache_ttl_seconds,
+        max_entries=settings_obj.cache_max_entries,
+        embedder=embedder,
+        similarity_threshold=settings_obj.answer_cache_similarity,
+    )
+
+
+def _build_async_llm(settings_obj: Settings) -> AsyncBaseLLM:
+    if settings_obj.offline or settings_obj.llm_provider != "openai" or not settings_obj.openai_api_key:
+        return AsyncLocalLLM()
+    llm = AsyncOpenAILLM(
+        api_key=settings_obj.openai_api_key,
+        model=settings_obj.openai_model,
+        limiter=get_rate_limiter(settings_obj, "llm"),
+    )
+    if not settings_obj.enable_llm_cache:
+        return llm
+    return AsyncCachedLLM(llm, get_llm_cache(settings_obj), settings_obj.llm_cache_nondeterministic)
+
+
+def _build_async_retriever(settings_obj: Settings) -> AsyncBaseRetriever:
+    if settings_obj.offline:
+        return AsyncStubRetriever()
+    web = _build_web_retriever(settings_obj)
+    if web is not None:
+        retriever: AsyncBaseRetriever = AsyncRetrieverAdapter(web)
+    else:
+        retriever = AsyncDuckDuckGoRetriever(max_results=settings_obj.web_max_results, settings_obj=settings_obj)
+    if not settings_obj.enable_vector_store:
+        return retriever
+    from ..retrieval.vector_store import AsyncVectorStoreRetriever
+
+    return AsyncVectorStoreRetriever(
+        retriever, _build_vector_store(settings_obj), settings_obj.vector_store_min_score
+    )
@@ -2,14 +2,61 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List
+from typing import Iterable, List, Sequence, Set
 
+from ...infra.tracing import span
+from ...models.base import estimate_tokens, truncate_to_tokens
 from ...retrieval.base import WebDocument
-from ...utils.text import truncate_paragraph
+from ...retrieval.rag import RankedDocument
+from ...utils.text import normalize_whitespace, truncate_paragraph
+
+# A source whose share would fall below this is not worth a bullet.
+MIN_SOURCE_TOKENS = 24
 
 
 def aggregate_docs(documents: Iterable[WebDocument]) -> List[str]:
-    bullets: List[str] = []
-    for doc in documents:
-        bullets.append(f"[{doc.title}]({doc.url}): {truncate_paragraph(doc.snippet)}")
-    return bullets
+    with span("aggregate"):
+        bullets: List[str] = []
+        for doc in documents:
+            bullets.append(f"[{doc.title}]({doc.url}): {truncate_paragraph(doc.snippet)}")
+        return bullets
+
+
+def pack_context(ranked: Sequence[RankedDocument], max_tokens: int, max_source_tokens: int) -> List[str]:
+    """Fill a ``max_tokens`` budget with bullets for the best-ranked documents.
+
+    Sources are taken in rank order, skipping repeated URLs and repeated text.
+    Each bullet is capped at ``max_source_tokens`` so one long page cannot crowd
+    out the sources ranked below it; packing stops once the remaining budget
+    cannot hold a useful bullet.
+    """
+
+    with span("aggregate", documents=len(ranked)) as current:
+        bullets: List[str] = []
+        seen: Set[str] = set()
+        remaining = max_tokens
+        unique = [item.document for item in ranked if _first_sighting(item.document, seen)]
+        for doc in unique:
+            allowance = min(max_source_tokens, remaining)
+            header = f"[{doc.title}]({doc.url}): "
+            body_tokens = allowance - estimate_tokens(header)
+            if body_tokens < MIN_SOURCE_TOKENS:
+                break
+            body = truncate_to_tokens(normalize_whitespace(doc.content or doc.snippet), body_tokens)
+            bullet = header + body
+            bullets.append(bullet)
+            remaining -= estimate_tokens(bullet)
+        current.attributes.update(packed=len(bullets), tokens=max_tokens - remaining)
+        return bullets
+
+
+def _first_sighting(doc: WebDocument, seen: Set[str]) -> bool:
+    keys = {
+        normalize_whitespace(doc.url or doc.title).lower(),
+        normalize_whitespace(doc.content or doc.snippet).lower(),
+    }
+    keys.discard("")
+    if keys & seen:
+        return False
+    seen.update(keys)
+    return True
@@ -2,15 +2,90 @@
 
 from __future__ import annotations
 
-from typing import List
+import re
+from typing import List, Optional, Set
 
+from ...infra.tracing import span
 from ...prompts import search_prompt
-from ...models.base import BaseLLM, ChatMessage
+from ...models.base import AsyncBaseLLM, BaseLLM, ChatMessage
+from ...retrieval.rag import tokenize
 
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_MARKUP = re.compile(r"[*_`#]+")
 
-def create_plan(query: str, llm: BaseLLM) -> List[str]:
+# Function words ignored when comparing sub-queries or measuring query coverage.
+STOPWORDS = frozenset(
+    "a an and are as at be by do does for from how in is it of on or that the to vs what when which who "
+    "why with".split()
+)
+
+
+def create_plan(query: str, llm: BaseLLM, max_steps: Optional[int] = None) -> List[str]:
     """Ask the LLM (or heuristic) to propose sub-questions."""
 
-    prompt = search_prompt.PLAN_TEMPLATE.format(query=query)
-    response = llm.generate(prompt)
-    return [line.strip().lstrip("-1234567890. ").strip() for line in response.text.splitlines() if line.strip()]
+    with span("plan") as current:
+        prompt = search_prompt.PLAN_TEMPLATE.format(query=query)
+        response = llm.generate(prompt)
+        steps = prune_plan(parse_plan(response.text), max_steps)
+        current.attributes["steps"] = len(steps)
+        return steps
+
+
+async def acreate_plan(query: str, llm: AsyncBaseLLM, max_steps: Optional[int] = None) -> List[str]:
+    """Async variant of ``create_plan``."""
+
+    with span("plan") as current:
+        prompt = search_prompt.PLAN_TEMPLATE.format(query=query)
+        response = await llm.generate(prompt)
+        steps = prune_plan(parse_plan(response.text), max_steps)
+        current.attributes["steps"] = len(steps)
+        return steps
+
+
+def parse_plan(text: str) -> List[str]:
+    """Sub-queries from an LLM reply.
+
+    When the reply contains a list, only its items are kept, so introductions
+    and closing prose are not searched. Headings and lines ending in ``:`` are
+    always dropped.
+    """
+
+    lines = [line for line in text.splitlines() if line.strip()]
+    if any(_LIST_ITEM.match(line) for line in lines):
+        lines = [line for line in lines if _LIST_ITEM.match(line)]
+    steps = []
+    for line in lines:
+        step = _MARKUP.sub("", _LIST_ITEM.sub("", line)).strip()
+        if step and not step.endswith(":") and not line.lstrip().startswith("#"):
+            steps.append(step)
+    return steps
+
+
+def prune_plan(steps: List[str], max_steps: Optional[int] = None, similarity: float = 0.8) -> List[str]:
+    """Drop near-duplicate sub-queries and keep at most ``max_steps``.
+
+    Two steps are near-duplicates when their content words overlap by at least
+    ``similarity`` (Jaccard); the earlier one is kept.
+    """
+
+    kept: List[str] = []
+    kept_terms: List[Set[str]] = []
+    for step in steps:
+        if max_steps is not None and len(kept) >= max_steps:
+            break
+        terms = content_terms(step)
+        if any(_jaccard(terms, other) >= similarity for other in kept_terms):
+            continue
+        kept.append(step)
+        kept_terms.append(terms)
+    return kept
+
+
+def content_terms(text: str) -> Set[str]:
+    return {term for term in tokenize(text) if term not in STOPWORDS}
+
+
+def _jaccard(left: Set[str], right: Set[str]) -> float:
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
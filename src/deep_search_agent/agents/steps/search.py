@@ -2,10 +2,192 @@
 
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import contextvars
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
-from ...retrieval.base import BaseRetriever, WebDocument
+from ...infra.logger import get_logger
+from ...infra.tracing import span
+from ...retrieval.base import AsyncBaseRetriever, BaseRetriever, WebDocument
+from ...retrieval.rag import tokenize
+from .plan import content_terms
+
+
+logger = get_logger(__name__)
+
+
+class CoverageTracker:
+    """Decides when enough has been retrieved to stop issuing searches.
+
+    Satisfied once at least ``min_documents`` distinct documents are in hand
+    and they mention at least ``threshold`` of the query's content words. A
+    ``threshold`` of 0 never stops early.
+    """
+
+    def __init__(self, query: str, threshold: float, min_documents: int) -> None:
+        self.threshold = threshold
+        self.min_documents = min_documents
+        self.terms = content_terms(query)
+        self.covered: Set[str] = set()
+        self.urls: Set[str] = set()
+
+    @property
+    def coverage(self) -> float:
+        return len(self.covered) / len(self.terms) if self.terms else 1.0
+
+    def update(self, documents: List[WebDocument]) -> bool:
+        """Account for a new batch; returns whether searching can stop."""
+
+        if self.threshold <= 0:
+            return False
+        for doc in documents:
+            self.urls.add(doc.url or doc.title)
+            missing = self.terms - self.covered
+            if missing:
+                self.covered |= missing & set(tokenize(f"{doc.title} {doc.snippet} {doc.content}"))
+        return len(self.urls) >= self.min_documents and self.coverage >= self.threshold
 
 
 def search_web(query: str, retriever: BaseRetriever, per_query_results: int = 3) -> List[WebDocument]:
-    return retriever.search(query, max_results=per_query_results)
+    with span("search", query=query) as current:
+        documents = retriever.search(query, max_results=per_query_results)
+        current.attributes["results"] = len(documents)
+        return documents
+
+
+def iter_search(
+    queries: Sequence[str],
+    retriever: BaseRetriever,
+    per_query_results: int = 3,
+    max_concurrency: int = 1,
+    timeout: Optional[float] = None,
+) -> Iterator[Tuple[int, List[WebDocument]]]:
+    """Yield ``(index, batch)`` for every query as its search completes.
+
+    At most ``max_concurrency`` searches run at once. As in ``aiter_search``, a
+    step still running ``timeout`` seconds after it started yields an empty
+    batch, sequential or not; errors raised by the retriever propagate. Threads
+    cannot be interrupted, so a timed-out search finishes in the background
+    (bounded by the retriever's HTTP timeout) and its result is dropped; the
+    next step starts on a fresh thread rather than waiting for it. Steps start
+    as slots free up, so closing the iterator early skips the rest.
+    """
+
+    if not queries or (max_concurrency <= 1 and timeout is None):
+        for index, query in enumerate(queries):
+            yield index, search_web(query, retriever, per_query_results)
+        return
+
+    workers = min(max(max_concurrency, 1), len(queries))
+    # Sized for the worst case where every step but the last times out; threads are only created when needed.
+    executor = ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix="search")
+    queued = deque(enumerate(queries))
+    pending: Dict[Future, int] = {}
+    deadlines: Dict[Future, float] = {}
+    try:
+        while queued or pending:
+            while queued and len(pending) < workers:
+                index, query = queued.popleft()
+                # Each step runs in a copy of the caller's context so its span joins the query trace.
+                step = contextvars.copy_context().run
+                future = executor.submit(step, search_web, query, retriever, per_query_results)
+                pending[future] = index
+                if timeout is not None:
+                    deadlines[future] = time.monotonic() + timeout
+            wait_for = None
+            if deadlines:
+                wait_for = max(min(deadlines.values()) - time.monotonic(), 0.0)
+            done, _ = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                deadlines.pop(future, None)
+                yield pending.pop(future), future.result()
+            now = time.monotonic()
+            for future in [future for future, deadline in deadlines.items() if deadline <= now]:
+                del deadlines[future]
+                index = pending.pop(future)
+                logger.warning("Search step timed out", extra={"query": queries[index], "timeout": timeout})
+                yield index, []
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def search_many(
+    queries: Sequence[str],
+    retriever: BaseRetriever,
+    per_query_results: int = 3,
+    max_concurrency: int = 1,
+    timeout: Optional[float] = None,
+) -> List[List[WebDocument]]:
+    """Collect ``iter_search`` batches in the same order as ``queries``."""
+
+    batches: List[List[WebDocument]] = [[] for _ in queries]
+    for index, batch in iter_search(queries, retriever, per_query_results, max_concurrency, timeout):
+        batches[index] = batch
+    return batches
+
+
+async def asearch_web(query: str, retriever: AsyncBaseRetriever, per_query_results: int = 3) -> List[WebDocument]:
+    with span("search", query=query) as current:
+        documents = await retriever.search(query, max_results=per_query_results)
+        current.attributes["results"] = len(documents)
+        return documents
+
+
+async def aiter_search(
+    queries: Sequence[str],
+    retriever: AsyncBaseRetriever,
+    per_query_results: int = 3,
+    max_concurrency: int = 1,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[Tuple[int, List[WebDocument]]]:
+    """Async variant of ``iter_search``; closing it early cancels the steps not yet finished.
+
+    ``timeout`` starts once a step holds a slot.
+    """
+
+    if max_concurrency <= 1:
+        for index, query in enumerate(queries):
+            yield index, await _timed_search(query, retriever, per_query_results, timeout)
+        return
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_step(index: int, query: str) -> Tuple[int, List[WebDocument]]:
+        async with semaphore:
+            return index, await _timed_search(query, retriever, per_query_results, timeout)
+
+    tasks = [asyncio.ensure_future(run_step(index, query)) for index, query in enumerate(queries)]
+    try:
+        for step in asyncio.as_completed(tasks):
+            yield await step
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _timed_search(
+    query: str, retriever: AsyncBaseRetriever, per_query_results: int, timeout: Optional[float]
+) -> List[WebDocument]:
+    try:
+        return await asyncio.wait_for(asearch_web(query, retriever, per_query_results), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Search step timed out", extra={"query": query, "timeout": timeout})
+        return []
+
+
+async def asearch_many(
+    queries: Sequence[str],
+    retriever: AsyncBaseRetriever,
+    per_query_results: int = 3,
+    max_concurrency: int = 1,
+    timeout: Optional[float] = None,
+) -> List[List[WebDocument]]:
+    """Async variant of ``search_many``; ``timeout`` starts once a step holds a slot."""
+
+    batches: List[List[WebDocument]] = [[] for _ in queries]
+    async for index, batch in aiter_search(queries, retriever, per_query_results, max_concurrency, timeout):
+        batches[index] = batch
+    return batches
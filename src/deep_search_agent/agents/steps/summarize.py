@@ -2,12 +2,27 @@
 
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Iterable, Iterator
 
-from ...models.base import BaseLLM
+from ...infra.tracing import span
+from ...models.base import AsyncBaseLLM, BaseLLM, stream_generate
 from ...prompts import summarize_prompt
 
 
 def summarize_findings(query: str, findings: Iterable[str], llm: BaseLLM) -> str:
+    with span("summarize"):
+        prompt = summarize_prompt.SUMMARY_TEMPLATE.format(query=query, findings="\n".join(findings))
+        return llm.generate(prompt).text
+
+
+def stream_summary(query: str, findings: Iterable[str], llm: BaseLLM) -> Iterator[str]:
     prompt = summarize_prompt.SUMMARY_TEMPLATE.format(query=query, findings="\n".join(findings))
-    return llm.generate(prompt).text
+    # Not activated: the consumer runs between tokens and its spans are not part of the summary.
+    with span("summarize", activate=False, streamed=True):
+        yield from stream_generate(llm, prompt)
+
+
+async def asummarize_findings(query: str, findings: Iterable[str], llm: AsyncBaseLLM) -> str:
+    with span("summarize"):
+        prompt = summarize_prompt.SUMMARY_TEMPLATE.format(query=query, findings="\n".join(findings))
+        return (await llm.generate(prompt)).text
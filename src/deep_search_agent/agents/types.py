@@ -1,9 +1,11 @@
-"""Shared types for agent results and findings."""
+"""Shared types for agent results, findings and streaming events."""
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional, Union
+
+from ..retrieval.base import WebDocument
 
 
 @dataclass
@@ -31,3 +33,76 @@ class AgentResult:
             "sources": [finding.to_dict() for finding in self.findings],
         }
 
+    @classmethod
+    def from_dict(cls, data: dict) -> "AgentResult":
+        """Inverse of ``to_dict``."""
+
+        return cls(
+            query=data["query"],
+            plan=list(data["plan"]),
+            findings=[ResearchFinding(**source) for source in data["sources"]],
+            summary=data["answer"],
+        )
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one query in ``DeepSearchAgent.iter_batch``; exactly one of ``result``/``error`` is set."""
+
+    index: int
+    query: str
+    result: Optional[AgentResult] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        if self.result is None:
+            return {"index": self.index, "query": self.query, "error": self.error}
+        return {"index": self.index, **self.result.to_dict()}
+
+
+@dataclass
+class PlanEvent:
+    plan: List[str]
+
+    def to_dict(self) -> dict:
+        return {"type": "plan", "plan": self.plan}
+
+
+@dataclass
+class DocumentsEvent:
+    step: str
+    documents: List[WebDocument]
+
+    def to_dict(self) -> dict:
+        return {
+            "type": "documents",
+            "step": self.step,
+            "documents": [{"title": doc.title, "url": doc.url, "snippet": doc.snippet} for doc in self.documents],
+        }
+
+
+@dataclass
+class FindingsEvent:
+    findings: List[ResearchFinding]
+
+    def to_dict(self) -> dict:
+        return {"type": "findings", "sources": [finding.to_dict() for finding in self.findings]}
+
+
+@dataclass
+class SummaryTokenEvent:
+    token: str
+
+    def to_dict(self) -> dict:
+        return {"type": "token", "token": self.token}
+
+
+@dataclass
+class ResultEvent:
+    result: AgentResult
+
+    def to_dict(self) -> dict:
+        return {"type": "result", **self.result.to_dict()}
+
+
+AgentEvent = Union[PlanEvent, DocumentsEvent, FindingsEvent, SummaryTokenEvent, ResultEvent]
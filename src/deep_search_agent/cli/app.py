@@ -4,11 +4,19 @@ from __future__ import annotations
 
 import argparse
 import json
-from typing import Callable, List, Optional
+import sys
+from typing import Callable, Iterable, List, Optional
 
 from dotenv import load_dotenv
 
-from deep_search_agent.agents.types import AgentResult
+from deep_search_agent.agents.types import (
+    AgentEvent,
+    AgentResult,
+    DocumentsEvent,
+    FindingsEvent,
+    PlanEvent,
+    SummaryTokenEvent,
+)
 from deep_search_agent.agents.deep_search_agent import DeepSearchAgent, default_agent
 from ..config import settings
 from ..models.base import BaseLLM
@@ -74,6 +82,22 @@ def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Print AgentResult as JSON with keys (query, answer, sources).",
     )
+    parser.add_argument(
+        "--batch",
+        metavar="PATH",
+        help="Answer every query in a JSONL file (one {\"query\": ...} object or JSON string per line).",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="PATH",
+        help="With --batch, write JSONL results here instead of stdout.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        metavar="N",
+        help="With --batch, number of queries answered in parallel.",
+    )
     return parser.parse_args(argv)
 
 
@@ -81,8 +105,11 @@ def run_cli(
     argv: Optional[List[str]] = None,
     input_fn: Callable[[str], str] = input,
     output_fn: Callable[[str], None] = print,
+    write_fn: Optional[Callable[[str], None]] = None,
 ) -> None:
     load_dotenv()
+    if write_fn is None and output_fn is print:
+        write_fn = _write_stdout
     args = parse_args(argv)
     overrides = {}
     if args.offline or settings.offline:
@@ -96,17 +123,21 @@ def run_cli(
     retriever = build_retriever(active_settings)
     agent = DeepSearchAgent.from_settings(active_settings, workflow_name=args.workflow)
 
+    if args.batch:
+        run_batch_file(agent, args.batch, args.output, args.concurrency, output_fn)
+        return
+
     output_fn("=" * 60)
     mode = "OFFLINE" if active_settings.offline else "ONLINE"
     output_fn(f"Deep Search Agent (CLI) - {mode} mode")
     output_fn("=" * 60)
 
     def render(query: str) -> None:
-        result = agent.run(query)
         if args.json:
+            result = agent.run(query)
             output_fn(json.dumps(result.to_dict(), ensure_ascii=False, indent=2))
             return
-        pretty_print_result(result, output_fn)
+        pretty_print_stream(agent.stream(query), output_fn, write_fn)
 
     if args.query:
         render(args.query)
@@ -124,9 +155,85 @@ def run_cli(
             break
 
 
+def read_batch_queries(path: str) -> List[str]:
+    queries: List[str] = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            queries.append(item if isinstance(item, str) else item["query"])
+    return queries
+
+
+def run_batch_file(
+    agent: DeepSearchAgent,
+    path: str,
+    output_path: Optional[str],
+    concurrency: Optional[int],
+    output_fn: Callable[[str], None],
+) -> None:
+    """Answer the queries in ``path``, emitting one JSON line per query as it finishes."""
+
+    queries = read_batch_queries(path)
+    handle = open(output_path, "w", encoding="utf-8") if output_path else None
+    try:
+        for item in agent.iter_batch(queries, max_concurrency=concurrency):
+            line = json.dumps(item.to_dict(), ensure_ascii=False)
+            if handle is None:
+                output_fn(line)
+            else:
+                handle.write(line + "\n")
+                handle.flush()
+    finally:
+        if handle is not None:
+            handle.close()
+
+
 def pretty_print_result(result: AgentResult, output_fn: Callable[[str], None]) -> None:
     output_fn(f"\nPlan: {result.plan}")
     output_fn("\nFindings:")
     for finding in result.findings:
         output_fn(f"- {finding.title} -> {finding.url}")
     output_fn("\nSummary:\n" + result.summary + "\n")
+
+
+def pretty_print_stream(
+    events: Iterable[AgentEvent],
+    output_fn: Callable[[str], None],
+    write_fn: Optional[Callable[[str], None]] = None,
+) -> None:
+    """Print events as they arrive in the ``pretty_print_result`` layout.
+
+    Summary tokens go straight to ``write_fn`` when given (unbuffered terminal
+    output); otherwise they are emitted through ``output_fn`` line by line.
+    """
+
+    pending = ""
+    for event in events:
+        if isinstance(event, PlanEvent):
+            output_fn(f"\nPlan: {event.plan}")
+        elif isinstance(event, DocumentsEvent):
+            output_fn(f"  searched: {event.step} ({len(event.documents)} results)")
+        elif isinstance(event, FindingsEvent):
+            output_fn("\nFindings:")
+            for finding in event.findings:
+                output_fn(f"- {finding.title} -> {finding.url}")
+            output_fn("\nSummary:")
+        elif isinstance(event, SummaryTokenEvent):
+            if write_fn is not None:
+                write_fn(event.token)
+                continue
+            pending += event.token
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                output_fn(line)
+    if write_fn is not None:
+        write_fn("\n\n")
+    else:
+        output_fn(pending + "\n")
+
+
+def _write_stdout(text: str) -> None:
+    sys.stdout.write(text)
+    sys.stdout.flush()
@@ -0,0 +1,5 @@
+"""Configuration package."""
+
+from .config import Settings, get_settings, settings
+
+__all__ = ["Settings", "get_settings", "settings"]
@@ -16,14 +16,72 @@ class Settings:
     openai_api_key: Optional[str]
     openai_model: str
     openai_temperature: float
+    llm_max_tokens: int
     web_max_results: int
     rag_top_k: int
     enable_cache: bool
     cache_ttl_seconds: int
+    cache_max_entries: int
+    cache_max_bytes: int
+    cache_backend: str
+    cache_dir: str
+    answer_cache_similarity: float
+    enable_llm_cache: bool
+    llm_cache_ttl_seconds: int
+    llm_cache_nondeterministic: bool
+    enable_rate_limiting: bool
+    requests_per_minute: int
     rate_limit_per_minute: int
+    max_concurrent_requests: int
+    rate_limit_backend: str
+    rate_limit_max_wait: Optional[float]
     user_agent: str
     crawler_timeout: float
+    crawler_max_bytes: int
+    crawler_concurrency: int
+    crawler_per_host_concurrency: int
+    crawler_host_delay: float
+    crawler_respect_robots: bool
+    max_content_length: int
     offline: bool
+    enable_metrics: bool
+    prometheus_port: int
+    search_concurrency: int
+    max_tools_per_query: int
+    search_coverage_threshold: float
+    search_timeout: Optional[float]
+    search_providers: str
+    tavily_api_key: Optional[str]
+    brave_api_key: Optional[str]
+    search_hedge_percentile: float
+    search_hedge_delay: float
+    batch_concurrency: int
+    server_host: str
+    server_port: int
+    server_workflow: str
+    server_pool_size: int
+    server_max_queue: int
+    server_queue_timeout: Optional[float]
+    job_workers: int
+    job_poll_interval: float
+    job_lease_seconds: float
+    job_max_attempts: int
+    http_timeout: float
+    http_max_connections: int
+    http_max_keepalive: int
+    http_keepalive_expiry: float
+    http2: bool
+    http_per_host_connections: int
+    http_retries: int
+    http_backoff_seconds: float
+    enable_rerank: bool
+    embedding_model_name: str
+    embedding_device: Optional[str]
+    embedding_batch_size: int
+    similarity_threshold: float
+    enable_vector_store: bool
+    vector_store_dir: str
+    vector_store_min_score: float
 
     def with_overrides(self, **kwargs) -> "Settings":
         return replace(self, **kwargs)
@@ -38,14 +96,72 @@ def get_settings() -> Settings:
         openai_api_key=os.getenv("OPENAI_API_KEY"),
         openai_model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
         openai_temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.2")),
+        llm_max_tokens=int(os.getenv("LLM_MAX_TOKENS", "4096")),
         web_max_results=int(os.getenv("WEB_MAX_RESULTS", "5")),
         rag_top_k=int(os.getenv("RAG_TOP_K", "3")),
         enable_cache=os.getenv("ENABLE_AGENT_CACHE", "true").lower() == "true",
         cache_ttl_seconds=int(os.getenv("CACHE_TTL_SECONDS", "600")),
+        cache_max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")),
+        cache_max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        cache_backend=os.getenv("CACHE_BACKEND", "memory").lower(),
+        cache_dir=os.getenv("CACHE_DIR", ".cache/deep_search_agent"),
+        answer_cache_similarity=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0")),
+        enable_llm_cache=os.getenv("ENABLE_LLM_CACHE", "true").lower() == "true",
+        llm_cache_ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 3600))),
+        llm_cache_nondeterministic=os.getenv("LLM_CACHE_NONDETERMINISTIC", "false").lower() == "true",
+        enable_rate_limiting=os.getenv("ENABLE_RATE_LIMITING", "false").lower() == "true",
+        requests_per_minute=int(os.getenv("REQUESTS_PER_MINUTE", "60")),
         rate_limit_per_minute=int(os.getenv("RATE_LIMIT_PER_MINUTE", "30")),
+        max_concurrent_requests=int(os.getenv("MAX_CONCURRENT_REQUESTS", "5")),
+        rate_limit_backend=os.getenv("RATE_LIMIT_BACKEND", "memory").lower(),
+        rate_limit_max_wait=float(os.getenv("RATE_LIMIT_MAX_WAIT", "30")) or None,
         user_agent=os.getenv("DEEPSEARCH_USER_AGENT", "DeepSearchAgent/1.0"),
         crawler_timeout=float(os.getenv("CRAWLER_TIMEOUT", "10.0")),
+        crawler_max_bytes=int(os.getenv("CRAWLER_MAX_BYTES", str(2 * 1024 * 1024))),
+        crawler_concurrency=int(os.getenv("CRAWLER_CONCURRENCY", "8")),
+        crawler_per_host_concurrency=int(os.getenv("CRAWLER_PER_HOST_CONCURRENCY", "2")),
+        crawler_host_delay=float(os.getenv("CRAWLER_HOST_DELAY", "0.25")),
+        crawler_respect_robots=os.getenv("CRAWLER_RESPECT_ROBOTS", "true").lower() == "true",
+        max_content_length=int(os.getenv("MAX_CONTENT_LENGTH", "2000")),
         offline=os.getenv("DEEPSEARCH_OFFLINE", "false").lower() == "true",
+        enable_metrics=os.getenv("ENABLE_METRICS", "false").lower() == "true",
+        prometheus_port=int(os.getenv("PROMETHEUS_PORT", "8000")),
+        search_concurrency=int(os.getenv("SEARCH_CONCURRENCY", "1")),
+        max_tools_per_query=int(os.getenv("MAX_TOOLS_PER_QUERY", "5")),
+        search_coverage_threshold=float(os.getenv("SEARCH_COVERAGE_THRESHOLD", "0")),
+        search_timeout=float(os.getenv("SEARCH_STEP_TIMEOUT", "0")) or None,
+        search_providers=os.getenv("SEARCH_PROVIDERS", "duckduckgo").lower(),
+        tavily_api_key=os.getenv("TAVILY_API_KEY"),
+        brave_api_key=os.getenv("BRAVE_API_KEY"),
+        search_hedge_percentile=float(os.getenv("SEARCH_HEDGE_PERCENTILE", "0.9")),
+        search_hedge_delay=float(os.getenv("SEARCH_HEDGE_DELAY", "0.5")),
+        batch_concurrency=int(os.getenv("BATCH_CONCURRENCY", "4")),
+        server_host=os.getenv("SERVER_HOST", "127.0.0.1"),
+        server_port=int(os.getenv("SERVER_PORT", "8080")),
+        server_workflow=os.getenv("SERVER_WORKFLOW", "production"),
+        server_pool_size=int(os.getenv("SERVER_POOL_SIZE", "4")),
+        server_max_queue=int(os.getenv("SERVER_MAX_QUEUE", "16")),
+        server_queue_timeout=float(os.getenv("SERVER_QUEUE_TIMEOUT", "10")) or None,
+        job_workers=int(os.getenv("JOB_WORKERS", "2")),
+        job_poll_interval=float(os.getenv("JOB_POLL_INTERVAL", "0.5")),
+        job_lease_seconds=float(os.getenv("JOB_LEASE_SECONDS", "300")),
+        job_max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "2")),
+        http_timeout=float(os.getenv("HTTP_TIMEOUT", "10.0")),
+        http_max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        http_max_keepalive=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+        http_keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0")),
+        http2=os.getenv("HTTP2", "false").lower() == "true",
+        http_per_host_connections=int(os.getenv("HTTP_PER_HOST_CONNECTIONS", "6")),
+        http_retries=int(os.getenv("HTTP_RETRIES", "2")),
+        http_backoff_seconds=float(os.getenv("HTTP_BACKOFF_SECONDS", "0.25")),
+        enable_rerank=os.getenv("ENABLE_RERANK", "false").lower() == "true",
+        embedding_model_name=os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2"),
+        embedding_device=os.getenv("EMBEDDING_DEVICE"),
+        embedding_batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "16")),
+        similarity_threshold=float(os.getenv("VECTOR_SIMILARITY_THRESHOLD", "0.35")),
+        enable_vector_store=os.getenv("ENABLE_VECTOR_STORE", "false").lower() == "true",
+        vector_store_dir=os.getenv("VECTOR_STORE_DIR", ".vector_store"),
+        vector_store_min_score=float(os.getenv("VECTOR_STORE_MIN_SCORE", "0.6")),
     )
 
 
@@ -1,10 +1,16 @@
-"""Simple in-memory cache with TTL support."""
+"""Cache front-end with pluggable storage backends and TTL support."""
 
 from __future__ import annotations
 
+import sys
+import threading
 import time
-from dataclasses import dataclass
-from typing import Callable, Dict, Generic, Optional, Tuple, TypeVar
+from collections import OrderedDict
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Any, Awaitable, Callable, Generic, Optional, Protocol, TypeVar
+
+from .metrics import CACHE_LOOKUPS
+from .singleflight import AsyncSingleFlight, SingleFlight
 
 
 K = TypeVar("K")
@@ -15,31 +21,241 @@ V = TypeVar("V")
 class CacheEntry(Generic[V]):
     value: V
     expires_at: float
+    size: int = 0
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate payload size in bytes; strings dominate what we cache."""
+
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return sum(estimate_size(getattr(value, item.name)) for item in fields(value))
+    return sys.getsizeof(value)
+
+
+class CacheBackend(Protocol[K, V]):
+    """Storage behind ``TTLCache``; each backend owns its bounds and expiry."""
+
+    def get(self, key: K) -> Optional[V]:
+        ...
+
+    def peek(self, key: K) -> Optional[V]:
+        """Like ``get``, but without counting the lookup or refreshing recency."""
+        ...
+
+    def set(self, key: K, value: V, ttl_seconds: float) -> None:
+        ...
+
+    def delete(self, key: K) -> None:
+        ...
+
+    def clear(self) -> None:
+        ...
+
+    def stats(self) -> CacheStats:
+        ...
+
+
+class MemoryBackend(Generic[K, V]):
+    """Thread-safe LRU store bounded by entry count and an approximate byte budget.
+
+    Expired entries are dropped when read and by a sweep that runs at most once
+    every ``sweep_interval`` seconds, piggybacking on writes.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = 1024,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = estimate_size,
+        sweep_interval: float = 60.0,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.sweep_interval = sweep_interval
+        self._store: "OrderedDict[K, CacheEntry[V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._stats = CacheStats()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._store.move_to_end(key)
+            self._stats.hits += 1
+            return entry.value
+
+    def peek(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is None or entry.expires_at < time.monotonic():
+                return None
+            return entry.value
+
+    def set(self, key: K, value: V, ttl_seconds: float) -> None:
+        size = self.sizeof(value)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._store:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._store[key] = CacheEntry(value=value, expires_at=now + ttl_seconds, size=size)
+            self._bytes += size
+            if now >= self._next_sweep:
+                self._sweep(now)
+            self._evict()
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            if key in self._store:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                entries=len(self._store),
+                bytes=self._bytes,
+            )
+
+    def _remove(self, key: K) -> None:
+        entry = self._store.pop(key)
+        self._bytes -= entry.size
+
+    def _sweep(self, now: float) -> None:
+        expired = [key for key, entry in self._store.items() if entry.expires_at < now]
+        for key in expired:
+            self._remove(key)
+        self._stats.expirations += len(expired)
+        self._next_sweep = now + self.sweep_interval
+
+    def _evict(self) -> None:
+        while self._store and (
+            (self.max_entries is not None and len(self._store) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(self._store))
+            self._remove(key)
+            self._stats.evictions += 1
 
 
 class TTLCache(Generic[K, V]):
-    """A tiny cache suitable for demo usage."""
+    """get/set/get_or_set front-end over a ``CacheBackend``.
+
+    Without an explicit backend a bounded ``MemoryBackend`` is used, sized by
+    ``max_entries`` / ``max_bytes``.
+    """
 
-    def __init__(self, ttl_seconds: int = 600) -> None:
+    def __init__(
+        self,
+        ttl_seconds: int = 600,
+        max_entries: Optional[int] = 1024,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = estimate_size,
+        sweep_interval: float = 60.0,
+        backend: Optional[CacheBackend[K, V]] = None,
+        name: str = "default",
+    ) -> None:
+        self.name = name
         self.ttl_seconds = ttl_seconds
-        self._store: Dict[K, CacheEntry[V]] = {}
+        self.backend: CacheBackend[K, V] = backend if backend is not None else MemoryBackend(
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            sizeof=sizeof,
+            sweep_interval=sweep_interval,
+        )
+        self._flights: SingleFlight[K, V] = SingleFlight()
+        self._async_flights: AsyncSingleFlight[K, V] = AsyncSingleFlight()
 
     def get(self, key: K) -> Optional[V]:
-        entry = self._store.get(key)
-        if not entry:
-            return None
-        if entry.expires_at < time.time():
-            self._store.pop(key, None)
-            return None
-        return entry.value
+        value = self.backend.get(key)
+        CACHE_LOOKUPS.labels(self.name, "miss" if value is None else "hit").inc()
+        return value
 
     def set(self, key: K, value: V) -> None:
-        self._store[key] = CacheEntry(value=value, expires_at=time.time() + self.ttl_seconds)
+        self.backend.set(key, value, self.ttl_seconds)
 
     def get_or_set(self, key: K, factory: Callable[[], V]) -> V:
+        """Return the cached value or build it, coalescing concurrent misses for ``key``."""
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        return self._flights.do(key, lambda: self._load(key, factory))
+
+    async def aget_or_set(self, key: K, factory: Callable[[], Awaitable[V]]) -> V:
+        """Async ``get_or_set``; concurrent misses on one event loop await a single ``factory()``."""
+
         cached = self.get(key)
+        if cached is not None:
+            return cached
+        return await self._async_flights.do(key, lambda: self._aload(key, factory))
+
+    def delete(self, key: K) -> None:
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> CacheStats:
+        return self.backend.stats()
+
+    def __len__(self) -> int:
+        return self.stats().entries
+
+    def _load(self, key: K, factory: Callable[[], V]) -> V:
+        # The previous flight for this key may have finished between our miss and now;
+        # that miss was already counted, so the recheck is not.
+        cached = self.backend.peek(key)
         if cached is not None:
             return cached
         value = factory()
         self.set(key, value)
         return value
+
+    async def _aload(self, key: K, factory: Callable[[], Awaitable[V]]) -> V:
+        cached = self.backend.peek(key)
+        if cached is not None:
+            return cached
+        value = await factory()
+        self.set(key, value)
+        return value
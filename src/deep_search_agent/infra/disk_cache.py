@@ -0,0 +1,250 @@
+"""SQLite-backed persistent cache backend shared by processes on one host."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Callable, Generic, List, Optional, Protocol, Tuple, TypeVar
+
+from .cache import CacheStats
+
+
+V = TypeVar("V")
+
+
+class Serializer(Protocol[V]):
+    def dumps(self, value: V) -> bytes:
+        ...
+
+    def loads(self, payload: bytes) -> V:
+        ...
+
+
+class TextSerializer:
+    """zlib-compressed UTF-8 text; crawled pages compress several-fold."""
+
+    def dumps(self, value: str) -> bytes:
+        return zlib.compress(value.encode("utf-8"))
+
+    def loads(self, payload: bytes) -> str:
+        return zlib.decompress(payload).decode("utf-8")
+
+
+class JSONSerializer:
+    def __init__(
+        self,
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value,
+    ) -> None:
+        self.encode = encode
+        self.decode = decode
+
+    def dumps(self, value: Any) -> bytes:
+        raw = json.dumps(self.encode(value), ensure_ascii=False, separators=(",", ":"))
+        return zlib.compress(raw.encode("utf-8"))
+
+    def loads(self, payload: bytes) -> Any:
+        return self.decode(json.loads(zlib.decompress(payload).decode("utf-8")))
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS cache_entries_lru ON cache_entries (namespace, accessed_at);
+CREATE INDEX IF NOT EXISTS cache_entries_expiry ON cache_entries (namespace, expires_at);
+"""
+
+
+class SQLiteBackend(Generic[V]):
+    """Persistent ``CacheBackend`` storing serialized values in a WAL-mode SQLite file.
+
+    Several caches can share one file through ``namespace``. Each thread gets its
+    own connection and single-row writes are autocommit upserts, so processes on
+    the same host can read and write concurrently; only the multi-statement
+    maintenance pass takes a ``BEGIN IMMEDIATE`` lock. Expiry uses wall-clock time so it
+    survives restarts; entry and byte bounds are enforced by an amortized
+    maintenance pass (every ``maintenance_every`` writes or ``sweep_interval``
+    seconds), which keeps writes cheap at the cost of briefly overshooting.
+    A hit only refreshes the row's LRU position when it was last touched more
+    than ``touch_interval`` seconds ago, so hot reads do not turn into writes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        serializer: Serializer[V],
+        namespace: str = "default",
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sweep_interval: float = 60.0,
+        maintenance_every: int = 64,
+        busy_timeout: float = 30.0,
+        touch_interval: float = 60.0,
+    ) -> None:
+        self.path = path
+        self.serializer = serializer
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.maintenance_every = maintenance_every
+        self.busy_timeout = busy_timeout
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._writes = 0
+        self._next_sweep = time.time() + sweep_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[V]:
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        ).fetchone()
+        if row is None:
+            self._count(misses=1)
+            return None
+        payload, expires_at, accessed_at = row
+        if expires_at < now:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at < ?",
+                (self.namespace, key, now),
+            )
+            self._count(misses=1, expirations=1)
+            return None
+        if now - accessed_at >= self.touch_interval:
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+        self._count(hits=1)
+        return self.serializer.loads(payload)
+
+    def peek(self, key: str) -> Optional[V]:
+        row = self._connection().execute(
+            "SELECT value FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at >= ?",
+            (self.namespace, key, time.time()),
+        ).fetchone()
+        return self.serializer.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, value: V, ttl_seconds: float) -> None:
+        payload = self.serializer.dumps(value)
+        if self.max_bytes is not None and len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.namespace, key, sqlite3.Binary(payload), len(payload), now + ttl_seconds, now),
+        )
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.maintenance_every == 0 or now >= self._next_sweep
+            if due:
+                self._next_sweep = now + self.sweep_interval
+        if due:
+            self.maintain(now)
+
+    def delete(self, key: str) -> None:
+        self._connection().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key),
+        )
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def stats(self) -> CacheStats:
+        entries, total = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()
+        with self._lock:
+            return CacheStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                expirations=self._stats.expirations,
+                entries=entries,
+                bytes=total,
+            )
+
+    def maintain(self, now: Optional[float] = None) -> None:
+        """Drop expired rows, then evict least recently used rows until within bounds."""
+
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND expires_at < ?",
+                (self.namespace, now),
+            ).rowcount
+            evicted = self._evict(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._count(expirations=expired, evictions=evicted)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        entries, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()
+        excess_entries = max(entries - self.max_entries, 0) if self.max_entries is not None else 0
+        excess_bytes = max(total - self.max_bytes, 0) if self.max_bytes is not None else 0
+        if not excess_entries and not excess_bytes:
+            return 0
+        victims: List[Tuple[str, str]] = []
+        freed = 0
+        for key, size in conn.execute(
+            "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY accessed_at",
+            (self.namespace,),
+        ):
+            if len(victims) >= excess_entries and freed >= excess_bytes:
+                break
+            victims.append((self.namespace, key))
+            freed += size
+        conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims)
+        return len(victims)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, hits: int = 0, misses: int = 0, evictions: int = 0, expirations: int = 0) -> None:
+        with self._lock:
+            self._stats.hits += hits
+            self._stats.misses += misses
+            self._stats.evictions += evictions
+            self._stats.expirations += expirations
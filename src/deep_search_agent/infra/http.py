@@ -0,0 +1,400 @@
+"""Process-wide HTTP clients shared by retrievers and crawlers.
+
+One pooled ``httpx.Client`` (and one ``httpx.AsyncClient`` per event loop) is
+reused by every component, so TLS handshakes and keep-alive connections carry
+over across queries and agents. The transport adds per-host connection caps and
+retry with exponential backoff for idempotent requests; with
+``ENABLE_RATE_LIMITING`` every attempt also waits for its host's token. Each
+``Settings`` gets its own clients, so limits follow the settings an agent was
+built from; components that only read the process settings (the crawler) use
+the default clients.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, Generic, Iterator, Optional, TypeVar, Union
+
+import httpx
+
+from ..config import Settings, settings
+from .logger import get_logger
+from .metrics import HTTP_RESPONSES
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .tracing import span
+
+
+logger = get_logger(__name__)
+
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+@dataclass(frozen=True)
+class HttpClientConfig:
+    user_agent: str = "DeepSearchAgent/1.0"
+    timeout: float = 10.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    per_host_connections: int = 6
+    max_hosts: int = 1024
+    retries: int = 2
+    backoff_seconds: float = 0.25
+    max_backoff_seconds: float = 8.0
+
+    @classmethod
+    def from_settings(cls, settings_obj: Settings) -> "HttpClientConfig":
+        return cls(
+            user_agent=settings_obj.user_agent,
+            timeout=settings_obj.http_timeout,
+            max_connections=settings_obj.http_max_connections,
+            max_keepalive_connections=settings_obj.http_max_keepalive,
+            keepalive_expiry=settings_obj.http_keepalive_expiry,
+            http2=settings_obj.http2,
+            per_host_connections=settings_obj.http_per_host_connections,
+            retries=settings_obj.http_retries,
+            backoff_seconds=settings_obj.http_backoff_seconds,
+        )
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff_seconds)
+        return min(self.backoff_seconds * (2**attempt), self.max_backoff_seconds)
+
+
+def _http2_enabled(config: HttpClientConfig) -> bool:
+    if config.http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return config.http2
+
+
+def _limits(config: HttpClientConfig) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry,
+    )
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Holds the per-host slot until the response body is consumed or closed."""
+
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+S = TypeVar("S", bound=Union[threading.BoundedSemaphore, asyncio.Semaphore])
+
+
+class _HostSlots(Generic[S]):
+    """Per-host semaphores in LRU order, bounded to ``max_hosts``.
+
+    Hosts with a request waiting for or holding a slot are never dropped, so
+    a host's cap holds even while the map is over its bound.
+    """
+
+    def __init__(self, factory: Callable[[], S], max_hosts: int) -> None:
+        self.factory = factory
+        self.max_hosts = max_hosts
+        self._slots: "OrderedDict[str, S]" = OrderedDict()
+        self._users: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def checkout(self, host: str) -> S:
+        """The semaphore for ``host``, which stays mapped until ``checkin``."""
+
+        with self._lock:
+            slot = self._slots.pop(host, None)
+            if slot is None:
+                slot = self.factory()
+            self._slots[host] = slot
+            self._users[host] = self._users.get(host, 0) + 1
+            if len(self._slots) > self.max_hosts:
+                self._evict()
+            return slot
+
+    def checkin(self, host: str) -> None:
+        with self._lock:
+            self._users[host] -= 1
+            if not self._users[host]:
+                del self._users[host]
+                if len(self._slots) > self.max_hosts:
+                    self._evict()
+
+    def release(self, host: str, slot: S) -> None:
+        slot.release()
+        self.checkin(host)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._slots)
+
+    def _evict(self) -> None:
+        idle = [host for host in self._slots if host not in self._users]
+        for host in idle[: len(self._slots) - self.max_hosts]:
+            del self._slots[host]
+
+
+def _once(fn: Callable[[], None]) -> Callable[[], None]:
+    called = False
+
+    def wrapper() -> None:
+        nonlocal called
+        if not called:
+            called = True
+            fn()
+
+    return wrapper
+
+
+class PooledTransport(httpx.BaseTransport):
+    """Wraps a transport with per-host concurrency caps, rate limits and retry/backoff."""
+
+    def __init__(
+        self,
+        config: HttpClientConfig,
+        transport: Optional[httpx.BaseTransport] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self.config = config
+        self.limiter = limiter
+        self._transport = transport or httpx.HTTPTransport(limits=_limits(config), http2=_http2_enabled(config))
+        self._hosts = _HostSlots(partial(threading.BoundedSemaphore, config.per_host_connections), config.max_hosts)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with span("http.request", host=request.url.host) as current:
+            response = self._send(request)
+            current.attributes["status"] = response.status_code
+            HTTP_RESPONSES.labels(request.url.host, str(response.status_code)).inc()
+            return response
+
+    def _send(self, request: httpx.Request) -> httpx.Response:
+        retries = self.config.retries if request.method in IDEMPOTENT_METHODS else 0
+        host = request.url.host
+        for attempt in range(retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire(host)
+            slot = self._hosts.checkout(host)
+            slot.acquire()
+            release = _once(partial(self._hosts.release, host, slot))
+            try:
+                response = self._transport.handle_request(request)
+            except RETRYABLE_ERRORS:
+                release()
+                if attempt == retries:
+                    raise
+                time.sleep(self.config.backoff(attempt))
+                continue
+            except BaseException:
+                release()
+                raise
+            if response.status_code in RETRYABLE_STATUS and attempt < retries:
+                response.close()
+                release()
+                time.sleep(self.config.backoff(attempt, response))
+                continue
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=response.headers,
+                stream=_ReleasingStream(response.stream, release),  # type: ignore[arg-type]
+                extensions=response.extensions,
+            )
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncPooledTransport(httpx.AsyncBaseTransport):
+    """asyncio counterpart of ``PooledTransport``."""
+
+    def __init__(
+        self,
+        config: HttpClientConfig,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self.config = config
+        self.limiter = limiter
+        self._transport = transport or httpx.AsyncHTTPTransport(
+            limits=_limits(config), http2=_http2_enabled(config)
+        )
+        self._hosts = _HostSlots(partial(asyncio.Semaphore, config.per_host_connections), config.max_hosts)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with span("http.request", host=request.url.host) as current:
+            response = await self._send(request)
+            current.attributes["status"] = response.status_code
+            HTTP_RESPONSES.labels(request.url.host, str(response.status_code)).inc()
+            return response
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        retries = self.config.retries if request.method in IDEMPOTENT_METHODS else 0
+        host = request.url.host
+        for attempt in range(retries + 1):
+            if self.limiter is not None:
+                await self.limiter.aacquire(host)
+            slot = self._hosts.checkout(host)
+            try:
+                await slot.acquire()
+            except BaseException:
+                self._hosts.checkin(host)
+                raise
+            release = _once(partial(self._hosts.release, host, slot))
+            try:
+                response = await self._transport.handle_async_request(request)
+            except RETRYABLE_ERRORS:
+                release()
+                if attempt == retries:
+                    raise
+                await asyncio.sleep(self.config.backoff(attempt))
+                continue
+            except BaseException:
+                release()
+                raise
+            if response.status_code in RETRYABLE_STATUS and attempt < retries:
+                await response.aclose()
+                release()
+                await asyncio.sleep(self.config.backoff(attempt, response))
+                continue
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=response.headers,
+                stream=_AsyncReleasingStream(response.stream, release),  # type: ignore[arg-type]
+                extensions=response.extensions,
+            )
+        raise AssertionError("unreachable")
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def build_http_client(
+    config: HttpClientConfig,
+    transport: Optional[httpx.BaseTransport] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> httpx.Client:
+    return httpx.Client(
+        timeout=config.timeout,
+        headers={"User-Agent": config.user_agent},
+        follow_redirects=True,
+        transport=PooledTransport(config, transport, limiter),
+    )
+
+
+def build_async_http_client(
+    config: HttpClientConfig,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=config.timeout,
+        headers={"User-Agent": config.user_agent},
+        follow_redirects=True,
+        transport=AsyncPooledTransport(config, transport, limiter),
+    )
+
+
+_lock = threading.Lock()
+_clients: Dict[Settings, httpx.Client] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Settings, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_client(settings_obj: Optional[Settings] = None) -> httpx.Client:
+    """Return the pooled client for ``settings_obj`` (default the process settings), creating it on first use.
+
+    Clients are shared per settings, so an agent built with its own settings
+    gets that settings' pool sizes and per-host limiter.
+    """
+
+    active = settings_obj or settings
+    with _lock:
+        client = _clients.get(active)
+        if client is None or client.is_closed:
+            client = _clients[active] = _build_client(active)
+        return client
+
+
+def get_async_http_client(settings_obj: Optional[Settings] = None) -> httpx.AsyncClient:
+    """Return the pooled async client for ``settings_obj`` and the running event loop.
+
+    Async connections are bound to the loop that opened them, so each loop gets
+    its own clients; they are dropped together with the loop.
+    """
+
+    active = settings_obj or settings
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(active)
+        if client is None or client.is_closed:
+            client = clients[active] = _build_async_client(active)
+        return client
+
+
+def _build_client(settings_obj: Settings) -> httpx.Client:
+    return build_http_client(
+        HttpClientConfig.from_settings(settings_obj), limiter=get_rate_limiter(settings_obj, "host")
+    )
+
+
+def _build_async_client(settings_obj: Settings) -> httpx.AsyncClient:
+    return build_async_http_client(
+        HttpClientConfig.from_settings(settings_obj), limiter=get_rate_limiter(settings_obj, "host")
+    )
+
+
+def close_http_client() -> None:
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+async def aclose_http_client() -> None:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.pop(loop, {})
+    for client in clients.values():
+        await client.aclose()
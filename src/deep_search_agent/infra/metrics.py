@@ -0,0 +1,66 @@
+"""Prometheus metrics shared by the tracing, cache and HTTP layers."""
+
+from __future__ import annotations
+
+import threading
+
+from prometheus_client import Counter, Histogram, start_http_server
+
+from ..config import Settings
+from .logger import get_logger
+
+
+logger = get_logger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+SPAN_SECONDS = Histogram(
+    "deepsearch_span_seconds",
+    "Wall time of traced stages (query, plan, search, rank, aggregate, summarize, llm.*, http.request).",
+    ["span"],
+    buckets=LATENCY_BUCKETS,
+)
+SPAN_ERRORS = Counter("deepsearch_span_errors_total", "Traced stages that raised.", ["span"])
+CACHE_LOOKUPS = Counter(
+    "deepsearch_cache_lookups_total", "Cache lookups by cache and outcome.", ["cache", "result"]
+)
+RATE_LIMITED = Counter(
+    "deepsearch_rate_limited_total", "Requests delayed or rejected by rate limits, by scope.", ["scope", "outcome"]
+)
+SEARCH_PROVIDER_CALLS = Counter(
+    "deepsearch_search_provider_calls_total",
+    "Federated search provider calls by provider and outcome.",
+    ["provider", "outcome"],
+)
+LLM_TOKENS_SAVED = Counter(
+    "deepsearch_llm_tokens_saved_total",
+    "Estimated LLM tokens (prompt and response) served from cache, by model.",
+    ["model"],
+)
+HTTP_RESPONSES = Counter(
+    "deepsearch_http_responses_total", "HTTP responses by host and status code.", ["host", "status"]
+)
+
+_server_lock = threading.Lock()
+_server_port: int = 0
+
+
+def start_metrics_server(settings_obj: Settings) -> bool:
+    """Expose ``/metrics`` on ``PROMETHEUS_PORT`` once per process when ``ENABLE_METRICS`` is on."""
+
+    global _server_port
+    if not settings_obj.enable_metrics:
+        return False
+    with _server_lock:
+        if _server_port:
+            return True
+        try:
+            start_http_server(settings_obj.prometheus_port)
+        except OSError as exc:
+            logger.warning(
+                "Could not start metrics server", extra={"port": settings_obj.prometheus_port, "error": str(exc)}
+            )
+            return False
+        _server_port = settings_obj.prometheus_port
+        logger.info("Serving Prometheus metrics", extra={"port": _server_port})
+        return True
@@ -1,56 +1,398 @@
-"""Naive in-memory rate limiter."""
+"""Token-bucket rate limiting and admission control.
+
+``RateLimiter`` meters one scope (upstream hosts, the LLM provider, tenants)
+with a bucket per identifier. Callers reserve tokens and wait until they are
+due instead of failing, up to ``max_wait``. Buckets live in a ``BucketStore``:
+``MemoryBucketStore`` is bounded and evicts idle buckets, and
+``SQLiteBucketStore`` lets the worker processes on one host share a budget.
+
+``AdmissionController`` caps queries in flight and meters each tenant.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import os
+import sqlite3
+import threading
 import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
 from dataclasses import dataclass, field
-from typing import Callable, Dict
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Protocol, TypeVar
+
+from ..config import Settings
+from .logger import get_logger
+from .metrics import RATE_LIMITED
+
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class RateLimitExceeded(RuntimeError):
+    """The wait for a token (or a concurrency slot) would exceed ``max_wait``."""
+
+
+class AdmissionRejected(RateLimitExceeded):
+    """No concurrency slot freed up within ``max_wait``."""
 
 
 @dataclass
 class TokenBucket:
-    capacity: int
+    capacity: float
     refill_rate_per_sec: float
     tokens: float = field(init=False)
-    last_refill: float = field(default_factory=time.time)
+    last_refill: float = field(default_factory=time.monotonic)
 
     def __post_init__(self) -> None:
         self.tokens = float(self.capacity)
 
-    def consume(self, amount: int = 1) -> bool:
-        now = time.time()
+    def refill(self, now: float) -> None:
         elapsed = now - self.last_refill
-        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate_per_sec)
+        if elapsed < 0:
+            # Timestamps from before a reboot (shared stores); start over full.
+            self.tokens = float(self.capacity)
+        else:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate_per_sec)
         self.last_refill = now
 
-        if self.tokens >= amount:
-            self.tokens -= amount
+    def reserve(
+        self, amount: float = 1, max_wait: Optional[float] = None, now: Optional[float] = None
+    ) -> Optional[float]:
+        """Take ``amount`` tokens, returning how long to wait before using them.
+
+        The bucket may go into debt so waiters are served in arrival order. When
+        the wait would exceed ``max_wait`` nothing is taken and ``None`` returned.
+        """
+
+        self.refill(time.monotonic() if now is None else now)
+        shortfall = max(amount - self.tokens, 0.0)
+        delay = shortfall / self.refill_rate_per_sec if shortfall else 0.0
+        if max_wait is not None and delay > max_wait:
+            return None
+        self.tokens -= amount
+        return delay
+
+    def consume(self, amount: int = 1) -> bool:
+        return self.reserve(amount, max_wait=0) is not None
+
+
+class BucketStore(Protocol):
+    def reserve(
+        self, key: str, capacity: float, rate: float, amount: float = 1, max_wait: Optional[float] = None
+    ) -> Optional[float]:
+        ...
+
+
+class MemoryBucketStore:
+    """In-process buckets in LRU order.
+
+    Buckets unused for ``idle_seconds`` are dropped; past ``max_buckets`` the
+    least recently used go first, even if not yet full again.
+    """
+
+    def __init__(self, max_buckets: int = 10_000, idle_seconds: float = 600.0) -> None:
+        self.max_buckets = max_buckets
+        self.idle_seconds = idle_seconds
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def reserve(
+        self, key: str, capacity: float, rate: float, amount: float = 1, max_wait: Optional[float] = None
+    ) -> Optional[float]:
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets.pop(key, None) or TokenBucket(capacity, rate, last_refill=now)
+            delay = bucket.reserve(amount, max_wait, now)
+            self._buckets[key] = bucket
+            self._evict(now)
+            return delay
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            key, oldest = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_buckets and now - oldest.last_refill < self.idle_seconds:
+                return
+            del self._buckets[key]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rate_buckets_updated ON rate_buckets (updated_at);
+"""
+
+
+class SQLiteBucketStore:
+    """Buckets in a WAL-mode SQLite file shared by the processes on one host.
+
+    Each reservation is one ``BEGIN IMMEDIATE`` transaction. Timestamps come
+    from ``time.monotonic()``, which is system-wide, so processes agree on
+    elapsed time; rows idle for ``idle_seconds`` are swept every
+    ``sweep_interval`` seconds.
+    """
+
+    def __init__(
+        self, path: str, idle_seconds: float = 600.0, sweep_interval: float = 60.0, busy_timeout: float = 30.0
+    ) -> None:
+        self.path = path
+        self.idle_seconds = idle_seconds
+        self.sweep_interval = sweep_interval
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + sweep_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def reserve(
+        self, key: str, capacity: float, rate: float, amount: float = 1, max_wait: Optional[float] = None
+    ) -> Optional[float]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.monotonic()
+            bucket = TokenBucket(capacity, rate, last_refill=now)
+            row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                bucket.tokens, bucket.last_refill = row
+            delay = bucket.reserve(amount, max_wait, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                (key, bucket.tokens, bucket.last_refill),
+            )
+            if self._sweep_due(now):
+                conn.execute("DELETE FROM rate_buckets WHERE updated_at < ?", (now - self.idle_seconds,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return delay
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _sweep_due(self, now: float) -> bool:
+        with self._lock:
+            if now < self._next_sweep:
+                return False
+            self._next_sweep = now + self.sweep_interval
             return True
-        return False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
 
 
 class RateLimiter:
-    """Simple per-identifier token bucket limiter."""
+    """Per-identifier token buckets for one ``scope`` (e.g. ``host``, ``llm``, ``tenant``).
+
+    Each identifier may make ``per_minute`` requests a minute with bursts of up
+    to ``burst`` (default ``per_minute``). ``acquire`` / ``aacquire`` wait for a
+    token and raise ``RateLimitExceeded`` only when that wait would exceed
+    ``max_wait`` seconds (``None`` waits as long as it takes). With a
+    ``SQLiteBucketStore`` the async methods reserve on a worker thread, since
+    the transaction may wait on other processes' locks.
+    """
 
-    def __init__(self, per_minute: int) -> None:
+    def __init__(
+        self,
+        per_minute: int,
+        burst: Optional[int] = None,
+        store: Optional[BucketStore] = None,
+        scope: str = "default",
+        max_wait: Optional[float] = None,
+    ) -> None:
         self.per_minute = per_minute
-        self._buckets: Dict[str, TokenBucket] = {}
+        self.burst = burst or per_minute
+        self.store = store if store is not None else MemoryBucketStore()
+        self.scope = scope
+        self.max_wait = max_wait
 
     def allow(self, identifier: str) -> bool:
-        bucket = self._buckets.get(identifier)
-        if bucket is None:
-            bucket = TokenBucket(capacity=self.per_minute, refill_rate_per_sec=self.per_minute / 60)
-            self._buckets[identifier] = bucket
-        return bucket.consume()
+        """Take a token if one is available right now, without waiting."""
+
+        return self._reserve(identifier, 1, max_wait=0) is not None
+
+    def acquire(self, identifier: str, amount: int = 1) -> float:
+        """Block until ``amount`` tokens are available; returns the seconds waited."""
+
+        delay = self._checked(identifier, amount)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def aacquire(self, identifier: str, amount: int = 1) -> float:
+        delay = await self._off_loop(self._checked, identifier, amount)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
 
-    def wrap(self, identifier_provider: Callable[[], str]) -> Callable[[Callable[..., object]], Callable[..., object]]:
+    def refund(self, identifier: str, amount: int = 1) -> None:
+        """Return tokens taken for work that was then turned away; the bucket still caps at ``burst``."""
+
+        self._reserve(identifier, -amount, max_wait=None)
+
+    async def arefund(self, identifier: str, amount: int = 1) -> None:
+        await self._off_loop(self.refund, identifier, amount)
+
+    def wrap(
+        self, identifier_provider: Callable[[], str]
+    ) -> Callable[[Callable[..., object]], Callable[..., object]]:
         def decorator(fn: Callable[..., object]) -> Callable[..., object]:
             def wrapper(*args, **kwargs):
-                identifier = identifier_provider()
-                if not self.allow(identifier):
-                    raise RuntimeError("Rate limit exceeded")
+                self.acquire(identifier_provider())
                 return fn(*args, **kwargs)
 
             return wrapper
 
         return decorator
+
+    def _checked(self, identifier: str, amount: int) -> float:
+        delay = self._reserve(identifier, amount, self.max_wait)
+        if delay is None:
+            RATE_LIMITED.labels(self.scope, "rejected").inc()
+            raise RateLimitExceeded(f"Rate limit exceeded for {self.scope} {identifier!r}")
+        if delay:
+            RATE_LIMITED.labels(self.scope, "delayed").inc()
+        return delay
+
+    async def _off_loop(self, fn: Callable[..., T], *args: Any) -> T:
+        if isinstance(self.store, SQLiteBucketStore):
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    def _reserve(self, identifier: str, amount: int, max_wait: Optional[float]) -> Optional[float]:
+        return self.store.reserve(
+            f"{self.scope}:{identifier}", self.burst, self.per_minute / 60, amount=amount, max_wait=max_wait
+        )
+
+
+class AdmissionController:
+    """Caps queries in flight in this process and meters each tenant.
+
+    A query waits up to ``max_wait`` seconds for its tenant's token and then
+    for a slot before being rejected with ``RateLimitExceeded`` /
+    ``AdmissionRejected``. A query rejected for want of a slot gets its token
+    back, so shed load does not eat into the tenant's budget.
+    """
+
+    def __init__(
+        self, max_concurrent: int, tenants: Optional[RateLimiter] = None, max_wait: Optional[float] = None
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.tenants = tenants
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    @contextmanager
+    def admit(self, tenant: str = "default") -> Iterator[None]:
+        if self.tenants is not None:
+            self.tenants.acquire(tenant)
+        if not self._slots.acquire(timeout=self.max_wait):
+            if self.tenants is not None:
+                self.tenants.refund(tenant)
+            self._reject(tenant)
+        with self._occupied():
+            yield
+
+    @asynccontextmanager
+    async def aadmit(self, tenant: str = "default") -> AsyncIterator[None]:
+        if self.tenants is not None:
+            await self.tenants.aacquire(tenant)
+        # Poll rather than block a worker thread, so cancelled waiters never hold a slot.
+        deadline = None if self.max_wait is None else time.monotonic() + self.max_wait
+        pause = 0.001
+        while not self._slots.acquire(blocking=False):
+            if deadline is not None and time.monotonic() >= deadline:
+                if self.tenants is not None:
+                    await self.tenants.arefund(tenant)
+                self._reject(tenant)
+            await asyncio.sleep(pause)
+            pause = min(pause * 2, 0.05)
+        with self._occupied():
+            yield
+
+    @contextmanager
+    def _occupied(self) -> Iterator[None]:
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def _reject(self, tenant: str) -> None:
+        RATE_LIMITED.labels("admission", "rejected").inc()
+        logger.warning("Query rejected: too many in flight", extra={"tenant": tenant, "limit": self.max_concurrent})
+        raise AdmissionRejected(f"More than {self.max_concurrent} queries in flight")
+
+
+@lru_cache(maxsize=4)
+def get_bucket_store(settings_obj: Settings) -> BucketStore:
+    """Process-wide bucket store, shared through SQLite when ``RATE_LIMIT_BACKEND=sqlite``."""
+
+    if settings_obj.rate_limit_backend == "sqlite":
+        return SQLiteBucketStore(os.path.join(settings_obj.cache_dir, "ratelimit.sqlite3"))
+    return MemoryBucketStore()
+
+
+@lru_cache(maxsize=16)
+def get_rate_limiter(settings_obj: Settings, scope: str) -> Optional[RateLimiter]:
+    """Limiter for ``host`` / ``llm`` (``REQUESTS_PER_MINUTE``) or ``tenant`` (``RATE_LIMIT_PER_MINUTE``).
+
+    Returns ``None`` unless ``ENABLE_RATE_LIMITING`` is on.
+    """
+
+    if not settings_obj.enable_rate_limiting:
+        return None
+    per_minute = settings_obj.rate_limit_per_minute if scope == "tenant" else settings_obj.requests_per_minute
+    return RateLimiter(
+        per_minute,
+        store=get_bucket_store(settings_obj),
+        scope=scope,
+        max_wait=settings_obj.rate_limit_max_wait,
+    )
+
+
+@lru_cache(maxsize=4)
+def get_admission_controller(settings_obj: Settings) -> Optional[AdmissionController]:
+    if not settings_obj.enable_rate_limiting:
+        return None
+    return AdmissionController(
+        settings_obj.max_concurrent_requests,
+        tenants=get_rate_limiter(settings_obj, "tenant"),
+        max_wait=settings_obj.rate_limit_max_wait,
+    )
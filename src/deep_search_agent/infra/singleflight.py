@@ -0,0 +1,86 @@
+"""Request coalescing: concurrent callers for one key share a single execution."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _Call(Generic[V]):
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Optional[V] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[K, V]):
+    """Thread-based single-flight group.
+
+    The first caller for a key runs ``fn``; callers arriving while it is in flight
+    block and receive the same value (or exception) instead of running ``fn`` again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[K, _Call[V]] = {}
+
+    def do(self, key: K, fn: Callable[[], V]) -> V:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value  # type: ignore[return-value]
+
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight(Generic[K, V]):
+    """asyncio single-flight group; a waiter being cancelled does not cancel the shared fetch."""
+
+    def __init__(self) -> None:
+        self._tasks: Dict[K, "asyncio.Future[V]"] = {}
+
+    async def do(self, key: K, fn: Callable[[], Awaitable[V]]) -> V:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def _forget(self, key: K, task: "asyncio.Future[V]") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Mark the exception retrieved when every waiter was cancelled.
+            task.exception()
@@ -0,0 +1,139 @@
+"""Lightweight per-query span trees.
+
+``span(name)`` times a block and nests it under the span active in the current
+context (``contextvars``, so asyncio tasks and ``asyncio.to_thread`` inherit it;
+thread pools must submit through ``contextvars.copy_context().run``). Every
+finished span is observed in the ``deepsearch_span_seconds`` histogram; finished
+root spans are handed to the registered trace listeners.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .logger import get_logger
+from .metrics import SPAN_ERRORS, SPAN_SECONDS
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start: float = field(default_factory=time.perf_counter)
+    end: Optional[float] = None
+    error: Optional[str] = None
+    children: List["Span"] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def find(self, name: str) -> List["Span"]:
+        """All spans called ``name`` in this tree, depth first."""
+
+        found = [self] if self.name == name else []
+        for child in self.children:
+            found.extend(child.find(name))
+        return found
+
+    def to_dict(self) -> dict:
+        payload: dict = {"name": self.name, "duration_ms": round(self.duration * 1000, 3)}
+        if self.attributes:
+            payload["attributes"] = self.attributes
+        if self.error:
+            payload["error"] = self.error
+        if self.children:
+            payload["children"] = [child.to_dict() for child in self.children]
+        return payload
+
+
+TraceListener = Callable[[Span], None]
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("deepsearch_span", default=None)
+_listeners: List[TraceListener] = []
+_listeners_lock = threading.Lock()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def add_trace_listener(listener: TraceListener) -> None:
+    with _listeners_lock:
+        _listeners.append(listener)
+
+
+def remove_trace_listener(listener: TraceListener) -> None:
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+@contextmanager
+def span(name: str, activate: bool = True, **attributes: Any) -> Iterator[Span]:
+    """Time the enclosed block as a child of the current span (or as a new root).
+
+    Pass ``activate=False`` around ``yield`` points in generators so spans opened
+    by the consumer between items are not attached to this one.
+    """
+
+    parent = _current.get()
+    current = Span(name=name, attributes=attributes)
+    if parent is not None:
+        parent.children.append(current)
+    token = _current.set(current) if activate else None
+    try:
+        yield current
+    except GeneratorExit:
+        raise
+    except BaseException as exc:
+        current.error = repr(exc)
+        SPAN_ERRORS.labels(name).inc()
+        raise
+    finally:
+        current.end = time.perf_counter()
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:
+                # A generator resumed from another context (e.g. a different worker thread).
+                _current.set(parent)
+        SPAN_SECONDS.labels(name).observe(current.duration)
+        if parent is None:
+            _emit(current)
+
+
+@contextmanager
+def activate(current: Span) -> Iterator[Span]:
+    """Make an existing span current for the enclosed block (e.g. each step of a generator)."""
+
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+def _emit(root: Span) -> None:
+    with _listeners_lock:
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(root)
+        except Exception:  # a broken listener must not fail the query
+            logger.exception("Trace listener failed", extra={"span": root.name})
+
+
+def _log_trace(root: Span) -> None:
+    logger.debug("Trace %s finished in %.1f ms", root.name, root.duration * 1000, extra={"trace": root.to_dict()})
+
+
+add_trace_listener(_log_trace)
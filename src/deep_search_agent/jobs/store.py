@@ -0,0 +1,286 @@
+"""Persistent job queue for long-running queries, backed by a local SQLite file."""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from ..agents.types import AgentResult
+from ..config import Settings
+
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = frozenset({SUCCEEDED, FAILED})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    tenant TEXT NOT NULL,
+    workflow TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+# Writes by a worker only apply while its claim (worker name and attempt) is still current.
+_OWNED = "id = ? AND worker = ? AND attempts = ? AND status = 'running'"
+_COLUMNS = (
+    "id, query, tenant, workflow, status, attempts, worker, error, result, created_at, started_at, finished_at"
+)
+
+
+class JobLost(RuntimeError):
+    """The worker's claim on a job is gone (lease expired and re-claimed, or failed)."""
+
+
+@dataclass
+class Job:
+    id: str
+    query: str
+    tenant: str
+    workflow: str
+    status: str
+    attempts: int = 0
+    worker: Optional[str] = None
+    error: Optional[str] = None
+    result: Optional[AgentResult] = None
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> dict:
+        payload = {
+            "id": self.id,
+            "query": self.query,
+            "workflow": self.workflow,
+            "status": self.status,
+            "attempts": self.attempts,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error is not None:
+            payload["error"] = self.error
+        if self.result is not None:
+            payload["result"] = self.result.to_dict()
+        return payload
+
+
+class SQLiteJobStore:
+    """Jobs and their progress events in a WAL-mode SQLite file shared by the processes on one host.
+
+    ``claim`` hands each queued job to exactly one worker (one ``BEGIN
+    IMMEDIATE`` transaction). A running job whose worker has neither written
+    nor sent a ``heartbeat`` for ``lease_seconds`` is assumed lost and is claimed again, up to
+    ``max_attempts`` times in total; after that it fails. Progress is an
+    append-only list of event dicts per job, so readers can poll or follow it
+    from any sequence number; a retried job appends its events after those of
+    the lost attempt. Timestamps are wall-clock, so they survive restarts.
+    """
+
+    def __init__(
+        self, path: str, lease_seconds: float = 300.0, max_attempts: int = 2, busy_timeout: float = 30.0
+    ) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def submit(self, query: str, tenant: str = "default", workflow: str = "production") -> str:
+        job_id = uuid.uuid4().hex
+        self._connection().execute(
+            "INSERT INTO jobs (id, query, tenant, workflow, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, query, tenant, workflow, QUEUED, time.time()),
+        )
+        return job_id
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """Oldest runnable job, marked running for ``worker``; ``None`` when the queue is empty."""
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            stale = now - self.lease_seconds
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND heartbeat_at < ? AND attempts >= ?",
+                (FAILED, "worker lost", now, RUNNING, stale, self.max_attempts),
+            )
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE status = ? OR (status = ? AND heartbeat_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, stale),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, "
+                    "heartbeat_at = ? WHERE id = ?",
+                    (RUNNING, worker, now, now, row[0]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = _job(row)
+        job.status, job.worker, job.attempts, job.started_at = RUNNING, worker, job.attempts + 1, now
+        return job
+
+    def append_events(self, job: Job, events: List[dict]) -> None:
+        """Record progress for ``job`` and renew its lease.
+
+        Raises ``JobLost`` when the job is no longer this attempt's to write:
+        its lease expired and another worker claimed it, or it was failed.
+        """
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            owned = conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE {_OWNED}", (time.time(), *_owner(job))
+            ).rowcount
+            if not owned:
+                raise JobLost(job.id)
+            (last,) = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM job_events WHERE job_id = ?", (job.id,)
+            ).fetchone()
+            conn.executemany(
+                "INSERT INTO job_events (job_id, seq, payload) VALUES (?, ?, ?)",
+                [
+                    (job.id, last + offset, json.dumps(event, ensure_ascii=False))
+                    for offset, event in enumerate(events, 1)
+                ],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def heartbeat(self, job: Job) -> None:
+        """Renew ``job``'s lease without recording progress; raises ``JobLost`` like ``append_events``."""
+
+        renewed = self._connection().execute(
+            f"UPDATE jobs SET heartbeat_at = ? WHERE {_OWNED}", (time.time(), *_owner(job))
+        ).rowcount
+        if not renewed:
+            raise JobLost(job.id)
+
+    def complete(self, job: Job, result: AgentResult) -> None:
+        self._finish(job, SUCCEEDED, result=json.dumps(result.to_dict(), ensure_ascii=False))
+
+    def fail(self, job: Job, error: str) -> None:
+        self._finish(job, FAILED, error=error)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        row = self._connection().execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row is not None else None
+
+    def events(self, job_id: str, after: int = 0) -> List[Tuple[int, dict]]:
+        """Progress events with sequence numbers greater than ``after``."""
+
+        rows = self._connection().execute(
+            "SELECT seq, payload FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, after)
+        ).fetchall()
+        return [(seq, json.loads(payload)) for seq, payload in rows]
+
+    def follow(self, job_id: str, after: int = 0, poll_interval: float = 0.25) -> Iterator[Tuple[int, dict]]:
+        """Yield events as they are recorded until the job finishes."""
+
+        while True:
+            job = self.get(job_id)
+            batch = self.events(job_id, after)
+            for seq, event in batch:
+                after = seq
+                yield seq, event
+            if job is None or (job.finished and not batch):
+                return
+            if not batch:
+                time.sleep(poll_interval)
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _finish(self, job: Job, status: str, result: Optional[str] = None, error: Optional[str] = None) -> None:
+        finished = self._connection().execute(
+            f"UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE {_OWNED}",
+            (status, result, error, time.time(), *_owner(job)),
+        ).rowcount
+        if not finished:
+            raise JobLost(job.id)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+
+def _owner(job: Job) -> Tuple[str, Optional[str], int]:
+    return job.id, job.worker, job.attempts
+
+
+def _job(row: tuple) -> Job:
+    job_id, query, tenant, workflow, status, attempts, worker, error, result, created, started, finished = row
+    return Job(
+        id=job_id,
+        query=query,
+        tenant=tenant,
+        workflow=workflow,
+        status=status,
+        attempts=attempts,
+        worker=worker,
+        error=error,
+        result=AgentResult.from_dict(json.loads(result)) if result else None,
+        created_at=created,
+        started_at=started,
+        finished_at=finished,
+    )
+
+
+def get_job_store(settings_obj: Settings) -> SQLiteJobStore:
+    return SQLiteJobStore(
+        os.path.join(settings_obj.cache_dir, "jobs.sqlite3"),
+        lease_seconds=settings_obj.job_lease_seconds,
+        max_attempts=settings_obj.job_max_attempts,
+    )
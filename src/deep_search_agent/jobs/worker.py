@@ -0,0 +1,188 @@
+"""Job workers: claim queued queries from the job store and run them through ``DeepSearchAgent.stream``."""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from ..agents.deep_search_agent import DeepSearchAgent
+from ..agents.types import ResultEvent, SummaryTokenEvent
+from ..config import Settings, settings
+from ..infra.logger import get_logger
+from .store import Job, JobLost, SQLiteJobStore, get_job_store
+
+
+logger = get_logger(__name__)
+
+
+class Worker:
+    """Runs jobs one at a time until ``stop`` is set.
+
+    Progress events are written as they arrive, except summary tokens, which
+    are coalesced into one ``token`` event per ``flush_interval`` so a long
+    answer costs a handful of writes rather than one per token. While a job
+    runs, a heartbeat thread renews its lease every ``heartbeat_interval``
+    seconds (a third of the store's lease by default), so a stage that emits
+    nothing for longer than the lease does not hand the job to another worker.
+    """
+
+    def __init__(
+        self,
+        store: SQLiteJobStore,
+        agent_factory: Callable[[str], DeepSearchAgent],
+        name: Optional[str] = None,
+        poll_interval: float = 0.5,
+        flush_interval: float = 0.25,
+        heartbeat_interval: Optional[float] = None,
+    ) -> None:
+        self.store = store
+        self.agent_factory = agent_factory
+        self.name = name
+        self.poll_interval = poll_interval
+        self.flush_interval = flush_interval
+        self.heartbeat_interval = heartbeat_interval or store.lease_seconds / 3
+        self._agents: Dict[str, DeepSearchAgent] = {}
+
+    def run(self, stop: threading.Event, max_jobs: Optional[int] = None) -> int:
+        """Process jobs until ``stop`` is set (or ``max_jobs`` are done); returns the number processed."""
+
+        # Named after the thread that runs it, so every worker thread claims under its own name.
+        self.name = self.name or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        done = 0
+        while not stop.is_set() and (max_jobs is None or done < max_jobs):
+            job = self.store.claim(self.name)
+            if job is None:
+                stop.wait(self.poll_interval)
+                continue
+            self.run_job(job)
+            done += 1
+        return done
+
+    def run_job(self, job: Job) -> None:
+        logger.info("Job started", extra={"job": job.id, "worker": self.name, "attempt": job.attempts})
+        started = time.perf_counter()
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job, finished), name=f"heartbeat-{job.id}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            agent = self._agent(job.workflow)
+            tokens: List[str] = []
+            flushed = time.monotonic()
+            for event in agent.stream(job.query, tenant=job.tenant):
+                if isinstance(event, SummaryTokenEvent):
+                    tokens.append(event.token)
+                    if time.monotonic() - flushed < self.flush_interval:
+                        continue
+                pending = [SummaryTokenEvent(token="".join(tokens)).to_dict()] if tokens else []
+                if not isinstance(event, SummaryTokenEvent):
+                    pending.append(event.to_dict())
+                self.store.append_events(job, pending)
+                tokens, flushed = [], time.monotonic()
+                if isinstance(event, ResultEvent):
+                    self.store.complete(job, event.result)
+        except JobLost:
+            logger.warning(
+                "Job taken over by another worker; abandoning", extra={"job": job.id, "worker": self.name}
+            )
+            return
+        except Exception as exc:
+            logger.warning("Job failed", extra={"job": job.id, "error": repr(exc)})
+            try:
+                self.store.fail(job, repr(exc))
+            except JobLost:
+                pass
+            return
+        finally:
+            finished.set()
+            heartbeat.join()
+        logger.info("Job finished", extra={"job": job.id, "seconds": round(time.perf_counter() - started, 3)})
+
+    def _heartbeat(self, job: Job, finished: threading.Event) -> None:
+        try:
+            while not finished.wait(self.heartbeat_interval):
+                try:
+                    self.store.heartbeat(job)
+                except JobLost:
+                    return
+                except Exception as exc:
+                    logger.warning("Job heartbeat failed", extra={"job": job.id, "error": repr(exc)})
+        finally:
+            self.store.close()
+
+    def _agent(self, workflow: str) -> DeepSearchAgent:
+        if workflow not in self._agents:
+            self._agents[workflow] = self.agent_factory(workflow)
+        return self._agents[workflow]
+
+
+def _worker_main(settings_obj: Settings, threads: int) -> None:
+    store = get_job_store(settings_obj)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    def factory(workflow: str) -> DeepSearchAgent:
+        return DeepSearchAgent.from_settings(settings_obj, workflow_name=workflow)
+
+    host = socket.gethostname()
+    workers = [
+        threading.Thread(
+            target=Worker(
+                store, factory, name=f"{host}:{os.getpid()}:{index}", poll_interval=settings_obj.job_poll_interval
+            ).run,
+            args=(stop,),
+        )
+        for index in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+
+def run_workers(settings_obj: Optional[Settings] = None, processes: Optional[int] = None, threads: int = 1) -> None:
+    """Run ``processes`` worker processes (``JOB_WORKERS``) against the shared job store until interrupted.
+
+    Processes are spawned rather than forked so none inherits another's
+    connections or threads. With ``RATE_LIMIT_BACKEND=sqlite`` they also share
+    rate limits.
+    """
+
+    active = settings_obj or settings
+    count = processes or active.job_workers
+    context = multiprocessing.get_context("spawn")
+    children = [
+        context.Process(target=_worker_main, args=(active, threads), name=f"deepsearch-worker-{index}")
+        for index in range(count)
+    ]
+    for child in children:
+        child.start()
+    logger.info("Job workers started", extra={"processes": count, "threads": threads})
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Deep Search Agent job workers")
+    parser.add_argument("--processes", type=int, metavar="N", help="Worker processes (default JOB_WORKERS).")
+    parser.add_argument("--threads", type=int, default=1, metavar="N", help="Jobs run at once per process.")
+    args = parser.parse_args(argv)
+    run_workers(processes=args.processes, threads=args.threads)
+
+
+if __name__ == "__main__":
+    main()
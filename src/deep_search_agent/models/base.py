@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
-from typing import List, Protocol
+from typing import Iterator, List, Protocol, runtime_checkable
 
 
 @dataclass
@@ -17,6 +18,31 @@ class LLMResponse:
     text: str
 
 
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, max_tokens: int, placeholder: str = "…") -> str:
+    """Cut ``text`` so ``estimate_tokens`` of the result stays within ``max_tokens``.
+
+    Cuts at the last whitespace inside the limit so words are not split.
+    """
+
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    limit = max_tokens * CHARS_PER_TOKEN - len(placeholder)
+    if limit <= 0:
+        return ""
+    cut = text[: limit + 1]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > 0 else cut[:limit]).rstrip() + placeholder
+
+
 class BaseLLM(Protocol):
     """Minimal interface consumed by workflows."""
 
@@ -25,3 +51,51 @@ class BaseLLM(Protocol):
 
     def chat(self, messages: List[ChatMessage]) -> LLMResponse:
         ...
+
+
+@runtime_checkable
+class StreamingLLM(Protocol):
+    """Backends that can yield generated text incrementally."""
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        ...
+
+
+@runtime_checkable
+class BatchLLM(Protocol):
+    """Backends that can answer several independent prompts in one call."""
+
+    def generate_batch(self, prompts: List[str]) -> List[LLMResponse]:
+        ...
+
+
+def stream_generate(llm: BaseLLM, prompt: str) -> Iterator[str]:
+    """Yield text chunks, falling back to one chunk for backends without ``stream``."""
+
+    if isinstance(llm, StreamingLLM):
+        yield from llm.stream(prompt)
+    else:
+        yield llm.generate(prompt).text
+
+
+class AsyncBaseLLM(Protocol):
+    """Asyncio counterpart of ``BaseLLM`` consumed by ``Workflow.arun``."""
+
+    async def generate(self, prompt: str) -> LLMResponse:
+        ...
+
+    async def chat(self, messages: List[ChatMessage]) -> LLMResponse:
+        ...
+
+
+class AsyncLLMAdapter(AsyncBaseLLM):
+    """Runs a blocking ``BaseLLM`` in worker threads so it can serve the async path."""
+
+    def __init__(self, llm: BaseLLM) -> None:
+        self.llm = llm
+
+    async def generate(self, prompt: str) -> LLMResponse:
+        return await asyncio.to_thread(self.llm.generate, prompt)
+
+    async def chat(self, messages: List[ChatMessage]) -> LLMResponse:
+        return await asyncio.to_thread(self.llm.chat, messages)
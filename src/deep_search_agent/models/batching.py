@@ -0,0 +1,56 @@
+"""Micro-batching of concurrent ``generate`` calls onto ``BatchLLM.generate_batch``."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from typing import Iterator, List, Tuple
+
+from .base import BaseLLM, BatchLLM, ChatMessage, LLMResponse, stream_generate
+
+
+class MicroBatchingLLM(BaseLLM):
+    """Groups ``generate`` calls made from different threads into batched backend calls.
+
+    The first caller of a batch waits up to ``window`` seconds (less once
+    ``max_batch`` prompts are queued), then sends every queued prompt in one
+    ``generate_batch`` call and hands each waiting caller its own response.
+    ``chat`` and ``stream`` pass straight through.
+    """
+
+    def __init__(self, llm: BatchLLM, max_batch: int = 8, window: float = 0.02) -> None:
+        self.llm = llm
+        self.max_batch = max_batch
+        self.window = window
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[str, Future]] = []
+
+    def generate(self, prompt: str) -> LLMResponse:
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((prompt, future))
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+        if leader:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) >= self.max_batch, timeout=self.window)
+                batch, self._pending = self._pending, []
+            self._dispatch(batch)
+        return future.result()
+
+    def chat(self, messages: List[ChatMessage]) -> LLMResponse:
+        return self.llm.chat(messages)  # type: ignore[attr-defined]
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        return stream_generate(self.llm, prompt)  # type: ignore[arg-type]
+
+    def _dispatch(self, batch: List[Tuple[str, Future]]) -> None:
+        try:
+            responses = self.llm.generate_batch([prompt for prompt, _ in batch])
+        except BaseException as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), response in zip(batch, responses):
+            future.set_result(response)
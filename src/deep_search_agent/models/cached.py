@@ -0,0 +1,203 @@
+"""Response cache wrapping any LLM backend, keyed on model, temperature and a prompt hash."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Iterator, List, Optional
+
+from ..config import Settings
+from ..infra.cache import CacheBackend, TTLCache
+from ..infra.disk_cache import JSONSerializer, SQLiteBackend
+from ..infra.metrics import LLM_TOKENS_SAVED
+from .base import AsyncBaseLLM, BaseLLM, ChatMessage, LLMResponse, estimate_tokens, stream_generate
+
+
+@dataclass
+class LLMCacheStats:
+    hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+    tokens_saved: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@lru_cache(maxsize=4)
+def get_llm_cache(settings_obj: Settings) -> TTLCache[str, LLMResponse]:
+    """Size-bounded response store shared by every cached backend in the process.
+
+    Persisted in SQLite when ``CACHE_BACKEND=sqlite``, in memory otherwise.
+    """
+
+    backend: Optional[CacheBackend[str, LLMResponse]] = None
+    if settings_obj.cache_backend == "sqlite":
+        backend = SQLiteBackend(
+            os.path.join(settings_obj.cache_dir, "cache.sqlite3"),
+            serializer=JSONSerializer(
+                encode=lambda response: response.text, decode=lambda text: LLMResponse(text=text)
+            ),
+            namespace="llm",
+            max_entries=settings_obj.cache_max_entries,
+            max_bytes=settings_obj.cache_max_bytes,
+        )
+    return TTLCache[str, LLMResponse](
+        ttl_seconds=settings_obj.llm_cache_ttl_seconds,
+        max_entries=settings_obj.cache_max_entries,
+        max_bytes=settings_obj.cache_max_bytes,
+        backend=backend,
+        name="llm",
+    )
+
+
+class _ResponseCache:
+    """Keying, cacheability and accounting shared by the sync and async wrappers."""
+
+    def __init__(self, llm: Any, cache: TTLCache[str, LLMResponse], cache_nondeterministic: bool) -> None:
+        self.llm = llm
+        self.cache = cache
+        self.model = str(getattr(llm, "model", type(llm).__name__))
+        self.temperature = float(getattr(llm, "temperature", None) or 0.0)
+        self.cacheable = cache_nondeterministic or self.temperature == 0.0
+        self._stats = LLMCacheStats()
+        self._lock = threading.Lock()
+
+    def key(self, kind: str, payload: Any) -> Optional[str]:
+        if not self.cacheable:
+            with self._lock:
+                self._stats.bypassed += 1
+            return None
+        raw = json.dumps([self.model, self.temperature, kind, payload], ensure_ascii=False, separators=(",", ":"))
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def lookup(self, key: str, prompt_text: str) -> Optional[LLMResponse]:
+        response = self.cache.get(key)
+        self._record(prompt_text, response)
+        return response
+
+    def fetch(self, key: str, prompt_text: str, load: Callable[[], LLMResponse]) -> LLMResponse:
+        """Cached response for ``key``, or ``load()``; a caller served by another's in-flight load is a hit."""
+
+        loaded = False
+
+        def run() -> LLMResponse:
+            nonlocal loaded
+            loaded = True
+            return load()
+
+        response = self.cache.get_or_set(key, run)
+        self._record(prompt_text, None if loaded else response)
+        return response
+
+    async def afetch(self, key: str, prompt_text: str, load: Callable[[], Awaitable[LLMResponse]]) -> LLMResponse:
+        loaded = False
+
+        async def run() -> LLMResponse:
+            nonlocal loaded
+            loaded = True
+            return await load()
+
+        response = await self.cache.aget_or_set(key, run)
+        self._record(prompt_text, None if loaded else response)
+        return response
+
+    def stats(self) -> LLMCacheStats:
+        with self._lock:
+            return LLMCacheStats(**vars(self._stats))
+
+    def _record(self, prompt_text: str, cached: Optional[LLMResponse]) -> None:
+        saved = 0 if cached is None else estimate_tokens(prompt_text) + estimate_tokens(cached.text)
+        with self._lock:
+            if cached is None:
+                self._stats.misses += 1
+            else:
+                self._stats.hits += 1
+                self._stats.tokens_saved += saved
+        if saved:
+            LLM_TOKENS_SAVED.labels(self.model).inc(saved)
+
+
+def _messages_payload(messages: List[ChatMessage]) -> List[List[str]]:
+    return [[message.role, message.content] for message in messages]
+
+
+def _messages_text(messages: List[ChatMessage]) -> str:
+    return "\n".join(message.content for message in messages)
+
+
+class CachedLLM(BaseLLM):
+    """Memoizes ``generate``, ``chat`` and ``stream`` of a wrapped backend.
+
+    Responses are only reused when the backend is deterministic (temperature 0,
+    or no temperature at all) unless ``cache_nondeterministic`` is set.
+    """
+
+    def __init__(
+        self, llm: BaseLLM, cache: TTLCache[str, LLMResponse], cache_nondeterministic: bool = False
+    ) -> None:
+        self.llm = llm
+        self._responses = _ResponseCache(llm, cache, cache_nondeterministic)
+
+    def generate(self, prompt: str) -> LLMResponse:
+        key = self._responses.key("generate", prompt)
+        if key is None:
+            return self.llm.generate(prompt)
+        return self._responses.fetch(key, prompt, lambda: self.llm.generate(prompt))
+
+    def chat(self, messages: List[ChatMessage]) -> LLMResponse:
+        key = self._responses.key("chat", _messages_payload(messages))
+        if key is None:
+            return self.llm.chat(messages)
+        return self._responses.fetch(key, _messages_text(messages), lambda: self.llm.chat(messages))
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Replay a cached ``generate`` response in one chunk, or stream and remember it."""
+
+        key = self._responses.key("generate", prompt)
+        if key is None:
+            yield from stream_generate(self.llm, prompt)
+            return
+        cached = self._responses.lookup(key, prompt)
+        if cached is not None:
+            yield cached.text
+            return
+        chunks: List[str] = []
+        for chunk in stream_generate(self.llm, prompt):
+            chunks.append(chunk)
+            yield chunk
+        self._responses.cache.set(key, LLMResponse(text="".join(chunks)))
+
+    def stats(self) -> LLMCacheStats:
+        return self._responses.stats()
+
+
+class AsyncCachedLLM(AsyncBaseLLM):
+    """asyncio counterpart of ``CachedLLM``; can share its response store."""
+
+    def __init__(
+        self, llm: AsyncBaseLLM, cache: TTLCache[str, LLMResponse], cache_nondeterministic: bool = False
+    ) -> None:
+        self.llm = llm
+        self._responses = _ResponseCache(llm, cache, cache_nondeterministic)
+
+    async def generate(self, prompt: str) -> LLMResponse:
+        key = self._responses.key("generate", prompt)
+        if key is None:
+            return await self.llm.generate(prompt)
+        return await self._responses.afetch(key, prompt, lambda: self.llm.generate(prompt))
+
+    async def chat(self, messages: List[ChatMessage]) -> LLMResponse:
+        key = self._responses.key("chat", _messages_payload(messages))
+        if key is None:
+            return await self.llm.chat(messages)
+        return await self._responses.afetch(key, _messages_text(messages), lambda: self.llm.chat(messages))
+
+    def stats(self) -> LLMCacheStats:
+        return self._responses.stats()
@@ -3,10 +3,11 @@
 from __future__ import annotations
 
 import random
+import re
 from textwrap import dedent
-from typing import List
+from typing import Iterator, List
 
-from .base import BaseLLM, ChatMessage, LLMResponse
+from .base import AsyncBaseLLM, BaseLLM, ChatMessage, LLMResponse
 
 
 class LocalLLM(BaseLLM):
@@ -28,6 +29,27 @@ class LocalLLM(BaseLLM):
         ).strip()
         return LLMResponse(text=text)
 
+    def generate_batch(self, prompts: List[str]) -> List[LLMResponse]:
+        return [self.generate(prompt) for prompt in prompts]
+
     def chat(self, messages: List[ChatMessage]) -> LLMResponse:
         compiled = "\n".join(f"{m.role.upper()}: {m.content}" for m in messages)
         return self.generate(compiled)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield the ``generate`` output word by word to mimic token streaming."""
+
+        yield from re.findall(r"\s*\S+", self.generate(prompt).text)
+
+
+class AsyncLocalLLM(AsyncBaseLLM):
+    """Async face of ``LocalLLM``; generation is CPU-trivial so it runs inline."""
+
+    def __init__(self, seed: int = 42) -> None:
+        self._llm = LocalLLM(seed=seed)
+
+    async def generate(self, prompt: str) -> LLMResponse:
+        return self._llm.generate(prompt)
+
+    async def chat(self, messages: List[ChatMessage]) -> LLMResponse:
+        return self._llm.chat(messages)
@@ -2,12 +2,21 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from ..config import settings
-from .base import BaseLLM, ChatMessage, LLMResponse
+from ..infra.rate_limiter import RateLimiter
+from ..infra.tracing import span
+from .base import AsyncBaseLLM, BaseLLM, ChatMessage, LLMResponse
+
+
+def _resolve_api_key(api_key: Optional[str]) -> str:
+    key = api_key or settings.openai_api_key
+    if not key:
+        raise RuntimeError("OPENAI_API_KEY is required for OpenAI backend")
+    return key
 
 
 class OpenAILLM(BaseLLM):
@@ -16,26 +25,86 @@ class OpenAILLM(BaseLLM):
         api_key: Optional[str] = None,
         model: Optional[str] = None,
         temperature: Optional[float] = None,
+        limiter: Optional[RateLimiter] = None,
     ) -> None:
-        key = api_key or settings.openai_api_key
-        if not key:
-            raise RuntimeError("OPENAI_API_KEY is required for OpenAI backend")
-        self.client = OpenAI(api_key=key)
+        self.client = OpenAI(api_key=_resolve_api_key(api_key))
         self.model = model or settings.openai_model
         self.temperature = temperature if temperature is not None else settings.openai_temperature
+        self.limiter = limiter
+
+    def _throttle(self) -> None:
+        if self.limiter is not None:
+            self.limiter.acquire("openai")
 
     def generate(self, prompt: str) -> LLMResponse:
-        completion = self.client.responses.create(
+        self._throttle()
+        with span("llm.generate", model=self.model):
+            completion = self.client.responses.create(
+                model=self.model,
+                input=prompt,
+                temperature=self.temperature,
+            )
+        return LLMResponse(text=completion.output[0].content[0].text)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield output text deltas as the Responses API streams them."""
+
+        self._throttle()
+        with span("llm.stream", activate=False, model=self.model), self.client.responses.stream(
             model=self.model,
             input=prompt,
             temperature=self.temperature,
-        )
-        return LLMResponse(text=completion.output[0].content[0].text)
+        ) as events:
+            for event in events:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
 
     def chat(self, messages: List[ChatMessage]) -> LLMResponse:
-        completion = self.client.chat.completions.create(
-            model=self.model,
-            temperature=self.temperature,
-            messages=[message.__dict__ for message in messages],
-        )
+        self._throttle()
+        with span("llm.chat", model=self.model):
+            completion = self.client.chat.completions.create(
+                model=self.model,
+                temperature=self.temperature,
+                messages=[message.__dict__ for message in messages],
+            )
+        return LLMResponse(text=completion.choices[0].message.content or "")
+
+
+class AsyncOpenAILLM(AsyncBaseLLM):
+    """Non-blocking variant of ``OpenAILLM`` backed by ``AsyncOpenAI``."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        limiter: Optional[RateLimiter] = None,
+    ) -> None:
+        self.client = AsyncOpenAI(api_key=_resolve_api_key(api_key))
+        self.model = model or settings.openai_model
+        self.temperature = temperature if temperature is not None else settings.openai_temperature
+        self.limiter = limiter
+
+    async def _throttle(self) -> None:
+        if self.limiter is not None:
+            await self.limiter.aacquire("openai")
+
+    async def generate(self, prompt: str) -> LLMResponse:
+        await self._throttle()
+        with span("llm.generate", model=self.model):
+            completion = await self.client.responses.create(
+                model=self.model,
+                input=prompt,
+                temperature=self.temperature,
+            )
+        return LLMResponse(text=completion.output[0].content[0].text)
+
+    async def chat(self, messages: List[ChatMessage]) -> LLMResponse:
+        await self._throttle()
+        with span("llm.chat", model=self.model):
+            completion = await self.client.chat.completions.create(
+                model=self.model,
+                temperature=self.temperature,
+                messages=[message.__dict__ for message in messages],
+            )
         return LLMResponse(text=completion.choices[0].message.content or "")
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
 from typing import List, Protocol
 
@@ -14,6 +15,33 @@ class WebDocument:
     content: str
 
 
+def documents_to_rows(documents: List[WebDocument]) -> List[List[str]]:
+    """Positional rows keep persisted search results compact (no repeated field names)."""
+
+    return [[doc.title, doc.url, doc.snippet, doc.content] for doc in documents]
+
+
+def documents_from_rows(rows: List[List[str]]) -> List[WebDocument]:
+    return [
+        WebDocument(title=title, url=url, snippet=snippet, content=content) for title, url, snippet, content in rows
+    ]
+
+
 class BaseRetriever(Protocol):
     def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
         ...
+
+
+class AsyncBaseRetriever(Protocol):
+    async def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        ...
+
+
+class AsyncRetrieverAdapter(AsyncBaseRetriever):
+    """Runs a blocking ``BaseRetriever`` in worker threads so it can serve the async path."""
+
+    def __init__(self, retriever: BaseRetriever) -> None:
+        self.retriever = retriever
+
+    async def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        return await asyncio.to_thread(self.retriever.search, query, max_results)
@@ -1,29 +1,349 @@
-"""Very small crawler used to fetch article bodies."""
+"""Very small crawler used to fetch article bodies as readable text."""
 
 from __future__ import annotations
 
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+from typing import Dict, Optional, Sequence
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
 import httpx
 
 from ..config import settings
-from ..infra.cache import TTLCache
+from ..infra.cache import CacheBackend, TTLCache
+from ..infra.disk_cache import SQLiteBackend, TextSerializer
+from ..infra.http import HttpClientConfig, _HostSlots, get_async_http_client, get_http_client
 from ..infra.logger import get_logger
+from ..infra.singleflight import AsyncSingleFlight, SingleFlight
+from .extract import ReadableTextExtractor, normalize_text
 
 
 logger = get_logger(__name__)
 
+HTML_TYPES = frozenset({"text/html", "application/xhtml+xml"})
+TEXT_TYPES = frozenset({"text/plain"})
+
+
+class UnsupportedContentType(ValueError):
+    """Raised before the body is read when a URL does not serve HTML or plain text."""
+
+
+class RobotsDisallowed(PermissionError):
+    """Raised when robots.txt forbids our user agent from fetching a URL."""
+
+
+class HostPoliteness:
+    """Per-host crawl etiquette shared by the crawlers' ``fetch_many``.
+
+    Request starts to one host are spaced at least ``delay`` seconds apart (or the
+    host's robots.txt ``Crawl-delay`` when larger). Hosts are keyed by origin
+    (scheme and netloc). Parsed robots.txt files are kept for the ``max_hosts`` most
+    recently used origins; start slots are dropped once they are in the past.
+    """
+
+    def __init__(
+        self,
+        delay: float,
+        respect_robots: bool,
+        user_agent: str,
+        max_hosts: int = HttpClientConfig.max_hosts,
+    ) -> None:
+        self.delay = delay
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.max_hosts = max_hosts
+        self._lock = threading.Lock()
+        self._next_start: Dict[str, float] = {}
+        self._robots: "OrderedDict[str, Optional[RobotFileParser]]" = OrderedDict()
+
+    def reserve(self, origin: str) -> float:
+        """Claim the host's next start slot; returns how long to wait before using it."""
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(origin, now))
+            robots = self._robots.get(origin)
+            crawl_delay = robots.crawl_delay(self.user_agent) if robots is not None else None
+            self._next_start[origin] = start + max(self.delay, float(crawl_delay or 0))
+            if len(self._next_start) > self.max_hosts:
+                self._next_start = {host: at for host, at in self._next_start.items() if at > now}
+            return start - now
+
+    def needs_robots(self, origin: str) -> bool:
+        with self._lock:
+            return self.respect_robots and origin not in self._robots
+
+    def set_robots(self, origin: str, status_code: int, body: str) -> None:
+        """Record a robots.txt response; anything but a 200 allows every path."""
+
+        parser: Optional[RobotFileParser] = None
+        if status_code == 200:
+            parser = RobotFileParser()
+            parser.parse(body.splitlines())
+        with self._lock:
+            self._robots[origin] = parser
+            self._robots.move_to_end(origin)
+            while len(self._robots) > self.max_hosts:
+                self._robots.popitem(last=False)
+
+    def check(self, url: str) -> None:
+        origin = _origin(url)
+        with self._lock:
+            robots = self._robots.get(origin)
+            if origin in self._robots:
+                self._robots.move_to_end(origin)
+        if robots is not None and not robots.can_fetch(self.user_agent, url):
+            raise RobotsDisallowed(f"robots.txt disallows {url}")
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _build_cache() -> TTLCache[str, str]:
+    backend: Optional[CacheBackend[str, str]] = None
+    if settings.cache_backend == "sqlite":
+        backend = SQLiteBackend(
+            os.path.join(settings.cache_dir, "cache.sqlite3"),
+            serializer=TextSerializer(),
+            namespace="pages",
+            max_entries=settings.cache_max_entries,
+            max_bytes=settings.cache_max_bytes,
+        )
+    return TTLCache[str, str](
+        ttl_seconds=settings.cache_ttl_seconds,
+        max_entries=settings.cache_max_entries,
+        max_bytes=settings.cache_max_bytes,
+        backend=backend,
+        name="pages",
+    )
+
+
+class _PageReader:
+    """Turns a streamed response body into capped readable text.
+
+    The content type is checked from the headers before any body bytes are
+    read; reading stops once ``max_bytes`` have been downloaded.
+    """
+
+    def __init__(self, url: str, content_type: str, max_bytes: int, max_chars: int) -> None:
+        media_type = content_type.split(";", 1)[0].strip().lower() or "text/html"
+        if media_type not in HTML_TYPES and media_type not in TEXT_TYPES:
+            raise UnsupportedContentType(f"{url} serves {media_type}, not HTML or text")
+        self.url = url
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self._extractor = ReadableTextExtractor() if media_type in HTML_TYPES else None
+        self._chunks: list = []
+        self._chars = 0
+
+    def feed(self, chunk: str, bytes_read: int) -> bool:
+        """Consume ``chunk``; returns True once the byte cap is reached."""
+
+        if self._extractor is not None:
+            self._extractor.feed(chunk)
+        elif self._chars < self.max_chars * 2:
+            self._chunks.append(chunk)
+            self._chars += len(chunk)
+        if bytes_read >= self.max_bytes:
+            logger.info("Page truncated at byte cap", extra={"url": self.url, "max_bytes": self.max_bytes})
+            return True
+        return False
+
+    def text(self) -> str:
+        if self._extractor is None:
+            return normalize_text("".join(self._chunks), self.max_chars)
+        self._extractor.close()
+        return self._extractor.text(self.max_chars)
+
+
+def _politeness() -> HostPoliteness:
+    return HostPoliteness(settings.crawler_host_delay, settings.crawler_respect_robots, settings.user_agent)
+
+
+def _log_failure(url: str, error: BaseException) -> None:
+    if isinstance(error, (RobotsDisallowed, UnsupportedContentType)):
+        logger.info("Skipping url", extra={"url": url, "reason": str(error)})
+    else:
+        logger.warning("Crawl failed", extra={"url": url, "error": repr(error)})
+
 
 class SimpleCrawler:
-    def __init__(self) -> None:
-        self.client = httpx.Client(timeout=settings.crawler_timeout, headers={"User-Agent": settings.user_agent})
-        self.cache = TTLCache[str, str](ttl_seconds=settings.cache_ttl_seconds)
+    """Fetches pages and caches only their extracted text (at most ``max_chars``)."""
+
+    def __init__(
+        self,
+        client: Optional[httpx.Client] = None,
+        max_bytes: Optional[int] = None,
+        max_chars: Optional[int] = None,
+    ) -> None:
+        self.client = client or get_http_client()
+        self.max_bytes = max_bytes or settings.crawler_max_bytes
+        self.max_chars = max_chars or settings.max_content_length
+        self.timeout = settings.crawler_timeout
+        self.max_concurrency = settings.crawler_concurrency
+        self.per_host = settings.crawler_per_host_concurrency
+        self.politeness = _politeness()
+        self.cache = _build_cache()
+        self._robots_flights = SingleFlight()
+        self._hosts = _HostSlots(partial(threading.BoundedSemaphore, self.per_host), self.politeness.max_hosts)
 
     def fetch(self, url: str) -> str:
-        cached = self.cache.get(url)
-        if cached:
-            return cached
+        return self.cache.get_or_set(url, lambda: self._download(url))
+
+    def fetch_many(self, urls: Sequence[str], deadline: Optional[float] = None) -> Dict[str, str]:
+        """Crawl ``urls`` concurrently, politely, and return the pages that succeeded.
+
+        At most ``max_concurrency`` downloads run at once and ``per_host`` per host,
+        spaced by the host delay and honouring robots.txt. Failed URLs are logged and
+        left out; with ``deadline`` seconds, URLs still in flight are dropped too.
+        The result keeps the order of ``urls``.
+        """
+
+        unique = list(dict.fromkeys(urls))
+        if not unique:
+            return {}
+        workers = min(self.max_concurrency, len(unique))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crawl")
+        futures = {executor.submit(self._fetch_polite, url): url for url in unique}
+        try:
+            done, _ = wait(futures, timeout=deadline)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        pages: Dict[str, str] = {}
+        for future, url in futures.items():
+            if future not in done:
+                logger.warning("Crawl exceeded batch deadline", extra={"url": url, "deadline": deadline})
+            elif future.exception() is not None:
+                _log_failure(url, future.exception())
+            else:
+                pages[url] = future.result()
+        return pages
+
+    def _fetch_polite(self, url: str) -> str:
+        return self.cache.get_or_set(url, lambda: self._polite_download(url))
+
+    def _polite_download(self, url: str) -> str:
+        origin = _origin(url)
+        if self.politeness.needs_robots(origin):
+            self._robots_flights.do(origin, lambda: self._load_robots(origin))
+        self.politeness.check(url)
+        slot = self._hosts.checkout(origin)
+        try:
+            with slot:
+                time.sleep(self.politeness.reserve(origin))
+                return self._download(url)
+        finally:
+            self._hosts.checkin(origin)
+
+    def _load_robots(self, origin: str) -> None:
+        if not self.politeness.needs_robots(origin):
+            return
+        try:
+            response = self.client.get(f"{origin}/robots.txt", timeout=self.timeout)
+            self.politeness.set_robots(origin, response.status_code, response.text)
+        except httpx.HTTPError:
+            self.politeness.set_robots(origin, 0, "")
+
+    def _download(self, url: str) -> str:
+        logger.debug("Crawling url", extra={"url": url})
+        with self.client.stream("GET", url, timeout=self.timeout) as response:
+            response.raise_for_status()
+            page = _PageReader(url, response.headers.get("content-type", ""), self.max_bytes, self.max_chars)
+            for chunk in response.iter_text():
+                if page.feed(chunk, response.num_bytes_downloaded):
+                    break
+        return page.text()
+
+
+class AsyncSimpleCrawler:
+    """``SimpleCrawler`` on top of ``httpx.AsyncClient`` for the asyncio path."""
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        max_bytes: Optional[int] = None,
+        max_chars: Optional[int] = None,
+    ) -> None:
+        # Resolved per call: the shared async client is bound to the running event loop.
+        self.client = client
+        self.max_bytes = max_bytes or settings.crawler_max_bytes
+        self.max_chars = max_chars or settings.max_content_length
+        self.timeout = settings.crawler_timeout
+        self.max_concurrency = settings.crawler_concurrency
+        self.per_host = settings.crawler_per_host_concurrency
+        self.politeness = _politeness()
+        self.cache = _build_cache()
+        self._robots_flights = AsyncSingleFlight()
+        self._hosts = _HostSlots(partial(asyncio.Semaphore, self.per_host), self.politeness.max_hosts)
+
+    async def fetch(self, url: str) -> str:
+        return await self.cache.aget_or_set(url, lambda: self._download(url))
+
+    async def fetch_many(self, urls: Sequence[str], deadline: Optional[float] = None) -> Dict[str, str]:
+        """Async ``SimpleCrawler.fetch_many``; pending crawls are cancelled at the deadline."""
+
+        unique = list(dict.fromkeys(urls))
+        if not unique:
+            return {}
+        limit = asyncio.Semaphore(self.max_concurrency)
+        tasks = {url: asyncio.ensure_future(self._fetch_polite(url, limit)) for url in unique}
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+
+        pages: Dict[str, str] = {}
+        for url, task in tasks.items():
+            if task not in done:
+                logger.warning("Crawl exceeded batch deadline", extra={"url": url, "deadline": deadline})
+            elif task.exception() is not None:
+                _log_failure(url, task.exception())
+            else:
+                pages[url] = task.result()
+        return pages
+
+    async def _fetch_polite(self, url: str, limit: asyncio.Semaphore) -> str:
+        async with limit:
+            return await self.cache.aget_or_set(url, lambda: self._polite_download(url))
+
+    async def _polite_download(self, url: str) -> str:
+        origin = _origin(url)
+        if self.politeness.needs_robots(origin):
+            await self._robots_flights.do(origin, lambda: self._load_robots(origin))
+        self.politeness.check(url)
+        slot = self._hosts.checkout(origin)
+        try:
+            async with slot:
+                await asyncio.sleep(self.politeness.reserve(origin))
+                return await self._download(url)
+        finally:
+            self._hosts.checkin(origin)
+
+    async def _load_robots(self, origin: str) -> None:
+        if not self.politeness.needs_robots(origin):
+            return
+        try:
+            client = self.client or get_async_http_client()
+            response = await client.get(f"{origin}/robots.txt", timeout=self.timeout)
+            self.politeness.set_robots(origin, response.status_code, response.text)
+        except httpx.HTTPError:
+            self.politeness.set_robots(origin, 0, "")
+
+    async def _download(self, url: str) -> str:
         logger.debug("Crawling url", extra={"url": url})
-        response = self.client.get(url)
-        response.raise_for_status()
-        text = response.text
-        self.cache.set(url, text)
-        return text
+        client = self.client or get_async_http_client()
+        async with client.stream("GET", url, timeout=self.timeout) as response:
+            response.raise_for_status()
+            page = _PageReader(url, response.headers.get("content-type", ""), self.max_bytes, self.max_chars)
+            async for chunk in response.aiter_text():
+                if page.feed(chunk, response.num_bytes_downloaded):
+                    break
+        return page.text()
@@ -0,0 +1,108 @@
+"""Dense text embeddings with lazy model loading and a content-hash cache."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Any, List, Optional, Protocol, Sequence
+
+import numpy as np
+
+from ..infra.cache import TTLCache
+from ..infra.logger import get_logger
+from .base import WebDocument
+
+
+logger = get_logger(__name__)
+
+
+class Embedder(Protocol):
+    @property
+    def dimension(self) -> int:
+        ...
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Return one L2-normalized float32 row per text."""
+        ...
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def document_text(doc: WebDocument, max_chars: int = 1000) -> str:
+    return f"{doc.title}. {doc.snippet} {doc.content}"[:max_chars]
+
+
+class SentenceTransformerEmbedder:
+    """CPU-friendly ``sentence-transformers`` embedder.
+
+    The model is imported and loaded on the first ``encode`` call so CLI startup
+    stays fast. Embeddings are cached by content hash; only unseen texts are
+    encoded, in batches of ``batch_size``.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        device: Optional[str] = None,
+        batch_size: int = 16,
+        cache_entries: int = 8192,
+        model: Any = None,
+    ) -> None:
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self._model = model
+        self._lock = threading.Lock()
+        self.cache = TTLCache[str, np.ndarray](
+            ttl_seconds=24 * 3600,
+            max_entries=cache_entries,
+            sizeof=lambda vector: vector.nbytes,
+            name="embeddings",
+        )
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+
+                    logger.info("Loading embedding model", extra={"model": self.model_name})
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    @property
+    def dimension(self) -> int:
+        return int(self.model.get_sentence_embedding_dimension())
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        keys = [content_hash(text) for text in texts]
+        vectors: List[Optional[np.ndarray]] = [self.cache.get(key) for key in keys]
+        missing = {key: text for key, text, vector in zip(keys, texts, vectors) if vector is None}
+        if missing:
+            encoded = self.model.encode(
+                list(missing.values()),
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            ).astype(np.float32)
+            fresh = dict(zip(missing.keys(), encoded))
+            for key, vector in fresh.items():
+                self.cache.set(key, vector)
+            vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+        if not vectors:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack(vectors)
+
+
+@lru_cache(maxsize=4)
+def get_embedder(
+    model_name: str, device: Optional[str] = None, batch_size: int = 16
+) -> SentenceTransformerEmbedder:
+    """Process-wide embedder per model so agents share the loaded model and its cache."""
+
+    return SentenceTransformerEmbedder(model_name=model_name, device=device, batch_size=batch_size)
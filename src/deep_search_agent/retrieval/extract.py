@@ -0,0 +1,99 @@
+"""Main readable text extraction from HTML pages."""
+
+from __future__ import annotations
+
+import re
+from html.parser import HTMLParser
+from typing import List
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Elements whose text is never part of an article body.
+SKIP_TAGS = frozenset(
+    {"script", "style", "noscript", "template", "svg", "head", "nav", "header", "footer", "aside", "form", "iframe"}
+)
+BLOCK_TAGS = frozenset(
+    {
+        "p", "div", "section", "article", "main", "li", "ul", "ol", "br", "tr", "td", "pre", "blockquote",
+        "h1", "h2", "h3", "h4", "h5", "h6", "table", "dd", "dt", "figcaption",
+    }
+)
+FOCUS_TAGS = frozenset({"article", "main"})
+MIN_FOCUS_CHARS = 200
+
+
+class ReadableTextExtractor(HTMLParser):
+    """Incremental extractor: ``feed`` HTML chunks as they arrive, then call ``text``.
+
+    Boilerplate containers (navigation, headers, scripts, forms...) are dropped and
+    block elements become paragraph breaks. When the page marks its body with
+    ``<article>`` or ``<main>`` and that holds enough text, only that text is kept.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._skip_depth = 0
+        self._focus_depth = 0
+        self._paragraphs: List[str] = []
+        self._focus: List[str] = []
+        self._current: List[str] = []
+        self._current_in_focus = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._break()
+        if tag in FOCUS_TAGS:
+            self._focus_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._break()
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in BLOCK_TAGS:
+            self._break()
+        if tag in FOCUS_TAGS:
+            self._break()
+            self._focus_depth = max(self._focus_depth - 1, 0)
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if not self._current:
+            self._current_in_focus = self._focus_depth > 0
+        self._current.append(data)
+
+    def text(self, max_chars: int) -> str:
+        self._break()
+        focus = "\n".join(self._focus)
+        body = focus if len(focus) >= MIN_FOCUS_CHARS else "\n".join(self._paragraphs)
+        return body[:max_chars]
+
+    def _break(self) -> None:
+        if not self._current:
+            return
+        paragraph = _WHITESPACE.sub(" ", "".join(self._current)).strip()
+        self._current = []
+        if paragraph:
+            self._paragraphs.append(paragraph)
+            if self._current_in_focus:
+                self._focus.append(paragraph)
+
+
+def extract_readable_text(html: str, max_chars: int = 2000) -> str:
+    extractor = ReadableTextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.text(max_chars)
+
+
+def normalize_text(text: str, max_chars: int = 2000) -> str:
+    """Plain-text counterpart of ``extract_readable_text``: collapse runs of spaces, keep lines."""
+
+    lines = (_WHITESPACE.sub(" ", line).strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line)[:max_chars]
@@ -0,0 +1,224 @@
+"""Search federation: hedged requests across several providers, fastest sufficient answer wins."""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+
+from ..infra.logger import get_logger
+from ..infra.metrics import SEARCH_PROVIDER_CALLS
+from ..infra.tracing import span
+from ..utils.text import normalize_whitespace
+from .base import BaseRetriever, WebDocument
+
+
+logger = get_logger(__name__)
+
+
+# Provider calls from every FederatedRetriever share one bounded pool of threads.
+_EXECUTOR_WORKERS = 32
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _shared_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_EXECUTOR_WORKERS, thread_name_prefix="federated")
+        return _executor
+
+
+def provider_name(retriever: BaseRetriever) -> str:
+    return getattr(retriever, "name", None) or type(retriever).__name__
+
+
+class ProviderStats:
+    """Latency and error rate over a provider's last ``window`` calls."""
+
+    def __init__(self, window: int = 100) -> None:
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._failures: Deque[bool] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self._failures.append(not ok)
+            if ok:
+                self._latencies.append(seconds)
+
+    @property
+    def calls(self) -> int:
+        with self._lock:
+            return len(self._failures)
+
+    @property
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return sum(self._failures) / len(self._failures) if self._failures else 0.0
+
+    def latency(self, percentile: float) -> Optional[float]:
+        """Latency at ``percentile`` (0-1) of recent successful calls, or ``None`` before any."""
+
+        with self._lock:
+            samples = list(self._latencies)
+        return float(np.percentile(samples, percentile * 100)) if samples else None
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "error_rate": self.error_rate,
+            "p50_ms": _ms(self.latency(0.5)),
+            "p90_ms": _ms(self.latency(0.9)),
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else seconds * 1000
+
+
+@dataclass
+class _Attempt:
+    provider: BaseRetriever
+    started: float
+
+
+class FederatedRetriever(BaseRetriever):
+    """``BaseRetriever`` over several providers with hedged requests.
+
+    Providers are tried in order of health (error rate under
+    ``max_error_rate``) and then median latency; providers without samples go
+    first so they get measured. The first request is hedged with the next
+    provider once it runs longer than that provider's ``hedge_percentile``
+    latency (``hedge_delay`` until ``min_samples`` calls are recorded), and
+    failures or short answers fail over immediately. The first answer with at
+    least ``min_results`` documents wins; if none does, all answers are merged
+    with URL dedup. Losing requests finish in the background and still feed the
+    statistics. Calls run on ``executor`` (by default a pool shared by all
+    instances), so instances need no cleanup.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[BaseRetriever],
+        hedge_percentile: float = 0.9,
+        hedge_delay: float = 0.5,
+        min_results: Optional[int] = None,
+        max_error_rate: float = 0.5,
+        min_samples: int = 5,
+        window: int = 100,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ) -> None:
+        if not providers:
+            raise ValueError("FederatedRetriever needs at least one provider")
+        self.providers = list(providers)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.min_results = min_results
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.stats: Dict[str, ProviderStats] = {provider_name(p): ProviderStats(window) for p in self.providers}
+        self._executor = executor or _shared_executor()
+
+    def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        enough = min(self.min_results or max_results, max_results)
+        queue = self.route()
+        attempts: Dict[Future, _Attempt] = {}
+        answers: List[List[WebDocument]] = []
+        error: Optional[BaseException] = None
+        with span("search.federated", providers=len(queue)) as current:
+
+            def launch() -> None:
+                provider = queue.pop(0)
+                step = contextvars.copy_context().run
+                future = self._executor.submit(step, self._call, provider, query, max_results)
+                attempts[future] = _Attempt(provider, time.monotonic())
+
+            launch()
+            while attempts:
+                hedge_after = self._hedge_after(attempts) if queue else None
+                done, _ = wait(attempts, timeout=hedge_after, return_when=FIRST_COMPLETED)
+                if not done:
+                    current.attributes["hedged"] = current.attributes.get("hedged", 0) + 1
+                    launch()
+                    continue
+                for future in done:
+                    attempt = attempts.pop(future)
+                    if future.exception() is not None:
+                        error = future.exception()
+                        continue
+                    documents = future.result()
+                    if len(documents) >= enough:
+                        current.attributes["winner"] = provider_name(attempt.provider)
+                        return documents[:max_results]
+                    answers.append(documents)
+                if queue:
+                    launch()
+        if not answers and error is not None:
+            raise error
+        return merge_results(answers, max_results)
+
+    def route(self) -> List[BaseRetriever]:
+        """Providers in the order they should be tried."""
+
+        def key(provider: BaseRetriever):
+            stats = self.stats[provider_name(provider)]
+            median = stats.latency(0.5)
+            return (stats.error_rate > self.max_error_rate, median is not None, median or 0.0)
+
+        return sorted(self.providers, key=key)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+    def _hedge_after(self, attempts: Dict[Future, _Attempt]) -> float:
+        latest = max(attempts.values(), key=lambda attempt: attempt.started)
+        stats = self.stats[provider_name(latest.provider)]
+        threshold = stats.latency(self.hedge_percentile) if stats.samples >= self.min_samples else None
+        return max((threshold or self.hedge_delay) - (time.monotonic() - latest.started), 0.0)
+
+    def _call(self, provider: BaseRetriever, query: str, max_results: int) -> List[WebDocument]:
+        name = provider_name(provider)
+        started = time.perf_counter()
+        with span("search.provider", provider=name):
+            try:
+                documents = provider.search(query, max_results=max_results)
+            except Exception as exc:
+                self.stats[name].record(time.perf_counter() - started, ok=False)
+                SEARCH_PROVIDER_CALLS.labels(name, "error").inc()
+                logger.warning("Search provider failed", extra={"provider": name, "error": repr(exc)})
+                raise
+        self.stats[name].record(time.perf_counter() - started, ok=True)
+        SEARCH_PROVIDER_CALLS.labels(name, "ok").inc()
+        return documents
+
+
+def merge_results(answers: Sequence[List[WebDocument]], max_results: int) -> List[WebDocument]:
+    """Interleave provider answers by rank, skipping URLs already taken."""
+
+    merged: List[WebDocument] = []
+    seen: Set[str] = set()
+    for rank in range(max((len(answer) for answer in answers), default=0)):
+        for answer in answers:
+            if rank >= len(answer):
+                continue
+            key = normalize_whitespace(answer[rank].url).rstrip("/").lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(answer[rank])
+            if len(merged) >= max_results:
+                return merged
+    return merged
@@ -1,26 +1,115 @@
-"""Lightweight semantic ranking for retrieved snippets."""
+"""Lexical ranking for retrieved documents (vectorized BM25 over title, snippet and content)."""
 
 from __future__ import annotations
 
+import re
+from collections import Counter
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Optional, Sequence
 
+import numpy as np
+
+from ..infra.tracing import span
 from .base import WebDocument
 
 
+_TOKEN = re.compile(r"\w+")
+
+FIELD_WEIGHTS: Dict[str, float] = {"title": 1.5, "snippet": 1.0, "content": 0.5}
+
+
 @dataclass
 class RankedDocument:
     document: WebDocument
     score: float
 
 
-def score_documents(query: str, documents: List[WebDocument]) -> List[RankedDocument]:
-    query_terms = set(query.lower().split())
-    ranked: List[RankedDocument] = []
-    for doc in documents:
-        snippet_terms = set(doc.snippet.lower().split())
-        overlap = len(query_terms & snippet_terms)
-        score = overlap / max(len(query_terms), 1)
-        ranked.append(RankedDocument(document=doc, score=score))
-    ranked.sort(key=lambda item: item.score, reverse=True)
-    return ranked
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """BM25 statistics for one candidate batch, built once and reusable across queries.
+
+    Term frequencies are field-weighted (BM25F-style) and stored as a CSR matrix
+    in NumPy arrays, so scoring a query touches only the columns of its terms.
+    """
+
+    def __init__(
+        self,
+        documents: Sequence[WebDocument],
+        k1: float = 1.2,
+        b: float = 0.75,
+        field_weights: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        weights = field_weights or FIELD_WEIGHTS
+        self.vocabulary: Dict[str, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for doc in documents:
+            counts: Counter = Counter()
+            for field_name, weight in weights.items():
+                for term in tokenize(getattr(doc, field_name)):
+                    counts[term] += weight
+            for term, tf in counts.items():
+                indices.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                data.append(tf)
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.float64)
+        self.rows = np.repeat(np.arange(len(documents)), np.diff(self.indptr))
+        lengths = np.bincount(self.rows, weights=self.data, minlength=len(documents))
+        self.length_norm = 1.0 - b + b * lengths / max(lengths.mean(), 1e-9) if len(documents) else lengths
+        df = np.bincount(self.indices, minlength=len(self.vocabulary))
+        self.idf = np.log1p((len(documents) - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> np.ndarray:
+        term_ids = sorted({self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary})
+        scores = np.zeros(len(self.documents), dtype=np.float64)
+        if not term_ids:
+            return scores
+        mask = np.isin(self.indices, term_ids)
+        tf = self.data[mask]
+        rows = self.rows[mask]
+        saturation = tf * (self.k1 + 1.0) / (tf + self.k1 * self.length_norm[rows])
+        np.add.at(scores, rows, self.idf[self.indices[mask]] * saturation)
+        return scores
+
+    def rank(self, query: str, top_k: Optional[int] = None) -> List[RankedDocument]:
+        scores = self.scores(query)
+        order = top_k_indices(scores, top_k)
+        return [RankedDocument(document=self.documents[index], score=float(scores[index])) for index in order]
+
+
+def top_k_indices(scores: np.ndarray, top_k: Optional[int] = None) -> np.ndarray:
+    """Indices of the ``top_k`` best scores, highest first; ties keep input order.
+
+    Uses a partial partition (O(n)) to find the cut-off before sorting the survivors.
+    """
+
+    n = len(scores)
+    k = n if top_k is None else max(min(top_k, n), 0)
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        threshold = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.arange(n)
+    ordered = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return ordered[:k]
+
+
+def score_documents(query: str, documents: List[WebDocument], top_k: Optional[int] = None) -> List[RankedDocument]:
+    """Rank ``documents`` against ``query`` with BM25, keeping the best ``top_k`` (all by default)."""
+
+    if not documents:
+        return []
+    with span("rank", documents=len(documents)):
+        return BM25Index(documents).rank(query, top_k)
@@ -0,0 +1,37 @@
+"""Dense reranking stage applied after lexical ``score_documents``."""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import numpy as np
+
+from ..infra.tracing import span
+from .embeddings import Embedder, document_text
+from .rag import RankedDocument, top_k_indices
+
+
+class EmbeddingReranker:
+    """Reorders lexical candidates by cosine similarity to the query.
+
+    Only the best ``candidate_pool`` lexical hits are encoded; candidates below
+    ``similarity_threshold`` are dropped.
+    """
+
+    def __init__(self, embedder: Embedder, similarity_threshold: float = 0.35, candidate_pool: int = 32) -> None:
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.candidate_pool = candidate_pool
+
+    def rerank(self, query: str, ranked: List[RankedDocument], top_k: Optional[int] = None) -> List[RankedDocument]:
+        if not ranked:
+            return []
+        with span("rerank", candidates=len(ranked)):
+            vectors = self.embedder.encode([query] + [document_text(rank.document) for rank in ranked])
+        similarities = vectors[1:] @ vectors[0]
+        similarities = np.where(similarities >= self.similarity_threshold, similarities, -np.inf)
+        keep = int(np.isfinite(similarities).sum())
+        order = top_k_indices(similarities, keep if top_k is None else min(top_k, keep))
+        return [
+            RankedDocument(document=ranked[index].document, score=float(similarities[index])) for index in order
+        ]
@@ -0,0 +1,86 @@
+"""API-backed web search providers (Tavily, Brave) for ``FederatedRetriever``.
+
+Like ``DuckDuckGoRetriever``, each caches results per query (``search.<provider>``)
+and coalesces concurrent identical searches, so repeats do not reach the paid API.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import httpx
+
+from ..infra.http import get_http_client
+from .base import BaseRetriever, WebDocument
+from .web_search import build_search_cache
+
+
+TAVILY_URL = "https://api.tavily.com/search"
+BRAVE_URL = "https://api.search.brave.com/res/v1/web/search"
+
+
+class TavilyRetriever(BaseRetriever):
+    """Tavily search API; ``content`` carries the snippet Tavily extracts for each hit."""
+
+    name = "tavily"
+
+    def __init__(self, api_key: str, max_results: int = 5, client: Optional[httpx.Client] = None) -> None:
+        self.api_key = api_key
+        self.max_results = max_results
+        self.client = client or get_http_client()
+        self.cache = build_search_cache(f"search.{self.name}")
+
+    def search(self, query: str, max_results: Optional[int] = None) -> List[WebDocument]:
+        target = max_results or self.max_results
+        results = self.cache.get_or_set(query, lambda: self._fetch(query, max(target, self.max_results)))
+        return results[:target]
+
+    def _fetch(self, query: str, target: int) -> List[WebDocument]:
+        payload = {"api_key": self.api_key, "query": query, "max_results": target}
+        response = self.client.post(TAVILY_URL, json=payload)
+        response.raise_for_status()
+        return [
+            WebDocument(
+                title=item.get("title") or "",
+                url=item.get("url") or "",
+                snippet=(item.get("content") or "")[:180],
+                content=item.get("content") or "",
+            )
+            for item in response.json().get("results", [])
+            if item.get("url")
+        ]
+
+
+class BraveRetriever(BaseRetriever):
+    """Brave Search web API."""
+
+    name = "brave"
+
+    def __init__(self, api_key: str, max_results: int = 5, client: Optional[httpx.Client] = None) -> None:
+        self.api_key = api_key
+        self.max_results = max_results
+        self.client = client or get_http_client()
+        self.cache = build_search_cache(f"search.{self.name}")
+
+    def search(self, query: str, max_results: Optional[int] = None) -> List[WebDocument]:
+        target = max_results or self.max_results
+        results = self.cache.get_or_set(query, lambda: self._fetch(query, max(target, self.max_results)))
+        return results[:target]
+
+    def _fetch(self, query: str, target: int) -> List[WebDocument]:
+        response = self.client.get(
+            BRAVE_URL,
+            params={"q": query, "count": target},
+            headers={"Accept": "application/json", "X-Subscription-Token": self.api_key},
+        )
+        response.raise_for_status()
+        return [
+            WebDocument(
+                title=item.get("title") or "",
+                url=item.get("url") or "",
+                snippet=(item.get("description") or "")[:180],
+                content=item.get("description") or "",
+            )
+            for item in response.json().get("web", {}).get("results", [])
+            if item.get("url")
+        ]
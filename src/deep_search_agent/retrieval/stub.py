@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import List
 
-from .base import BaseRetriever, WebDocument
+from .base import AsyncBaseRetriever, BaseRetriever, WebDocument
 
 
 class StubRetriever(BaseRetriever):
@@ -16,7 +16,9 @@ class StubRetriever(BaseRetriever):
                 title="Open-Source Python Frameworks",
                 url="https://example.com/python-frameworks",
                 snippet="Comparison of Django, FastAPI, and Flask for rapid API development.",
-                content="Django offers batteries-included features, FastAPI provides async speed, Flask stays minimal.",
+                content=(
+                    "Django offers batteries-included features, FastAPI provides async speed, Flask stays minimal."
+                ),
             ),
             WebDocument(
                 title="AI Research Trends 2024",
@@ -29,3 +31,12 @@ class StubRetriever(BaseRetriever):
     def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
         return self._docs[:max_results]
 
+
+class AsyncStubRetriever(AsyncBaseRetriever):
+    """Async face of ``StubRetriever`` for offline ``arun`` calls."""
+
+    def __init__(self) -> None:
+        self._retriever = StubRetriever()
+
+    async def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        return self._retriever.search(query, max_results=max_results)
@@ -0,0 +1,216 @@
+"""Persistent FAISS index of previously retrieved documents."""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import faiss
+import numpy as np
+
+try:  # POSIX only; elsewhere processes must not share a store directory.
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+from ..infra.logger import get_logger
+from .base import AsyncBaseRetriever, BaseRetriever, WebDocument, documents_from_rows, documents_to_rows
+from .embeddings import Embedder, document_text
+from .rag import RankedDocument
+
+
+logger = get_logger(__name__)
+
+INDEX_FILE = "index.faiss"
+DOCUMENTS_FILE = "documents.jsonl"
+LOCK_FILE = ".lock"
+
+
+class FaissVectorStore:
+    """Inner-product FAISS index over normalized document embeddings, deduplicated by URL.
+
+    The on-disk index is memory-mapped read-only on load; new documents go into an
+    in-memory delta index that is merged and written back every ``flush_every``
+    additions (and on ``flush``). Each flush rewrites both files, so it costs
+    O(stored documents); ``flush_every`` amortizes that. The document rows are
+    written to a temporary file and swapped in before the index, so after a
+    crash between the two swaps the first ``ntotal`` rows still match the
+    index, and only those are loaded. Processes sharing a directory serialize
+    flushes and loads on a lock file; the last flush wins, so documents added
+    only by another process may be dropped, but rows never misalign.
+    """
+
+    def __init__(self, directory: str, embedder: Embedder, flush_every: int = 64) -> None:
+        self.directory = directory
+        self.embedder = embedder
+        self.flush_every = flush_every
+        self._lock = threading.RLock()
+        self._documents: List[WebDocument] = []
+        self._urls: Dict[str, int] = {}
+        self._base: Optional[faiss.Index] = None
+        self._delta: Optional[faiss.IndexFlatIP] = None
+        self._pending: List[WebDocument] = []
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, documents: Sequence[WebDocument]) -> int:
+        """Index documents whose URL is not stored yet; returns how many were added."""
+
+        with self._lock:
+            fresh: Dict[str, WebDocument] = {}
+            for doc in documents:
+                if doc.url and doc.url not in self._urls and doc.url not in fresh:
+                    fresh[doc.url] = doc
+            if not fresh:
+                return 0
+            new_docs = list(fresh.values())
+            vectors = self.embedder.encode([document_text(doc) for doc in new_docs])
+            if self._delta is None:
+                self._delta = faiss.IndexFlatIP(vectors.shape[1])
+            self._delta.add(np.ascontiguousarray(vectors, dtype=np.float32))
+            for doc in new_docs:
+                self._urls[doc.url] = len(self._documents)
+                self._documents.append(doc)
+            self._pending.extend(new_docs)
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+            return len(new_docs)
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.0) -> List[RankedDocument]:
+        with self._lock:
+            if not self._documents or k <= 0:
+                return []
+            vector = np.ascontiguousarray(self.embedder.encode([query]), dtype=np.float32)
+            hits: List[RankedDocument] = []
+            offset = 0
+            for index in (self._base, self._delta):
+                if index is None or index.ntotal == 0:
+                    continue
+                scores, ids = index.search(vector, min(k, index.ntotal))
+                for score, doc_id in zip(scores[0], ids[0]):
+                    if doc_id >= 0 and score >= min_score:
+                        hits.append(RankedDocument(document=self._documents[offset + doc_id], score=float(score)))
+                offset += index.ntotal
+            hits.sort(key=lambda hit: hit.score, reverse=True)
+            return hits[:k]
+
+    def flush(self) -> None:
+        """Merge the delta into the persisted index and remap it from disk."""
+
+        with self._lock:
+            if not self._pending or self._delta is None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            merged = faiss.IndexFlatIP(self._delta.d)
+            if self._base is not None and self._base.ntotal:
+                merged.add(self._base.reconstruct_n(0, self._base.ntotal))
+            merged.add(self._delta.reconstruct_n(0, self._delta.ntotal))
+
+            with self._file_lock():
+                documents_tmp = self._path(DOCUMENTS_FILE + ".tmp")
+                with open(documents_tmp, "w", encoding="utf-8") as handle:
+                    for row in documents_to_rows(self._documents):
+                        handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+                index_tmp = self._path(INDEX_FILE + ".tmp")
+                faiss.write_index(merged, index_tmp)
+                os.replace(documents_tmp, self._path(DOCUMENTS_FILE))
+                os.replace(index_tmp, self._path(INDEX_FILE))
+
+            self._base = faiss.read_index(self._path(INDEX_FILE), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            self._delta = None
+            self._pending = []
+
+    def _load(self) -> None:
+        if not os.path.exists(self._path(INDEX_FILE)):
+            return
+        rows = []
+        with self._file_lock():
+            self._base = faiss.read_index(self._path(INDEX_FILE), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            with open(self._path(DOCUMENTS_FILE), encoding="utf-8") as handle:
+                for line in handle:
+                    if len(rows) >= self._base.ntotal:
+                        break
+                    rows.append(json.loads(line))
+        self._documents = documents_from_rows(rows)
+        self._urls = {doc.url: position for position, doc in enumerate(self._documents)}
+        if len(self._documents) < self._base.ntotal:
+            logger.warning("Vector store metadata is shorter than its index; ignoring the store")
+            self._base, self._documents, self._urls = None, [], {}
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock on ``LOCK_FILE`` across processes (a no-op where ``fcntl`` is missing)."""
+
+        if fcntl is None:
+            yield
+            return
+        with open(self._path(LOCK_FILE), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+
+class VectorStoreRetriever(BaseRetriever):
+    """Answers from the local index when it has enough close matches, else searches the web.
+
+    Web results are added to the index so repeat topics are served locally next time.
+    """
+
+    def __init__(self, retriever: BaseRetriever, store: FaissVectorStore, min_score: float = 0.6) -> None:
+        self.retriever = retriever
+        self.store = store
+        self.min_score = min_score
+
+    def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        hits = self.store.search(query, k=max_results, min_score=self.min_score)
+        if len(hits) >= max_results:
+            return [hit.document for hit in hits]
+        documents = self.retriever.search(query, max_results=max_results)
+        self.store.add(documents)
+        return documents
+
+
+class AsyncVectorStoreRetriever(AsyncBaseRetriever):
+    """asyncio counterpart of ``VectorStoreRetriever``; index work runs off the event loop."""
+
+    def __init__(self, retriever: AsyncBaseRetriever, store: FaissVectorStore, min_score: float = 0.6) -> None:
+        self.retriever = retriever
+        self.store = store
+        self.min_score = min_score
+
+    async def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        hits = await asyncio.to_thread(self.store.search, query, max_results, self.min_score)
+        if len(hits) >= max_results:
+            return [hit.document for hit in hits]
+        documents = await self.retriever.search(query, max_results=max_results)
+        await asyncio.to_thread(self.store.add, documents)
+        return documents
+
+
+_stores: Dict[str, FaissVectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(directory: str, embedder: Embedder) -> FaissVectorStore:
+    """Process-wide store per directory; pending additions are flushed at exit."""
+
+    path = os.path.abspath(directory)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = FaissVectorStore(path, embedder)
+            _stores[path] = store
+            atexit.register(store.flush)
+        return store
@@ -2,38 +2,51 @@
 
 from __future__ import annotations
 
+import os
 from html.parser import HTMLParser
 from typing import List, Optional
 from urllib.parse import quote_plus
 
 import httpx
 
-from ..config import settings
-from ..infra.cache import TTLCache
+from ..config import Settings, settings
+from ..infra.cache import CacheBackend, TTLCache
+from ..infra.disk_cache import JSONSerializer, SQLiteBackend
+from ..infra.http import get_async_http_client, get_http_client
 from ..infra.logger import get_logger
-from .base import BaseRetriever, WebDocument
+from .base import AsyncBaseRetriever, BaseRetriever, WebDocument, documents_from_rows, documents_to_rows
 
 
 logger = get_logger(__name__)
 
 
 class _DuckDuckGoParser(HTMLParser):
-    def __init__(self) -> None:
+    """Collects result links; ``done`` turns true once ``target`` results are complete."""
+
+    def __init__(self, target: Optional[int] = None) -> None:
         super().__init__()
+        self.target = target
         self._results: List[WebDocument] = []
         self._capture = False
         self._current_url: Optional[str] = None
         self._current_title: Optional[str] = None
         self._current_snippet: List[str] = []
 
+    @property
+    def done(self) -> bool:
+        return self.target is not None and len(self._results) >= self.target
+
     def handle_starttag(self, tag, attrs):
-        if tag == "a":
-            href = dict(attrs).get("href", "")
-            if href.startswith("http"):
-                self._capture = True
-                self._current_url = href
-                self._current_title = ""
-                self._current_snippet = []
+        if tag != "a" or self.done:
+            return
+        for name, value in attrs:
+            if name == "href":
+                if value and value.startswith("http"):
+                    self._capture = True
+                    self._current_url = value
+                    self._current_title = ""
+                    self._current_snippet = []
+                return
 
     def handle_endtag(self, tag):
         if tag == "a" and self._capture:
@@ -56,40 +69,121 @@ class _DuckDuckGoParser(HTMLParser):
             self._current_snippet.append(data.strip())
 
     def results(self) -> List[WebDocument]:
-        return self._results
+        return self._results[: self.target]
 
 
-class DuckDuckGoRetriever(BaseRetriever):
-    """Lightweight retriever that scrapes DuckDuckGo Lite results."""
+def build_search_cache(name: str = "search") -> TTLCache[str, List[WebDocument]]:
+    """Search-result cache; each provider gets its own ``name`` (and SQLite namespace)."""
 
-    def __init__(self, max_results: int = 5) -> None:
-        self.max_results = max_results
-        self.client = httpx.Client(timeout=10.0, headers={"User-Agent": settings.user_agent})
-        self.cache = TTLCache[str, List[WebDocument]](ttl_seconds=settings.cache_ttl_seconds)
+    backend: Optional[CacheBackend[str, List[WebDocument]]] = None
+    if settings.cache_backend == "sqlite":
+        backend = SQLiteBackend(
+            os.path.join(settings.cache_dir, "cache.sqlite3"),
+            serializer=JSONSerializer(encode=documents_to_rows, decode=documents_from_rows),
+            namespace=name,
+            max_entries=settings.cache_max_entries,
+            max_bytes=settings.cache_max_bytes,
+        )
+    return TTLCache[str, List[WebDocument]](
+        ttl_seconds=settings.cache_ttl_seconds,
+        max_entries=settings.cache_max_entries,
+        max_bytes=settings.cache_max_bytes,
+        backend=backend,
+        name=name,
+    )
 
-    def search(self, query: str, max_results: Optional[int] = None) -> List[WebDocument]:
-        target = max_results or self.max_results
-        cached = self.cache.get(query)
-        if cached:
-            return cached[:target]
 
-        url = f"https://duckduckgo.com/lite/?q={quote_plus(query)}"
-        logger.debug("Fetching search results", extra={"url": url})
-        response = self.client.get(url)
-        response.raise_for_status()
+def _search_url(query: str) -> str:
+    return f"https://duckduckgo.com/lite/?q={quote_plus(query)}"
+
+
+class _ResultStream:
+    """Feeds decoded response chunks to the parser until enough results are complete."""
+
+    FALLBACK_CHARS = 400
 
-        parser = _DuckDuckGoParser()
-        parser.feed(response.text)
+    def __init__(self, query: str, target: int) -> None:
+        self.query = query
+        self.parser = _DuckDuckGoParser(target)
+        self._head: List[str] = []
+        self._head_chars = 0
 
-        results = [doc for doc in parser.results() if doc.url][:target]
+    def feed(self, chunk: str) -> bool:
+        """Parse ``chunk``; returns True once the caller can stop reading."""
+
+        if self._head_chars < self.FALLBACK_CHARS:
+            self._head.append(chunk[: self.FALLBACK_CHARS - self._head_chars])
+            self._head_chars += len(self._head[-1])
+        self.parser.feed(chunk)
+        return self.parser.done
+
+    def results(self) -> List[WebDocument]:
+        results = [doc for doc in self.parser.results() if doc.url]
         if not results:
             fallback = WebDocument(
-                title=f"Result for {query}",
+                title=f"Result for {self.query}",
                 url="https://duckduckgo.com/",
                 snippet="DuckDuckGo search result placeholder.",
-                content=response.text[:400],
+                content="".join(self._head),
             )
             results = [fallback]
-
-        self.cache.set(query, results)
         return results
+
+
+class DuckDuckGoRetriever(BaseRetriever):
+    """Lightweight retriever that scrapes DuckDuckGo Lite results."""
+
+    def __init__(self, max_results: int = 5, client: Optional[httpx.Client] = None) -> None:
+        self.max_results = max_results
+        self.client = client or get_http_client()
+        self.cache = build_search_cache()
+
+    def search(self, query: str, max_results: Optional[int] = None) -> List[WebDocument]:
+        target = max_results or self.max_results
+        # Concurrent callers for the same query share one request; fetch enough for any of them.
+        results = self.cache.get_or_set(query, lambda: self._fetch(query, max(target, self.max_results)))
+        return results[:target]
+
+    def _fetch(self, query: str, target: int) -> List[WebDocument]:
+        url = _search_url(query)
+        logger.debug("Fetching search results", extra={"url": url})
+        stream = _ResultStream(query, target)
+        with self.client.stream("GET", url) as response:
+            response.raise_for_status()
+            for chunk in response.iter_text():
+                if stream.feed(chunk):
+                    # Closing early drops the rest of the page instead of downloading it.
+                    break
+        return stream.results()
+
+
+class AsyncDuckDuckGoRetriever(AsyncBaseRetriever):
+    """``DuckDuckGoRetriever`` on top of ``httpx.AsyncClient`` for the asyncio path."""
+
+    def __init__(
+        self,
+        max_results: int = 5,
+        client: Optional[httpx.AsyncClient] = None,
+        settings_obj: Optional[Settings] = None,
+    ) -> None:
+        self.max_results = max_results
+        # Resolved per call: the shared async client is bound to the running event loop.
+        self.client = client
+        self.settings = settings_obj
+        self.cache = build_search_cache()
+
+    async def search(self, query: str, max_results: Optional[int] = None) -> List[WebDocument]:
+        target = max_results or self.max_results
+        results = await self.cache.aget_or_set(query, lambda: self._fetch(query, max(target, self.max_results)))
+        return results[:target]
+
+    async def _fetch(self, query: str, target: int) -> List[WebDocument]:
+        url = _search_url(query)
+        logger.debug("Fetching search results", extra={"url": url})
+        stream = _ResultStream(query, target)
+        async with (self.client or get_async_http_client(self.settings)).stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_text():
+                if stream.feed(chunk):
+                    break
+        return stream.results()
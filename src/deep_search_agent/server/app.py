@@ -0,0 +1,247 @@
+"""HTTP entrypoint: ``DeepSearchAgent`` behind FastAPI with a warm agent pool and load shedding."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import replace
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+import anyio
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.types import Receive, Scope, Send
+
+from ..agents.deep_search_agent import DeepSearchAgent
+from ..config import Settings, settings
+from ..infra.logger import get_logger
+from ..infra.metrics import RATE_LIMITED
+from ..infra.rate_limiter import AdmissionRejected, RateLimitExceeded
+from ..jobs.store import SQLiteJobStore, get_job_store
+
+
+logger = get_logger(__name__)
+
+
+class SearchRequest(BaseModel):
+    query: str = Field(min_length=1)
+
+
+class JobRequest(SearchRequest):
+    workflow: Optional[str] = None
+
+
+class AgentPool:
+    """Agents built once at startup and checked out one request at a time.
+
+    At most ``len(agents)`` requests run at once. Up to ``max_queue`` more wait
+    for an agent, each for at most ``queue_timeout`` seconds; anything beyond
+    that is rejected with ``AdmissionRejected`` so the server sheds load
+    instead of piling up requests.
+    """
+
+    def __init__(
+        self, agents: List[DeepSearchAgent], max_queue: int, queue_timeout: Optional[float] = None
+    ) -> None:
+        if not agents:
+            raise ValueError("AgentPool needs at least one agent")
+        self.size = len(agents)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._idle: asyncio.Queue[DeepSearchAgent] = asyncio.Queue()
+        for agent in agents:
+            self._idle.put_nowait(agent)
+        self._waiting = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self.size - self._idle.qsize()
+
+    @property
+    def queued(self) -> int:
+        return self._waiting
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[DeepSearchAgent]:
+        if self._idle.empty() and self._waiting >= self.max_queue:
+            self._reject(f"{self.size} queries running and {self._waiting} queued")
+        self._waiting += 1
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                agent = await self._idle.get()
+        except TimeoutError:
+            self._reject(f"No agent free within {self.queue_timeout}s")
+        finally:
+            self._waiting -= 1
+        try:
+            yield agent
+        finally:
+            self._idle.put_nowait(agent)
+
+    def _reject(self, reason: str) -> None:
+        RATE_LIMITED.labels("server", "rejected").inc()
+        logger.warning("Request shed", extra={"reason": reason})
+        raise AdmissionRejected(reason)
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """``StreamingResponse`` that runs ``on_close`` once it is done with the request.
+
+    Unlike a background task this also runs when the client disconnects before
+    the body starts, so whatever the stream holds (a pooled agent) is always
+    released.
+    """
+
+    def __init__(self, content: AsyncIterator[str], on_close: Callable[[], Awaitable[None]], **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.on_close()
+
+
+def build_agents(settings_obj: Settings, size: int, workflow_name: str) -> List[DeepSearchAgent]:
+    """``size`` agents sharing one set of clients, caches and admission control."""
+
+    first = DeepSearchAgent.from_settings(settings_obj, workflow_name=workflow_name)
+    deps = replace(first.deps, answer_cache=first.answer_cache, admission=first.admission)
+    return [first] + [DeepSearchAgent(deps) for _ in range(size - 1)]
+
+
+def create_app(
+    settings_obj: Optional[Settings] = None,
+    agent_factory: Optional[Callable[[], List[DeepSearchAgent]]] = None,
+    job_store: Optional[SQLiteJobStore] = None,
+) -> FastAPI:
+    """Build the service; agents come from ``agent_factory`` (default ``build_agents``) at startup.
+
+    ``/jobs`` only queues work in the job store (default ``CACHE_DIR/jobs.sqlite3``);
+    it is run by ``python -m deep_search_agent.jobs.worker``.
+
+    Run with ``python -m deep_search_agent.server.app`` or
+    ``uvicorn --factory deep_search_agent.server.app:create_app``.
+    """
+
+    active = settings_obj or settings
+    factory = agent_factory or (lambda: build_agents(active, active.server_pool_size, active.server_workflow))
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        agents = await anyio.to_thread.run_sync(factory)
+        app.state.pool = AgentPool(agents, active.server_max_queue, active.server_queue_timeout)
+        app.state.jobs = job_store
+        yield
+
+    app = FastAPI(title="Deep Search Agent", lifespan=lifespan)
+
+    def jobs(request: Request) -> SQLiteJobStore:
+        # Opened on first use so a server that never queues jobs never creates the file.
+        if request.app.state.jobs is None:
+            request.app.state.jobs = get_job_store(active)
+        return request.app.state.jobs
+
+    @app.exception_handler(RateLimitExceeded)
+    async def too_many_requests(request: Request, exc: RateLimitExceeded) -> JSONResponse:
+        return JSONResponse({"error": str(exc)}, status_code=429, headers={"Retry-After": "1"})
+
+    @app.get("/healthz")
+    async def healthz(request: Request) -> dict:
+        pool: AgentPool = request.app.state.pool
+        return {"status": "ok", "pool_size": pool.size, "in_flight": pool.in_flight, "queued": pool.queued}
+
+    @app.post("/search")
+    async def search(body: SearchRequest, request: Request, x_tenant: str = Header("default")) -> dict:
+        async with request.app.state.pool.checkout() as agent:
+            result = await agent.arun(body.query, tenant=x_tenant)
+        return result.to_dict()
+
+    @app.post("/search/stream")
+    async def search_stream(
+        body: SearchRequest, request: Request, x_tenant: str = Header("default")
+    ) -> StreamingResponse:
+        """Server-sent events, one per ``AgentEvent`` (``event:`` is the event ``type``)."""
+
+        stack = AsyncExitStack()
+        agent = await stack.enter_async_context(request.app.state.pool.checkout())
+        events = agent.stream(body.query, tenant=x_tenant)
+        stack.push_async_callback(anyio.to_thread.run_sync, events.close)
+        try:
+            # Pull the first event before responding so admission errors still become a 429.
+            first = await anyio.to_thread.run_sync(next, events, None)
+        except BaseException:
+            await stack.aclose()
+            raise
+
+        async def body_iter() -> AsyncIterator[str]:
+            event = first
+            while event is not None:
+                yield _sse(event.to_dict())
+                event = await anyio.to_thread.run_sync(next, events, None)
+
+        return ClosingStreamingResponse(
+            body_iter(), stack.aclose, media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+        )
+
+    @app.post("/jobs", status_code=202)
+    async def submit_job(body: JobRequest, request: Request, x_tenant: str = Header("default")) -> dict:
+        store = jobs(request)
+        workflow = body.workflow or active.server_workflow
+        job_id = await anyio.to_thread.run_sync(store.submit, body.query, x_tenant, workflow)
+        return {"id": job_id, "status": "queued"}
+
+    @app.get("/jobs/{job_id}")
+    async def get_job(job_id: str, request: Request) -> dict:
+        job = await anyio.to_thread.run_sync(jobs(request).get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job")
+        return job.to_dict()
+
+    @app.get("/jobs/{job_id}/events")
+    async def job_events(
+        job_id: str, request: Request, after: int = 0, last_event_id: Optional[int] = Header(None)
+    ) -> StreamingResponse:
+        """Progress as server-sent events until the job finishes; resumable via ``Last-Event-ID``."""
+
+        store = jobs(request)
+        if await anyio.to_thread.run_sync(store.get, job_id) is None:
+            raise HTTPException(status_code=404, detail="Unknown job")
+        start = last_event_id if last_event_id is not None else after
+
+        async def body_iter() -> AsyncIterator[str]:
+            seen = start
+            while True:
+                job = await anyio.to_thread.run_sync(store.get, job_id)
+                batch = await anyio.to_thread.run_sync(store.events, job_id, seen)
+                for seq, event in batch:
+                    seen = seq
+                    yield _sse(event, event_id=seq)
+                if job.finished and not batch:
+                    yield _sse({"type": "job", **job.to_dict()})
+                    return
+                if not batch:
+                    await asyncio.sleep(active.job_poll_interval)
+
+        return StreamingResponse(body_iter(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    return app
+
+
+def _sse(payload: dict, event_id: Optional[int] = None) -> str:
+    frame = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{frame}event: {payload['type']}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def run_server(settings_obj: Optional[Settings] = None) -> None:
+    import uvicorn
+
+    active = settings_obj or settings
+    uvicorn.run(create_app(active), host=active.server_host, port=active.server_port)
+
+
+if __name__ == "__main__":
+    run_server()
@@ -12,4 +12,6 @@ class FirecrawlTool:
         self.crawler = SimpleCrawler()
 
     def __call__(self, url: str) -> str:
+        """Return the page's main readable text, capped at ``MAX_CONTENT_LENGTH`` characters."""
+
         return self.crawler.fetch(url)
@@ -2,16 +2,15 @@
 
 from __future__ import annotations
 
-import time
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Any, Iterator
+
+from ..infra.tracing import Span, span
 
 
 @contextmanager
-def timed(section: str) -> Iterator[float]:
-    start = time.time()
-    try:
-        yield start
-    finally:
-        duration = time.time() - start
-        print(f"[Timing] {section}: {duration:.2f}s")
+def timed(section: str, **attributes: Any) -> Iterator[Span]:
+    """Trace ``section`` as a span (nested in the current query's trace) and record its latency histogram."""
+
+    with span(section, **attributes) as current:
+        yield current
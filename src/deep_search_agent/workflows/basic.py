@@ -2,18 +2,31 @@
 
 from __future__ import annotations
 
+import asyncio
+from contextlib import aclosing, closing
 from dataclasses import dataclass
-from typing import List
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
-from ..agents.types import AgentResult, ResearchFinding
-from ..agents.steps.aggregate import aggregate_docs
-from ..agents.steps.plan import create_plan
-from ..agents.steps.search import search_web
-from ..agents.steps.summarize import summarize_findings
+from ..agents.types import (
+    AgentEvent,
+    AgentResult,
+    DocumentsEvent,
+    FindingsEvent,
+    PlanEvent,
+    ResearchFinding,
+    ResultEvent,
+    SummaryTokenEvent,
+)
+from ..agents.steps.aggregate import pack_context
+from ..agents.steps.plan import acreate_plan, create_plan
+from ..agents.steps.search import CoverageTracker, aiter_search, iter_search
+from ..agents.steps.summarize import asummarize_findings, stream_summary, summarize_findings
 from ..context.memory import ConversationMemory
-from ..models.base import BaseLLM
-from ..retrieval.base import BaseRetriever
-from ..retrieval.rag import score_documents
+from ..models.base import CHARS_PER_TOKEN, AsyncBaseLLM, AsyncLLMAdapter, BaseLLM, estimate_tokens
+from ..prompts import summarize_prompt
+from ..retrieval.base import AsyncBaseRetriever, AsyncRetrieverAdapter, BaseRetriever, WebDocument
+from ..retrieval.rag import RankedDocument, score_documents
+from ..retrieval.rerank import EmbeddingReranker
 
 
 @dataclass
@@ -21,20 +34,168 @@ class BasicWorkflow:
     llm: BaseLLM
     retriever: BaseRetriever
     per_subquery_results: int = 3
+    rag_top_k: int = 5
+    search_concurrency: int = 1
+    search_timeout: Optional[float] = None
+    async_llm: Optional[AsyncBaseLLM] = None
+    async_retriever: Optional[AsyncBaseRetriever] = None
+    reranker: Optional[EmbeddingReranker] = None
+    context_tokens: int = 4096
+    max_source_chars: int = 2000
+    max_search_steps: Optional[int] = None
+    coverage_threshold: float = 0.0
 
     def run(self, query: str, memory: ConversationMemory) -> AgentResult:
-        plan = create_plan(query, self.llm) or [query]
-        documents = []
-        for step in plan:
-            documents.extend(search_web(step, self.retriever, self.per_subquery_results))
+        plan = create_plan(query, self.llm, self.max_search_steps) or [query]
+        documents = self._search(query, plan)
+        ranked = self._rank(query, documents)
+        findings = self._findings(query, ranked)
 
-        ranked = score_documents(query, documents)[:5]
-        findings = [
+        summary = summarize_findings(query, self._context(query, ranked), self.llm)
+
+        return AgentResult(query=query, plan=plan, findings=findings, summary=summary)
+
+    def stream(self, query: str, memory: ConversationMemory) -> Iterator[AgentEvent]:
+        """Run the workflow, yielding each stage's output as soon as it is available.
+
+        Document batches are emitted in completion order, or in plan order when
+        ``coverage_threshold`` enables early stopping; ranking and the final
+        result always use plan order, so they match ``run``. Steps skipped by
+        early stopping emit no batch.
+        """
+
+        plan = create_plan(query, self.llm, self.max_search_steps) or [query]
+        yield PlanEvent(plan=plan)
+
+        batches: List[List[WebDocument]] = [[] for _ in plan]
+        for index, batch in self._iter_search(query, plan):
+            batches[index] = batch
+            yield DocumentsEvent(step=plan[index], documents=batch)
+        documents = [doc for batch in batches for doc in batch]
+
+        ranked = self._rank(query, documents)
+        findings = self._findings(query, ranked)
+        yield FindingsEvent(findings=findings)
+
+        tokens: List[str] = []
+        for token in stream_summary(query, self._context(query, ranked), self.llm):
+            tokens.append(token)
+            yield SummaryTokenEvent(token=token)
+
+        yield ResultEvent(result=AgentResult(query=query, plan=plan, findings=findings, summary="".join(tokens)))
+
+    async def arun(self, query: str, memory: ConversationMemory) -> AgentResult:
+        """Asyncio variant of ``run``; blocking backends are adapted onto worker threads."""
+
+        llm = self.async_llm or AsyncLLMAdapter(self.llm)
+        plan = await acreate_plan(query, llm, self.max_search_steps) or [query]
+        documents = await self._asearch(query, plan)
+        ranked = self._rank(query, documents)
+        if self.reranker is None:
+            findings = self._findings(query, ranked)
+        else:
+            # Dense encoding is CPU-bound; keep it off the event loop.
+            findings = await asyncio.to_thread(self._findings, query, ranked)
+
+        summary = await asummarize_findings(query, self._context(query, ranked), llm)
+
+        return AgentResult(query=query, plan=plan, findings=findings, summary=summary)
+
+    def _search(self, query: str, plan: List[str]) -> List[WebDocument]:
+        batches: List[List[WebDocument]] = [[] for _ in plan]
+        for index, batch in self._iter_search(query, plan):
+            batches[index] = batch
+        return [doc for batch in batches for doc in batch]
+
+    def _iter_search(self, query: str, plan: List[str]) -> Iterator[Tuple[int, List[WebDocument]]]:
+        """Search the plan steps, stopping once the results cover ``coverage_threshold`` of the query.
+
+        Without early stopping batches are passed on as they finish. With it,
+        batches are released in plan order and coverage is judged on that
+        prefix, so with concurrent searches the steps whose results are used do
+        not depend on which search finishes first.
+        """
+
+        coverage = CoverageTracker(query, self.coverage_threshold, self.rag_top_k)
+        steps = iter_search(
+            plan,
+            self.retriever,
+            self.per_subquery_results,
+            max_concurrency=self.search_concurrency,
+            timeout=self.search_timeout,
+        )
+        released = 0
+        arrived: Dict[int, List[WebDocument]] = {}
+        with closing(steps):
+            if self.coverage_threshold <= 0:
+                yield from steps
+                return
+            for index, batch in steps:
+                arrived[index] = batch
+                while released in arrived:
+                    batch = arrived.pop(released)
+                    yield released, batch
+                    released += 1
+                    if coverage.update(batch):
+                        return
+
+    async def _asearch(self, query: str, plan: List[str]) -> List[WebDocument]:
+        batches: List[List[WebDocument]] = [[] for _ in plan]
+        async for index, batch in self._aiter_search(query, plan):
+            batches[index] = batch
+        return [doc for batch in batches for doc in batch]
+
+    async def _aiter_search(self, query: str, plan: List[str]) -> AsyncIterator[Tuple[int, List[WebDocument]]]:
+        coverage = CoverageTracker(query, self.coverage_threshold, self.rag_top_k)
+        steps = aiter_search(
+            plan,
+            self.async_retriever or AsyncRetrieverAdapter(self.retriever),
+            self.per_subquery_results,
+            max_concurrency=self.search_concurrency,
+            timeout=self.search_timeout,
+        )
+        released = 0
+        arrived: Dict[int, List[WebDocument]] = {}
+        async with aclosing(steps):
+            if self.coverage_threshold <= 0:
+                async for step in steps:
+                    yield step
+                return
+            async for index, batch in steps:
+                arrived[index] = batch
+                while released in arrived:
+                    batch = arrived.pop(released)
+                    yield released, batch
+                    released += 1
+                    if coverage.update(batch):
+                        return
+
+    def _rank(self, query: str, documents: List[WebDocument]) -> List[RankedDocument]:
+        """Order every document against ``query`` in one BM25 pass.
+
+        The result feeds both ``_findings`` and ``_context``; it references the
+        retrieved ``WebDocument`` objects rather than copies of them.
+        """
+
+        return score_documents(query, documents)
+
+    def _findings(self, query: str, ranked: List[RankedDocument]) -> List[ResearchFinding]:
+        if self.reranker is None:
+            top = ranked[: self.rag_top_k]
+        else:
+            pool = ranked[: max(self.reranker.candidate_pool, self.rag_top_k)]
+            top = self.reranker.rerank(query, pool, top_k=self.rag_top_k)
+        return [
             ResearchFinding(title=rank.document.title, url=rank.document.url, snippet=rank.document.snippet)
-            for rank in ranked
+            for rank in top
         ]
 
-        aggregated = aggregate_docs(documents)
-        summary = summarize_findings(query, aggregated, self.llm)
+    def _context(self, query: str, ranked: List[RankedDocument]) -> List[str]:
+        """Summary-prompt bullets, best-ranked first, within ``context_tokens``."""
 
-        return AgentResult(query=query, plan=plan, findings=findings, summary=summary)
+        overhead = estimate_tokens(summarize_prompt.SUMMARY_TEMPLATE) + estimate_tokens(query)
+        return pack_context(
+            ranked,
+            max_tokens=max(self.context_tokens - overhead, 0),
+            max_source_tokens=max(self.max_source_chars // CHARS_PER_TOKEN, 1),
+        )
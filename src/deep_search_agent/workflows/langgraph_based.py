@@ -5,8 +5,8 @@ Implemented as a simple wrapper that internally delegates to the production work
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterator
 
 from ..context.memory import ConversationMemory
 from ..models.base import BaseLLM
@@ -15,15 +15,23 @@ from .production import ProductionWorkflow
 
 if TYPE_CHECKING:
     from ..agents.deep_search_agent import AgentResult
+    from ..agents.types import AgentEvent
 
 
 @dataclass
 class LangGraphWorkflow:
     llm: BaseLLM
     retriever: BaseRetriever
+    workflow_options: Dict[str, Any] = field(default_factory=dict)
 
     def __post_init__(self) -> None:
-        self._delegate = ProductionWorkflow(llm=self.llm, retriever=self.retriever)
+        self._delegate = ProductionWorkflow(llm=self.llm, retriever=self.retriever, **self.workflow_options)
 
     def run(self, query: str, memory: ConversationMemory) -> "AgentResult":
         return self._delegate.run(query, memory)
+
+    async def arun(self, query: str, memory: ConversationMemory) -> "AgentResult":
+        return await self._delegate.arun(query, memory)
+
+    def stream(self, query: str, memory: ConversationMemory) -> Iterator["AgentEvent"]:
+        return self._delegate.stream(query, memory)
@@ -5,11 +5,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import List, Set
 
-from ..agents.types import AgentResult, ResearchFinding
-from ..context.memory import ConversationMemory
-from ..models.base import BaseLLM
-from ..retrieval.base import BaseRetriever, WebDocument
-from ..retrieval.rag import score_documents
+from ..retrieval.base import WebDocument
+from ..retrieval.rag import RankedDocument
 from ..utils.text import normalize_whitespace
 from .basic import BasicWorkflow
 
@@ -28,24 +25,11 @@ def deduplicate_docs(documents: List[WebDocument]) -> List[WebDocument]:
 
 @dataclass
 class ProductionWorkflow(BasicWorkflow):
-    """Extends the basic workflow with deduplication and memory context."""
-
-    def run(self, query: str, memory: ConversationMemory) -> AgentResult:
-        base_result = super().run(query, memory)
-        deduped_findings = deduplicate_docs(
-            [
-                WebDocument(
-                    title=finding.title,
-                    url=finding.url,
-                    snippet=finding.snippet,
-                    content=finding.snippet,
-                )
-                for finding in base_result.findings
-            ]
-        )
-        ranked = score_documents(query, deduped_findings)
-        findings = [
-            ResearchFinding(title=rank.document.title, url=rank.document.url, snippet=rank.document.snippet)
-            for rank in ranked
-        ]
-        return AgentResult(query=base_result.query, plan=base_result.plan, findings=findings, summary=base_result.summary)
+    """Extends the basic workflow with deduplication and memory context.
+
+    Duplicates are dropped before the single ranking pass, so they never take
+    a findings slot and are not scored twice.
+    """
+
+    def _rank(self, query: str, documents: List[WebDocument]) -> List[RankedDocument]:
+        return super()._rank(query, deduplicate_docs(documents))
@@ -0,0 +1,170 @@
+"""Per-query allocation benchmark for the ranking stages of ProductionWorkflow.
+
+Runs rank -> findings -> summary context over a fixed, duplicate-heavy batch of
+search results and reports, per query:
+
+* model objects constructed (``WebDocument``, ``RankedDocument``,
+  ``ResearchFinding``) and BM25 indexes built;
+* peak traced memory (``tracemalloc``) and mean wall time.
+
+``two_pass`` reproduces the earlier pipeline (rank the top five, rebuild
+documents from the findings, dedup, rank again, and rank everything once more
+for the summary context) so both can be compared on one machine.
+
+Run ``python -m tests.performance.allocations`` from the repo root.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+from deep_search_agent.agents.types import ResearchFinding
+from deep_search_agent.retrieval import rag
+from deep_search_agent.retrieval.base import WebDocument
+from deep_search_agent.retrieval.rag import RankedDocument, score_documents
+from deep_search_agent.workflows.production import ProductionWorkflow, deduplicate_docs
+
+QUERY = "python async web framework benchmarks"
+COUNTED = (WebDocument, RankedDocument, ResearchFinding, rag.BM25Index)
+
+Pipeline = Callable[[str, List[WebDocument]], List[ResearchFinding]]
+
+
+def search_results(steps: int = 6, per_step: int = 8, overlap: int = 3) -> List[WebDocument]:
+    """Results for ``steps`` sub-queries where consecutive steps share ``overlap`` URLs."""
+
+    documents = []
+    for step in range(steps):
+        for rank in range(per_step):
+            page = step * (per_step - overlap) + rank
+            documents.append(
+                WebDocument(
+                    title=f"Framework comparison {page}",
+                    url=f"https://example.com/{page}",
+                    snippet=f"python web framework {page} async benchmarks",
+                    content=f"Page {page} compares async python web frameworks. " * 40,
+                )
+            )
+    return documents
+
+
+def single_pass(workflow: ProductionWorkflow) -> Pipeline:
+    def run(query: str, documents: List[WebDocument]) -> List[ResearchFinding]:
+        ranked = workflow._rank(query, documents)
+        workflow._context(query, ranked)
+        return workflow._findings(query, ranked)
+
+    return run
+
+
+def two_pass(workflow: ProductionWorkflow) -> Pipeline:
+    def run(query: str, documents: List[WebDocument]) -> List[ResearchFinding]:
+        findings = [
+            ResearchFinding(title=rank.document.title, url=rank.document.url, snippet=rank.document.snippet)
+            for rank in score_documents(query, documents, top_k=workflow.rag_top_k)
+        ]
+        copies = deduplicate_docs(
+            [WebDocument(title=f.title, url=f.url, snippet=f.snippet, content=f.snippet) for f in findings]
+        )
+        workflow._context(query, score_documents(query, documents))
+        return [
+            ResearchFinding(title=rank.document.title, url=rank.document.url, snippet=rank.document.snippet)
+            for rank in score_documents(query, copies)
+        ]
+
+    return run
+
+
+@contextmanager
+def count_constructions() -> Iterator[Dict[str, int]]:
+    counts = {cls.__name__: 0 for cls in COUNTED}
+    originals = {cls: cls.__init__ for cls in COUNTED}
+
+    def counting(cls, init):
+        def __init__(self, *args, **kwargs):
+            counts[cls.__name__] += 1
+            init(self, *args, **kwargs)
+
+        return __init__
+
+    for cls, init in originals.items():
+        cls.__init__ = counting(cls, init)
+    try:
+        yield counts
+    finally:
+        for cls, init in originals.items():
+            cls.__init__ = init
+
+
+@dataclass
+class AllocationReport:
+    objects: Dict[str, int]
+    peak_bytes: int
+    mean_ms: float
+    findings: List[str]
+
+    @property
+    def objects_per_query(self) -> int:
+        return sum(self.objects.values())
+
+
+def measure(pipeline: Pipeline, documents: List[WebDocument], queries: int = 50) -> AllocationReport:
+    with count_constructions() as counts:
+        findings = pipeline(QUERY, documents)
+    tracemalloc.start()
+    try:
+        pipeline(QUERY, documents)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    started = time.perf_counter()
+    for _ in range(queries):
+        pipeline(QUERY, documents)
+    elapsed = time.perf_counter() - started
+    return AllocationReport(
+        objects=counts,
+        peak_bytes=peak,
+        mean_ms=elapsed / queries * 1000,
+        findings=[finding.url for finding in findings],
+    )
+
+
+def run_allocations(queries: int = 50, progress: Callable[[str], None] = lambda line: None) -> Dict[str, Dict]:
+    workflow = ProductionWorkflow(llm=None, retriever=None)  # type: ignore[arg-type]  # ranking stages only
+    documents = search_results()
+    report = {}
+    for name, factory in (("two_pass", two_pass), ("single_pass", single_pass)):
+        result = measure(factory(workflow), documents, queries)
+        progress(
+            f"{name:<12} objects/query={result.objects_per_query:<4} {result.objects} "
+            f"peak={result.peak_bytes / 1024:7.1f}KiB mean={result.mean_ms:6.2f}ms"
+        )
+        report[name] = {
+            "objects": result.objects,
+            "objects_per_query": result.objects_per_query,
+            "peak_bytes": result.peak_bytes,
+            "mean_ms": result.mean_ms,
+            "findings": result.findings,
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="ProductionWorkflow ranking allocation benchmark")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--output")
+    args = parser.parse_args(argv)
+    report = run_allocations(args.queries, progress=print)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
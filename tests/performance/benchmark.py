@@ -0,0 +1,324 @@
+"""End-to-end benchmark for DeepSearchAgent against offline stand-ins.
+
+A local HTTP server imitates DuckDuckGo Lite and a fake LLM sleeps for a
+configurable latency, so runs are repeatable and never touch the network. Every
+workflow / concurrency combination is timed twice:
+
+* a throughput pass reporting p50/p95/p99 latency and queries/sec, overall and
+  per stage (plan, search, rank, summarize);
+* a sequential pass under ``tracemalloc`` reporting peak memory per stage, kept
+  separate so tracing overhead does not skew the latencies.
+
+Run ``python -m tests.performance.benchmark --output bench.json`` from the repo
+root and diff the JSON between revisions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import re
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import numpy as np
+
+from deep_search_agent.agents.deep_search_agent import AgentDependencies, DeepSearchAgent
+from deep_search_agent.config import settings
+from deep_search_agent.infra.http import HttpClientConfig, build_http_client
+from deep_search_agent.models.base import ChatMessage, LLMResponse
+from deep_search_agent.retrieval.base import WebDocument
+from deep_search_agent.retrieval.web_search import DuckDuckGoRetriever
+
+STAGES = ("plan", "search", "rank", "summarize")
+
+
+class FakeSearchServer:
+    """Serves DuckDuckGo Lite-shaped result pages from a background thread."""
+
+    def __init__(self, latency: float = 0.0, results: int = 8) -> None:
+        self.latency = latency
+        self.results = results
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 (http.server API)
+                query = parse_qs(urlsplit(self.path).query).get("q", [""])[0]
+                time.sleep(server.latency)
+                body = server.page(query).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page(self, query: str) -> str:
+        words = query.split() or ["result"]
+        rows = [
+            f'<a href="https://example.com/{i}/{"-".join(words)}">{query} result {i}</a>'
+            f"<td>{' '.join(words[j % len(words)] for j in range(i + 3))} details about {query}</td>"
+            for i in range(self.results)
+        ]
+        return "<html><body><table>" + "\n".join(rows) + "</table></body></html>"
+
+    def __enter__(self) -> "FakeSearchServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class RedirectTransport(httpx.BaseTransport):
+    """Sends every request to the fake server, keeping path and query."""
+
+    def __init__(self, base_url: str) -> None:
+        self.base = httpx.URL(base_url)
+        self._transport = httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(scheme=self.base.scheme, host=self.base.host, port=self.base.port)
+        return self._transport.handle_request(request)
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+@dataclass
+class StageRecorder:
+    """Thread-safe per-stage wall times and (when ``trace_memory``) peak traced bytes."""
+
+    trace_memory: bool = False
+    seconds: Dict[str, List[float]] = field(default_factory=lambda: {stage: [] for stage in STAGES})
+    peak_bytes: Dict[str, int] = field(default_factory=lambda: {stage: 0 for stage in STAGES})
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if self.trace_memory:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] - baseline if self.trace_memory else 0
+            with self._lock:
+                self.seconds[name].append(elapsed)
+                self.peak_bytes[name] = max(self.peak_bytes[name], peak)
+
+
+class FakeLLM:
+    """Plans three sub-questions and summarizes after sleeping ``latency`` seconds."""
+
+    model = "fake"
+    temperature = 0.0
+
+    def __init__(self, recorder: StageRecorder, latency: float = 0.0) -> None:
+        self.recorder = recorder
+        self.latency = latency
+
+    def generate(self, prompt: str) -> LLMResponse:
+        stage = "plan" if prompt.startswith("Question:") else "summarize"
+        with self.recorder.stage(stage):
+            time.sleep(self.latency)
+            if stage == "plan":
+                query = prompt.splitlines()[0].removeprefix("Question:").strip()
+                aspects = ("overview", "benchmarks", "trade-offs")
+                return LLMResponse(text="\n".join(f"{i}. {query} {aspect}" for i, aspect in enumerate(aspects, 1)))
+            findings = re.findall(r"^- .*$", prompt, flags=re.MULTILINE)
+            summary = f"Synthesized answer from {len(findings)} findings.\n" + "\n".join(findings[:5])
+            return LLMResponse(text=summary)
+
+    def chat(self, messages: List[ChatMessage]) -> LLMResponse:
+        return self.generate(messages[-1].content)
+
+
+class TimedRetriever:
+    def __init__(self, retriever: DuckDuckGoRetriever, recorder: StageRecorder) -> None:
+        self.retriever = retriever
+        self.recorder = recorder
+
+    def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        with self.recorder.stage("search"):
+            return self.retriever.search(query, max_results=max_results)
+
+
+def _timed_rank(workflow, recorder: StageRecorder) -> None:
+    target = getattr(workflow, "_delegate", workflow)
+    rank = target._rank
+
+    def timed(query, documents):
+        with recorder.stage("rank"):
+            return rank(query, documents)
+
+    target._rank = timed
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    values = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99), "mean_ms": float(values.mean())}
+
+
+@dataclass
+class BenchmarkConfig:
+    workflows: Sequence[str] = ("basic", "production")
+    concurrency: Sequence[int] = (1, 4)
+    queries: int = 40
+    memory_queries: int = 5
+    llm_latency: float = 0.01
+    search_latency: float = 0.005
+    search_concurrency: int = 3
+
+
+def _build_agent(workflow: str, server: FakeSearchServer, recorder: StageRecorder, config: BenchmarkConfig):
+    client = build_http_client(HttpClientConfig(retries=0), transport=RedirectTransport(server.base_url))
+    retriever = TimedRetriever(DuckDuckGoRetriever(max_results=5, client=client), recorder)
+    active = settings.with_overrides(
+        offline=True,
+        enable_cache=False,
+        enable_rerank=False,
+        search_concurrency=config.search_concurrency,
+    )
+    deps = AgentDependencies(
+        llm=FakeLLM(recorder, config.llm_latency),
+        retriever=retriever,
+        workflow_name=workflow,
+        settings=active,
+    )
+    agent = DeepSearchAgent(deps)
+    _timed_rank(agent.workflow, recorder)
+    return agent, client
+
+
+def _run_queries(agent: DeepSearchAgent, queries: Sequence[str], concurrency: int) -> List[float]:
+    def timed(query: str) -> float:
+        started = time.perf_counter()
+        agent.run(query)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(timed, queries))
+
+
+def run_case(server: FakeSearchServer, workflow: str, concurrency: int, config: BenchmarkConfig) -> Dict:
+    tag = f"{workflow}-c{concurrency}"
+    recorder = StageRecorder()
+    agent, client = _build_agent(workflow, server, recorder, config)
+    try:
+        queries = [f"{tag} query {i} python web frameworks" for i in range(config.queries)]
+        started = time.perf_counter()
+        latencies = _run_queries(agent, queries, concurrency)
+        elapsed = time.perf_counter() - started
+    finally:
+        client.close()
+
+    memory = StageRecorder(trace_memory=True)
+    agent, client = _build_agent(workflow, server, memory, config)
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        _run_queries(agent, [f"{tag} memory {i}" for i in range(config.memory_queries)], 1)
+        _, total_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        client.close()
+
+    return {
+        "workflow": workflow,
+        "concurrency": concurrency,
+        "queries": config.queries,
+        "qps": config.queries / elapsed if elapsed else 0.0,
+        "latency": percentiles(latencies),
+        "stages": {
+            stage: {
+                **percentiles(recorder.seconds[stage]),
+                "calls": len(recorder.seconds[stage]),
+                "peak_bytes": memory.peak_bytes[stage],
+            }
+            for stage in STAGES
+        },
+        "peak_bytes": total_peak,
+    }
+
+
+def run_benchmark(
+    config: BenchmarkConfig,
+    output: Optional[str] = None,
+    progress: Callable[[str], None] = lambda line: None,
+) -> Dict:
+    with FakeSearchServer(latency=config.search_latency) as server:
+        cases = []
+        for workflow in config.workflows:
+            for concurrency in config.concurrency:
+                case = run_case(server, workflow, concurrency, config)
+                progress(
+                    f"{workflow:<11} c={concurrency:<3} qps={case['qps']:8.1f} "
+                    f"p50={case['latency']['p50_ms']:7.1f}ms p95={case['latency']['p95_ms']:7.1f}ms "
+                    f"p99={case['latency']['p99_ms']:7.1f}ms peak={case['peak_bytes'] / 1024:8.0f}KiB"
+                )
+                cases.append(case)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": asdict(config),
+        "cases": cases,
+    }
+    if output:
+        with open(output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="DeepSearchAgent end-to-end benchmark")
+    parser.add_argument("--workflows", nargs="+", default=["basic", "production", "langgraph"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--memory-queries", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="seconds per fake search request")
+    parser.add_argument("--search-concurrency", type=int, default=3)
+    parser.add_argument("--output", default="benchmark.json")
+    args = parser.parse_args(argv)
+    config = BenchmarkConfig(
+        workflows=args.workflows,
+        concurrency=args.concurrency,
+        queries=args.queries,
+        memory_queries=args.memory_queries,
+        llm_latency=args.llm_latency,
+        search_latency=args.search_latency,
+        search_concurrency=args.search_concurrency,
+    )
+    run_benchmark(config, output=args.output, progress=print)
+    print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,43 @@
+import json
+
 import pytest
 
-from deep_search_agent.cli.app import run_cli
+from .allocations import run_allocations
+from .benchmark import STAGES, BenchmarkConfig, run_benchmark
+
+
+@pytest.mark.slow
+def test_benchmark_reports_latency_throughput_and_memory(tmp_path):
+    output = tmp_path / "bench.json"
+    config = BenchmarkConfig(
+        workflows=("basic", "langgraph"),
+        concurrency=(1, 4),
+        queries=8,
+        memory_queries=2,
+        llm_latency=0.0,
+        search_latency=0.0,
+    )
+
+    report = run_benchmark(config, output=str(output))
+
+    assert json.loads(output.read_text()) == json.loads(json.dumps(report))
+    assert [(case["workflow"], case["concurrency"]) for case in report["cases"]] == [
+        ("basic", 1), ("basic", 4), ("langgraph", 1), ("langgraph", 4)
+    ]
+    for case in report["cases"]:
+        assert case["qps"] > 0
+        assert case["latency"]["p50_ms"] <= case["latency"]["p95_ms"] <= case["latency"]["p99_ms"]
+        assert set(case["stages"]) == set(STAGES)
+        assert case["stages"]["plan"]["calls"] == config.queries
+        assert case["stages"]["search"]["calls"] == 3 * config.queries
+        assert case["peak_bytes"] > 0
+
 
+def test_single_pass_production_ranking_allocates_less_than_two_pass():
+    report = run_allocations(queries=3)
 
-@pytest.mark.skip(reason="Performance test placeholder")
-def test_end_to_end_placeholder():
-    assert True
+    single, legacy = report["single_pass"], report["two_pass"]
+    assert single["objects"]["BM25Index"] == 1 < legacy["objects"]["BM25Index"]
+    assert single["objects"]["WebDocument"] == 0
+    assert single["objects_per_query"] < legacy["objects_per_query"]
+    assert len(single["findings"]) == len(set(single["findings"])) == 5
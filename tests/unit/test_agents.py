@@ -1,11 +1,30 @@
+import asyncio
+import threading
+import time
 from dataclasses import dataclass
 from typing import List
 
-from deep_search_agent.agents.types import AgentResult, ResearchFinding
+import numpy as np
+
+from deep_search_agent.agents.answer_cache import AnswerCache
+from deep_search_agent.agents.types import (
+    AgentResult,
+    DocumentsEvent,
+    FindingsEvent,
+    PlanEvent,
+    ResearchFinding,
+    ResultEvent,
+    SummaryTokenEvent,
+)
 from deep_search_agent.agents.deep_search_agent import DeepSearchAgent, AgentDependencies
+from deep_search_agent.agents.steps.aggregate import pack_context
+from deep_search_agent.agents.steps.plan import parse_plan, prune_plan
+from deep_search_agent.agents.steps.search import asearch_many, search_many
+from deep_search_agent.config import settings
 from deep_search_agent.context.memory import ConversationMemory
-from deep_search_agent.models.base import BaseLLM, ChatMessage, LLMResponse
-from deep_search_agent.retrieval.base import BaseRetriever, WebDocument
+from deep_search_agent.models.base import BaseLLM, ChatMessage, LLMResponse, estimate_tokens
+from deep_search_agent.retrieval.base import AsyncBaseRetriever, BaseRetriever, WebDocument
+from deep_search_agent.retrieval.rag import RankedDocument
 from deep_search_agent.workflows.basic import BasicWorkflow
 
 
@@ -37,3 +56,350 @@ def test_agent_run_returns_result() -> None:
     result = agent.run("python web frameworks")
     assert result.summary
     assert llm.calls >= 1
+
+
+class SlowRetriever(BaseRetriever):
+    """Answers later queries faster so completion order differs from plan order."""
+
+    def __init__(self, delays: dict) -> None:
+        self.delays = delays
+
+    def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        time.sleep(self.delays.get(query, 0.0))
+        return [WebDocument(title=query, url=f"https://example.com/{query}", snippet=query, content="")]
+
+
+def test_search_many_keeps_plan_order_when_concurrent() -> None:
+    retriever = SlowRetriever({"a": 0.05, "b": 0.02, "c": 0.0})
+    batches = search_many(["a", "b", "c"], retriever, max_concurrency=3)
+    assert [batch[0].title for batch in batches] == ["a", "b", "c"]
+
+
+def test_search_many_drops_steps_over_timeout() -> None:
+    retriever = SlowRetriever({"slow": 0.5})
+    batches = search_many(["fast", "slow"], retriever, max_concurrency=2, timeout=0.1)
+    assert [len(batch) for batch in batches] == [1, 0]
+
+
+def test_sequential_search_applies_the_timeout_without_waiting_for_stuck_steps() -> None:
+    retriever = SlowRetriever({"slow": 0.5})
+    started = time.monotonic()
+    batches = search_many(["fast", "slow", "after"], retriever, max_concurrency=1, timeout=0.1)
+    assert [[doc.title for doc in batch] for batch in batches] == [["fast"], [], ["after"]]
+    assert time.monotonic() - started < 0.4
+
+
+def test_concurrent_workflow_matches_sequential() -> None:
+    llm = StubLLM()
+    retriever = SlowRetriever({"bullet": 0.03})
+    sequential = BasicWorkflow(llm=llm, retriever=retriever).run("q", ConversationMemory())
+    concurrent = BasicWorkflow(llm=llm, retriever=retriever, search_concurrency=4).run("q", ConversationMemory())
+    assert concurrent.findings == sequential.findings
+    assert concurrent.summary == sequential.summary
+
+
+class AsyncSlowRetriever(AsyncBaseRetriever):
+    def __init__(self, delays: dict) -> None:
+        self.delays = delays
+
+    async def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        await asyncio.sleep(self.delays.get(query, 0.0))
+        return [WebDocument(title=query, url=f"https://example.com/{query}", snippet=query, content="")]
+
+
+async def test_asearch_many_keeps_order_and_drops_timeouts() -> None:
+    retriever = AsyncSlowRetriever({"a": 0.03, "slow": 0.5})
+    batches = await asearch_many(["a", "slow", "c"], retriever, max_concurrency=3, timeout=0.1)
+    assert [[doc.title for doc in batch] for batch in batches] == [["a"], [], ["c"]]
+
+
+async def test_agent_arun_adapts_sync_backends() -> None:
+    llm = StubLLM()
+    agent = DeepSearchAgent(AgentDependencies(llm=llm, retriever=StubRetriever()))
+    result = await agent.arun("python web frameworks")
+    assert result.findings[0].url == "https://example.com"
+    assert llm.calls == 2
+
+
+async def test_agent_arun_offline_serves_concurrent_queries() -> None:
+    agent = DeepSearchAgent.from_settings(settings.with_overrides(offline=True), workflow_name="production")
+    results = await asyncio.gather(*(agent.arun(f"query {i}") for i in range(20)))
+    assert [result.query for result in results] == [f"query {i}" for i in range(20)]
+
+
+def test_agent_stream_yields_events_in_order() -> None:
+    agent = DeepSearchAgent.from_settings(settings.with_overrides(offline=True), workflow_name="production")
+    events = list(agent.stream("python web frameworks"))
+    kinds = [type(event) for event in events]
+    assert kinds[0] is PlanEvent
+    assert kinds[-1] is ResultEvent
+    assert kinds.index(FindingsEvent) > max(i for i, kind in enumerate(kinds) if kind is DocumentsEvent)
+    tokens = "".join(event.token for event in events if isinstance(event, SummaryTokenEvent))
+    assert tokens == events[-1].result.summary
+    assert len(agent.memory.as_bullets()) == 1
+
+
+def test_agent_reuses_answers_for_normalized_queries() -> None:
+    llm = StubLLM()
+    agent = DeepSearchAgent(AgentDependencies(llm=llm, retriever=StubRetriever(), answer_cache=AnswerCache()))
+    first = agent.run("Python web frameworks?")
+    calls = llm.calls
+    assert agent.run("  python WEB frameworks ") == first
+    assert [type(event) for event in agent.stream("python web frameworks")][-1] is ResultEvent
+    assert llm.calls == calls
+    agent.invalidate_cache("python web frameworks")
+    agent.run("python web frameworks")
+    assert llm.calls == 2 * calls
+
+
+class BagOfWordsEmbedder:
+    vocabulary = ("python", "web", "frameworks", "rust")
+    dimension = len(vocabulary)
+
+    def encode(self, texts):
+        vectors = np.array([[text.split().count(word) for word in self.vocabulary] for text in texts], dtype=float)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+def test_answer_cache_matches_near_duplicate_queries() -> None:
+    cache = AnswerCache(embedder=BagOfWordsEmbedder(), similarity_threshold=0.9)
+    result = AgentResult(query="python web frameworks", plan=[], findings=[], summary="s")
+    cache.set("python web frameworks", result)
+    assert cache.get("frameworks web python") == result
+    assert cache.get("rust web frameworks") is None
+    cache.clear()
+    assert cache.get("python web frameworks") is None
+
+
+def test_answer_cache_skips_expired_matches_and_returns_copies() -> None:
+    cache = AnswerCache(ttl_seconds=0.05, embedder=BagOfWordsEmbedder(), similarity_threshold=0.5)
+    cache.set("python web frameworks", AgentResult(query="q", plan=[], findings=[], summary="old"))
+    time.sleep(0.1)
+    finding = ResearchFinding(title="t", url="https://example.com", snippet="s")
+    cache.set("python frameworks", AgentResult(query="q", plan=["p"], findings=[finding], summary="new"))
+
+    # The expired exact-vocabulary match is closer, but the live one is served and the dead key dropped.
+    hit = cache.get("frameworks web python")
+    assert hit.summary == "new"
+    assert cache._keys == ["python frameworks"]
+
+    hit.plan.append("mutated")
+    hit.findings[0].title = "mutated"
+    again = cache.get("python frameworks")
+    assert again.plan == ["p"] and again.findings[0].title == "t"
+
+
+async def test_agent_arun_embeds_queries_off_the_event_loop() -> None:
+    class ThreadRecordingEmbedder(BagOfWordsEmbedder):
+        def __init__(self) -> None:
+            self.threads: list = []
+
+        def encode(self, texts):
+            self.threads.append(threading.get_ident())
+            return super().encode(texts)
+
+    embedder = ThreadRecordingEmbedder()
+    cache = AnswerCache(embedder=embedder, similarity_threshold=0.9)
+    agent = DeepSearchAgent(AgentDependencies(llm=StubLLM(), retriever=StubRetriever(), answer_cache=cache))
+    first = await agent.arun("python web frameworks")
+    assert (await agent.arun("frameworks web python")).summary == first.summary
+    assert embedder.threads and threading.get_ident() not in embedder.threads
+
+
+class BatchStubLLM(StubLLM):
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: list = []
+
+    def generate_batch(self, prompts):
+        self.batches.append(len(prompts))
+        return [self.generate(prompt) for prompt in prompts]
+
+
+def test_run_batch_keeps_order_and_batches_llm_calls() -> None:
+    class SlowRetriever(StubRetriever):
+        def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+            time.sleep(0.02)
+            return super().search(query, max_results)
+
+    llm = BatchStubLLM()
+    agent = DeepSearchAgent(AgentDependencies(llm=llm, retriever=SlowRetriever(), answer_cache=AnswerCache()))
+    items = agent.run_batch([f"query {i}" for i in range(8)], max_concurrency=4)
+    assert [item.result.query for item in items] == [f"query {i}" for i in range(8)]
+    assert max(llm.batches) > 1
+    assert agent.memory.as_bullets() == []
+
+
+def test_iter_batch_reports_failed_queries_without_stopping() -> None:
+    class FlakyLLM(StubLLM):
+        def generate(self, prompt: str) -> LLMResponse:
+            if "broken" in prompt:
+                raise RuntimeError("llm down")
+            return super().generate(prompt)
+
+    deps = AgentDependencies(llm=FlakyLLM(), retriever=StubRetriever(), answer_cache=AnswerCache())
+    agent = DeepSearchAgent(deps)
+    items = agent.run_batch(["fine", "broken", "also fine"], max_concurrency=2)
+    assert [item.error is None for item in items] == [True, False, True]
+    assert "llm down" in items[1].error
+    assert items[1].to_dict() == {"index": 1, "query": "broken", "error": items[1].error}
+
+
+def test_pack_context_fills_budget_in_rank_order_without_duplicates() -> None:
+    long_text = "framework " * 400
+    ranked = [
+        RankedDocument(WebDocument("Best", "https://a.example/1", "s", long_text), 3.0),
+        RankedDocument(WebDocument("Mirror", "https://a.example/1", "s", "copy"), 2.5),
+        RankedDocument(WebDocument("Same text", "https://b.example/2", "s", long_text), 2.0),
+        RankedDocument(WebDocument("Second", "https://c.example/3", "short snippet", ""), 1.0),
+        RankedDocument(WebDocument("Third", "https://d.example/4", "s", "server " * 400), 0.5),
+    ]
+
+    bullets = pack_context(ranked, max_tokens=300, max_source_tokens=200)
+
+    assert [bullet.split("]")[0] for bullet in bullets] == ["[Best", "[Second", "[Third"]
+    assert estimate_tokens(bullets[0]) <= 200 and bullets[0].endswith("…")
+    assert bullets[1].endswith("short snippet")
+    assert sum(estimate_tokens(bullet) for bullet in bullets) <= 300
+
+
+class CapturingLLM(StubLLM):
+    def __init__(self) -> None:
+        super().__init__()
+        self.prompts: List[str] = []
+
+    def generate(self, prompt: str) -> LLMResponse:
+        self.prompts.append(prompt)
+        return LLMResponse(text="\n".join(f"aspect {i}" for i in range(8)))
+
+
+class WideRetriever(BaseRetriever):
+    def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        return [
+            WebDocument(
+                title=f"{query} {i}",
+                url=f"https://example.com/{query}/{i}",
+                snippet=query,
+                content=f"{query} page {i} " * 1000,
+            )
+            for i in range(max_results)
+        ]
+
+
+def test_summary_prompt_stays_within_token_budget_for_wide_plans() -> None:
+    llm = CapturingLLM()
+    workflow = BasicWorkflow(llm=llm, retriever=WideRetriever(), context_tokens=1500, max_source_chars=800)
+
+    workflow.run("python web frameworks", ConversationMemory())
+
+    summary_prompt = llm.prompts[-1]
+    assert estimate_tokens(summary_prompt) <= 1500
+    assert summary_prompt.count("](https://example.com/") >= 5
+
+
+def test_parse_plan_keeps_list_items_and_drops_headers_and_prose() -> None:
+    reply = """Here are some focused sub-questions:
+
+**Sub-questions:**
+1. What are the fastest Python web frameworks?
+2) How does **FastAPI** handle async requests?
+- Django vs Flask performance benchmarks
+# Notes
+These should cover the main aspects."""
+    assert parse_plan(reply) == [
+        "What are the fastest Python web frameworks?",
+        "How does FastAPI handle async requests?",
+        "Django vs Flask performance benchmarks",
+    ]
+    plan = parse_plan("Overview:\npython web frameworks\nasync support")
+    assert plan == ["python web frameworks", "async support"]
+
+
+def test_prune_plan_drops_near_duplicates_and_caps_steps() -> None:
+    steps = [
+        "What are the fastest Python web frameworks?",
+        "Which Python web frameworks are the fastest",
+        "FastAPI async performance",
+        "Django ORM overhead",
+        "Flask extensions",
+    ]
+    assert prune_plan(steps) == [steps[0], steps[2], steps[3], steps[4]]
+    assert prune_plan(steps, max_steps=2) == [steps[0], steps[2]]
+    assert prune_plan(steps, max_steps=0) == []
+
+
+class PlanningLLM(StubLLM):
+    def generate(self, prompt: str) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(text="\n".join(f"{i}. python web frameworks aspect {i}" for i in range(1, 7)))
+
+
+class CountingRetriever(BaseRetriever):
+    def __init__(self) -> None:
+        self.queries: List[str] = []
+
+    def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        self.queries.append(query)
+        return [
+            WebDocument(title=f"{query} {i}", url=f"https://example.com/{query}/{i}", snippet=query, content="")
+            for i in range(max_results)
+        ]
+
+
+def test_workflow_stops_searching_once_results_cover_the_query() -> None:
+    retriever = CountingRetriever()
+    workflow = BasicWorkflow(llm=PlanningLLM(), retriever=retriever, rag_top_k=5, coverage_threshold=1.0)
+    result = workflow.run("python web frameworks", ConversationMemory())
+    assert len(result.plan) == 6
+    assert len(retriever.queries) == 2  # 3 + 3 results reach rag_top_k
+
+    capped = BasicWorkflow(llm=PlanningLLM(), retriever=CountingRetriever(), max_search_steps=4)
+    assert len(capped.run("python web frameworks", ConversationMemory()).plan) == 4
+
+    uncovered = CountingRetriever()
+    workflow = BasicWorkflow(llm=PlanningLLM(), retriever=uncovered, coverage_threshold=1.0)
+    workflow.run("rust ownership", ConversationMemory())
+    assert len(uncovered.queries) == 6
+
+
+class FirstStepSlow(CountingRetriever):
+    def __init__(self, delay: float = 0.1) -> None:
+        super().__init__()
+        self.delay = delay
+
+    def search(self, query: str, max_results: int = 5) -> List[WebDocument]:
+        if query.endswith("aspect 1"):
+            time.sleep(self.delay)
+        return super().search(query, max_results)
+
+
+def test_stream_emits_batches_as_steps_finish() -> None:
+    workflow = BasicWorkflow(
+        llm=PlanningLLM(), retriever=FirstStepSlow(delay=0.5), max_search_steps=3, search_concurrency=3
+    )
+    started = time.monotonic()
+    arrivals = [
+        (event.step, time.monotonic() - started)
+        for event in workflow.stream("python web frameworks", ConversationMemory())
+        if isinstance(event, DocumentsEvent)
+    ]
+    # The fast steps are not held back behind the slow first step.
+    assert [step for step, _ in arrivals][-1] == "python web frameworks aspect 1"
+    assert max(seconds for _, seconds in arrivals[:-1]) < 0.4
+
+
+def test_concurrent_early_stop_uses_plan_order_prefix() -> None:
+    workflow = BasicWorkflow(
+        llm=PlanningLLM(), retriever=FirstStepSlow(), rag_top_k=3, coverage_threshold=1.0, search_concurrency=2
+    )
+    result = workflow.run("python web frameworks", ConversationMemory())
+    # Step 2 finishes first and covers the query on its own, but only the plan-order prefix counts.
+    assert {finding.url.split("/")[3] for finding in result.findings} == {"python web frameworks aspect 1"}
+
+
+async def test_async_workflow_cancels_remaining_searches_once_covered() -> None:
+    retriever = CountingRetriever()
+    workflow = BasicWorkflow(llm=PlanningLLM(), retriever=retriever, rag_top_k=3, coverage_threshold=1.0)
+    result = await workflow.arun("python web frameworks", ConversationMemory())
+    assert len(retriever.queries) == 1
+    assert len(result.findings) == 3
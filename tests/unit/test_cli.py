@@ -1,3 +1,4 @@
+import json
 from io import StringIO
 
 from deep_search_agent.cli import app as cli_app
@@ -29,3 +30,33 @@ def test_cli_repl_once_mode():
     content = output.getvalue()
     assert "Plan" in content
     assert "Summary" in content
+
+
+def test_cli_streams_summary_tokens_to_write_fn():
+    inputs = iter(["stream question"])
+    lines = []
+    chunks = []
+
+    cli_app.run_cli(
+        argv=["--offline", "--once"],
+        input_fn=lambda _: next(inputs),
+        output_fn=lines.append,
+        write_fn=chunks.append,
+    )
+
+    assert "\nSummary:" in lines
+    assert len(chunks) > 2
+    assert "Synthesized answer" in "".join(chunks)
+
+
+def test_cli_batch_writes_one_json_line_per_query(tmp_path):
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text('{"query": "first question"}\n"second question"\n\n{"query": "third question"}\n')
+    results = tmp_path / "results.jsonl"
+
+    cli_app.run_cli(argv=["--offline", "--batch", str(queries), "--output", str(results), "--concurrency", "2"])
+
+    rows = [json.loads(line) for line in results.read_text().splitlines()]
+    assert sorted(row["index"] for row in rows) == [0, 1, 2]
+    assert {row["query"] for row in rows} == {"first question", "second question", "third question"}
+    assert all(row["answer"] for row in rows)
@@ -0,0 +1,428 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from deep_search_agent.infra.cache import TTLCache
+from deep_search_agent.infra.disk_cache import JSONSerializer, SQLiteBackend, TextSerializer
+from deep_search_agent.infra.http import HttpClientConfig, PooledTransport, build_http_client, get_http_client
+from deep_search_agent.infra.rate_limiter import (
+    AdmissionController,
+    AdmissionRejected,
+    MemoryBucketStore,
+    RateLimiter,
+    RateLimitExceeded,
+    SQLiteBucketStore,
+    get_rate_limiter,
+)
+from deep_search_agent.infra.singleflight import SingleFlight
+from deep_search_agent.infra.tracing import add_trace_listener, remove_trace_listener, span
+from deep_search_agent.agents.deep_search_agent import DeepSearchAgent
+from deep_search_agent.config import settings
+from deep_search_agent.retrieval.base import WebDocument, documents_from_rows, documents_to_rows
+from deep_search_agent.retrieval.crawler import SimpleCrawler
+from deep_search_agent.retrieval.web_search import DuckDuckGoRetriever
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache = TTLCache[str, str](ttl_seconds=60, max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    stats = cache.stats()
+    assert (stats.entries, stats.evictions, stats.hits, stats.misses) == (2, 1, 2, 1)
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_get_or_set_counts_one_miss_per_load(tmp_path, backend) -> None:
+    store = SQLiteBackend(str(tmp_path / "cache.sqlite3"), TextSerializer()) if backend == "sqlite" else None
+    cache = TTLCache[str, str](ttl_seconds=60, backend=store)
+    assert cache.get_or_set("a", lambda: "1") == "1"
+    assert cache.get_or_set("a", lambda: "2") == "1"
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.hit_rate) == (1, 1, 0.5)
+
+
+def test_ttl_cache_respects_byte_budget() -> None:
+    cache = TTLCache[str, str](ttl_seconds=60, max_entries=None, max_bytes=10)
+    cache.set("a", "x" * 6)
+    cache.set("b", "y" * 6)
+    cache.set("huge", "z" * 50)
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 6
+    assert cache.get("huge") is None
+    assert cache.stats().bytes == 6
+
+
+def test_ttl_cache_sweeps_expired_entries_on_write() -> None:
+    cache = TTLCache[str, str](ttl_seconds=0, sweep_interval=0)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    assert len(cache) == 1
+    assert cache.stats().expirations == 1
+
+
+def _write_entries(path: str, worker: int) -> None:
+    backend = SQLiteBackend(path, serializer=TextSerializer(), namespace="pages")
+    for index in range(25):
+        backend.set(f"{worker}-{index}", f"page {worker}-{index}", ttl_seconds=60)
+
+
+def test_sqlite_backend_persists_documents_across_instances(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    serializer = JSONSerializer(encode=documents_to_rows, decode=documents_from_rows)
+    docs = [WebDocument(title="Django", url="https://djangoproject.com", snippet="Python web", content="body")]
+    TTLCache(backend=SQLiteBackend(path, serializer=serializer, namespace="search")).set("python", docs)
+
+    reopened = TTLCache(backend=SQLiteBackend(path, serializer=serializer, namespace="search"))
+    assert reopened.get("python") == docs
+    assert reopened.get("missing") is None
+
+
+def test_sqlite_backend_enforces_ttl_and_bounds(tmp_path) -> None:
+    backend = SQLiteBackend(
+        str(tmp_path / "cache.sqlite3"), serializer=TextSerializer(), max_entries=3, maintenance_every=1
+    )
+    backend.set("expired", "x", ttl_seconds=-1)
+    assert backend.get("expired") is None
+    for key in "abcde":
+        backend.set(key, key, ttl_seconds=60)
+    assert backend.stats().entries == 3
+    assert backend.get("a") is None
+    assert backend.get("e") == "e"
+
+
+def test_sqlite_backend_only_refreshes_recency_after_touch_interval(tmp_path) -> None:
+    backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"), serializer=TextSerializer(), touch_interval=0.05)
+    backend.set("a", "a", ttl_seconds=60)
+    conn = backend._connection()
+
+    def accessed() -> float:
+        return conn.execute("SELECT accessed_at FROM cache_entries WHERE key = 'a'").fetchone()[0]
+
+    written = accessed()
+    changes = conn.total_changes
+    assert backend.get("a") == "a"
+    assert (accessed(), conn.total_changes) == (written, changes)
+    time.sleep(0.06)
+    assert backend.get("a") == "a"
+    assert accessed() > written
+
+
+def test_sqlite_backend_shared_between_processes(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_write_entries, args=(path, worker)) for worker in range(3)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+    backend = SQLiteBackend(path, serializer=TextSerializer(), namespace="pages")
+    assert backend.stats().entries == 75
+    assert backend.get("2-24") == "page 2-24"
+
+
+def test_single_flight_shares_errors_with_waiters() -> None:
+    group = SingleFlight[str, str]()
+    calls = []
+
+    def failing() -> str:
+        calls.append(1)
+        time.sleep(0.05)
+        raise ValueError("boom")
+
+    def call() -> str:
+        try:
+            return group.do("key", failing)
+        except ValueError as exc:
+            return str(exc)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        outcomes = list(pool.map(lambda _: call(), range(4)))
+    assert outcomes == ["boom"] * 4
+    assert len(calls) == 1
+    assert group.in_flight() == 0
+
+
+def test_pooled_client_retries_transient_statuses() -> None:
+    statuses = iter([503, 429, 200])
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url.host)
+        return httpx.Response(next(statuses), text="ok")
+
+    config = HttpClientConfig(retries=2, backoff_seconds=0.0)
+    client = build_http_client(config, transport=httpx.MockTransport(handler))
+    response = client.get("https://example.com/")
+    assert response.status_code == 200
+    assert len(attempts) == 3
+
+
+def test_pooled_client_caps_connections_per_host() -> None:
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return httpx.Response(200, text="ok")
+
+    client = build_http_client(HttpClientConfig(per_host_connections=2), transport=httpx.MockTransport(handler))
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(lambda _: client.get("https://example.com/").text, range(12)))
+    assert active["peak"] == 2
+
+
+def test_pooled_client_drops_idle_hosts_past_max_hosts() -> None:
+    transport = PooledTransport(HttpClientConfig(max_hosts=2), httpx.MockTransport(lambda _: httpx.Response(200)))
+    client = httpx.Client(transport=transport)
+
+    with client.stream("GET", "https://busy.example/"):
+        for index in range(5):
+            client.get(f"https://host{index}.example/")
+        # The host with an open response keeps its semaphore; idle ones go least recently used first.
+        assert list(transport._hosts._slots) == ["busy.example", "host4.example"]
+    client.get("https://host5.example/")
+    assert list(transport._hosts._slots) == ["host4.example", "host5.example"]
+    assert transport._hosts._users == {}
+
+
+def test_components_share_process_wide_client() -> None:
+    assert DuckDuckGoRetriever().client is SimpleCrawler().client is get_http_client()
+
+
+def test_agent_settings_choose_the_host_limiter() -> None:
+    limited = settings.with_overrides(
+        offline=False, enable_rate_limiting=True, search_providers="duckduckgo", enable_vector_store=False
+    )
+    agent = DeepSearchAgent.from_settings(limited)
+
+    client = agent.deps.retriever.client
+    assert client is get_http_client(limited) is not get_http_client()
+    assert client._transport.limiter is get_rate_limiter(limited, "host")
+
+
+def _collect_traces():
+    traces: list = []
+    add_trace_listener(traces.append)
+    return traces
+
+
+def test_agent_run_produces_a_span_tree_per_query() -> None:
+    traces = _collect_traces()
+    try:
+        agent = DeepSearchAgent.from_settings(
+            settings.with_overrides(offline=True, enable_cache=False, search_concurrency=4),
+            workflow_name="production",
+        )
+        agent.run("python web frameworks")
+    finally:
+        remove_trace_listener(traces.append)
+
+    (root,) = [trace for trace in traces if trace.name == "query"]
+    names = [child.name for child in root.children]
+    assert names[0] == "plan" and names[-1] == "summarize"
+    assert {"search", "rank", "aggregate"} <= set(names)
+    assert len(root.find("search")) == len(agent.workflow.run("x", agent.memory).plan)
+    assert root.to_dict()["attributes"] == {"workflow": "production", "cached": False}
+
+
+def test_streamed_query_traces_workflow_steps_but_not_the_consumer() -> None:
+    traces = _collect_traces()
+    try:
+        agent = DeepSearchAgent.from_settings(settings.with_overrides(offline=True, enable_cache=False))
+        for _ in agent.stream("rust ownership"):
+            with span("consumer"):
+                pass
+    finally:
+        remove_trace_listener(traces.append)
+
+    (root,) = [trace for trace in traces if trace.name == "query"]
+    assert root.find("consumer") == []
+    assert [child.name for child in root.children][-1] == "summarize"
+    assert len([trace for trace in traces if trace.name == "consumer"]) > 3
+
+
+def test_spans_and_cache_lookups_are_exported_to_prometheus() -> None:
+    def sample(name: str, **labels) -> float:
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    before = sample("deepsearch_span_seconds_count", span="metrics-test")
+    errors = sample("deepsearch_span_errors_total", span="metrics-test")
+    with span("metrics-test"):
+        pass
+    try:
+        with span("metrics-test"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert sample("deepsearch_span_seconds_count", span="metrics-test") == before + 2
+    assert sample("deepsearch_span_errors_total", span="metrics-test") == errors + 1
+
+    cache = TTLCache[str, str](ttl_seconds=60, name="metrics-test")
+    cache.get_or_set("k", lambda: "v")
+    cache.get("k")
+    assert sample("deepsearch_cache_lookups_total", cache="metrics-test", result="miss") == 1
+    assert sample("deepsearch_cache_lookups_total", cache="metrics-test", result="hit") == 1
+
+
+def test_rate_limiter_waits_for_tokens_instead_of_failing() -> None:
+    limiter = RateLimiter(per_minute=600, burst=2, max_wait=1.0)
+    assert limiter.acquire("a") == limiter.acquire("a") == 0.0
+    started = time.monotonic()
+    waited = limiter.acquire("a")
+    assert 0.05 < waited <= 0.1 and time.monotonic() - started >= 0.09
+    assert limiter.allow("b") and limiter.allow("b") and not limiter.allow("b")
+
+    strict = RateLimiter(per_minute=60, burst=1, max_wait=0.5)
+    strict.acquire("a")
+    with pytest.raises(RateLimitExceeded):
+        strict.acquire("a")
+
+
+async def test_rate_limiter_async_waiters_are_spaced_in_arrival_order() -> None:
+    limiter = RateLimiter(per_minute=1200, burst=1)
+    finished: list = []
+
+    async def call(name: str) -> None:
+        await limiter.aacquire("host")
+        finished.append((name, time.monotonic()))
+
+    await asyncio.gather(*(call(str(i)) for i in range(4)))
+    assert [name for name, _ in finished] == ["0", "1", "2", "3"]
+    assert finished[-1][1] - finished[0][1] >= 0.14
+
+
+def test_memory_bucket_store_is_bounded_and_drops_idle_buckets() -> None:
+    store = MemoryBucketStore(max_buckets=3, idle_seconds=0.05)
+    limiter = RateLimiter(per_minute=60, store=store, scope="tenant")
+    for tenant in "abcde":
+        limiter.allow(tenant)
+    assert len(store) == 3
+    time.sleep(0.06)
+    limiter.allow("f")
+    assert len(store) == 1
+
+
+def _spend_shared_budget(path: str, results) -> None:
+    limiter = RateLimiter(per_minute=1, burst=12, store=SQLiteBucketStore(path), scope="host")
+    results.put(sum(limiter.allow("html.duckduckgo.com") for _ in range(10)))
+
+
+def test_sqlite_bucket_store_shares_one_budget_between_processes(tmp_path) -> None:
+    path = str(tmp_path / "ratelimit.sqlite3")
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=_spend_shared_budget, args=(path, results)) for _ in range(3)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+    assert sum(results.get(timeout=5) for _ in workers) == 12
+
+
+async def test_async_limits_reserve_shared_buckets_off_the_event_loop(tmp_path) -> None:
+    class RecordingStore(SQLiteBucketStore):
+        def reserve(self, *args, **kwargs):
+            threads.append(threading.get_ident())
+            return super().reserve(*args, **kwargs)
+
+    threads: list = []
+    tenants = RateLimiter(per_minute=60, scope="tenant", store=RecordingStore(str(tmp_path / "ratelimit.sqlite3")))
+    admission = AdmissionController(max_concurrent=1, tenants=tenants, max_wait=0.01)
+
+    async with admission.aadmit("a"):
+        with pytest.raises(AdmissionRejected):
+            async with admission.aadmit("b"):
+                pass
+    # Two acquisitions and the refund for the rejected query.
+    assert len(threads) == 3 and threading.get_ident() not in threads
+
+
+def test_admission_controller_caps_queries_in_flight() -> None:
+    admission = AdmissionController(max_concurrent=2, max_wait=1.0)
+    peak = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def query(_: int) -> None:
+        with admission.admit("tenant"):
+            with lock:
+                peak["now"] += 1
+                peak["max"] = max(peak["max"], peak["now"])
+            time.sleep(0.02)
+            with lock:
+                peak["now"] -= 1
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(query, range(12)))
+    assert peak["max"] == 2
+    assert admission.in_flight == 0
+
+    impatient = AdmissionController(max_concurrent=1, max_wait=0.05)
+    with impatient.admit():
+        with pytest.raises(AdmissionRejected):
+            with impatient.admit():
+                pass
+
+
+def test_admission_refunds_the_tenant_token_when_no_slot_frees_up() -> None:
+    tenants = RateLimiter(per_minute=1, burst=2, scope="tenant", max_wait=0)
+    admission = AdmissionController(max_concurrent=1, tenants=tenants, max_wait=0.01)
+
+    with admission.admit("a"):
+        for _ in range(3):
+            with pytest.raises(AdmissionRejected):
+                with admission.admit("b"):
+                    pass
+    # Shed requests cost "b" nothing: its whole burst is still there.
+    with admission.admit("b"):
+        pass
+    with admission.admit("b"):
+        pass
+    with pytest.raises(RateLimitExceeded):
+        with admission.admit("b"):
+            pass
+
+
+async def test_agent_enforces_max_concurrent_requests() -> None:
+    admission = AdmissionController(max_concurrent=1, max_wait=0.01)
+    active = settings.with_overrides(offline=True, enable_cache=False)
+    agent = DeepSearchAgent.from_settings(active)
+    agent.admission = admission
+
+    async with admission.aadmit("other"):
+        with pytest.raises(AdmissionRejected):
+            await agent.arun("python web frameworks")
+    assert (await agent.arun("python web frameworks")).summary
+
+
+def test_pooled_client_rate_limits_each_host() -> None:
+    starts: dict = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        starts.setdefault(request.url.host, []).append(time.monotonic())
+        return httpx.Response(200, text="ok")
+
+    limiter = RateLimiter(per_minute=1200, burst=1, scope="host")
+    client = build_http_client(HttpClientConfig(), transport=httpx.MockTransport(handler), limiter=limiter)
+    for _ in range(3):
+        client.get("https://a.example/")
+    client.get("https://b.example/")
+    assert starts["a.example"][-1] - starts["a.example"][0] >= 0.09
+    assert len(starts["b.example"]) == 1
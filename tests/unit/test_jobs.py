@@ -0,0 +1,199 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from deep_search_agent.agents.deep_search_agent import DeepSearchAgent
+from deep_search_agent.agents.types import AgentResult
+from deep_search_agent.config import settings
+from deep_search_agent.jobs.store import FAILED, RUNNING, SUCCEEDED, JobLost, SQLiteJobStore, get_job_store
+from deep_search_agent.jobs.worker import Worker, _worker_main
+from deep_search_agent.server.app import build_agents, create_app
+
+
+def offline_settings(tmp_path):
+    return settings.with_overrides(
+        offline=True, enable_cache=False, cache_dir=str(tmp_path), job_poll_interval=0.05
+    )
+
+
+def offline_agent(active):
+    return lambda workflow: DeepSearchAgent.from_settings(active, workflow_name=workflow)
+
+
+def test_job_store_claims_each_job_once_and_recovers_lost_workers(tmp_path) -> None:
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=0.2, max_attempts=2)
+    first = store.submit("first")
+    second = store.submit("second")
+
+    lost = store.claim("a")
+    running = store.claim("b")
+    assert (lost.id, running.id) == (first, second)
+    assert store.claim("c") is None
+
+    # Worker "a" goes silent; its job is handed out again, then failed once out of attempts.
+    store.append_events(running, [{"type": "plan", "plan": ["x"]}])
+    time.sleep(0.25)
+    store.append_events(running, [{"type": "plan", "plan": ["y"]}])
+    retried = store.claim("c")
+    assert (retried.id, retried.attempts, retried.status) == (first, 2, RUNNING)
+    assert store.get(second).status == RUNNING
+    # The lost worker can no longer write to the job it used to own.
+    with pytest.raises(JobLost):
+        store.append_events(lost, [{"type": "plan", "plan": ["stale"]}])
+    with pytest.raises(JobLost):
+        store.complete(lost, AgentResult(query="first", plan=[], findings=[], summary="stale"))
+    assert store.events(first) == []
+    time.sleep(0.25)
+    assert store.claim("d").id == second
+    time.sleep(0.25)
+    assert store.claim("e") is None
+    assert store.get(first).status == FAILED
+    assert [event["plan"] for _, event in store.events(second)] == [["x"], ["y"]]
+
+
+def test_worker_abandons_a_job_claimed_by_another_worker(tmp_path) -> None:
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=0.05)
+    job_id = store.submit("python web frameworks", workflow="basic")
+    active = offline_settings(tmp_path)
+
+    class SlowAgent:
+        def stream(self, query, tenant="default"):
+            time.sleep(0.1)
+            takeover.append(store.claim("other"))
+            yield from DeepSearchAgent.from_settings(active, workflow_name="basic").stream(query)
+
+    takeover = []
+    # A heartbeat slower than the lease stands in for a worker process that has hung.
+    worker = Worker(store, lambda workflow: SlowAgent(), name="first", heartbeat_interval=60.0)
+    worker.run(threading.Event(), max_jobs=1)
+
+    job = store.get(job_id)
+    assert takeover[0].worker == "other"
+    assert (job.status, job.worker, job.attempts) == (RUNNING, "other", 2)
+    assert store.events(job_id) == []
+
+
+def test_worker_heartbeat_keeps_the_lease_through_a_long_stage(tmp_path) -> None:
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"), lease_seconds=0.2)
+    job_id = store.submit("python web frameworks", workflow="basic")
+    active = offline_settings(tmp_path)
+
+    class QuietAgent:
+        def stream(self, query, tenant="default"):
+            # Silent for three leases before the first event.
+            for _ in range(3):
+                time.sleep(0.2)
+                claims.append(store.claim("other"))
+            yield from DeepSearchAgent.from_settings(active, workflow_name="basic").stream(query)
+
+    claims = []
+    Worker(store, lambda workflow: QuietAgent(), name="first").run(threading.Event(), max_jobs=1)
+
+    job = store.get(job_id)
+    assert claims == [None, None, None]
+    assert (job.status, job.worker, job.attempts) == (SUCCEEDED, "first", 1)
+
+
+def test_worker_persists_progress_and_result(tmp_path) -> None:
+    active = offline_settings(tmp_path)
+    store = get_job_store(active)
+    job_id = store.submit("python web frameworks", workflow="basic")
+
+    worker = Worker(store, offline_agent(active), flush_interval=60.0)
+    assert worker.run(threading.Event(), max_jobs=1) == 1
+
+    job = store.get(job_id)
+    assert job.status == SUCCEEDED
+    assert job.result.query == "python web frameworks"
+    assert job.result.findings
+    kinds = [event["type"] for _, event in store.follow(job_id)]
+    assert kinds[0] == "plan" and kinds[-1] == "result"
+    # Summary tokens are coalesced into one write before the next event.
+    assert kinds.count("token") == 1
+    tokens = [event["token"] for _, event in store.events(job_id) if event["type"] == "token"]
+    assert tokens == [job.result.summary]
+    assert [seq for seq, _ in store.events(job_id, after=2)][0] == 3
+
+
+def test_worker_records_failures(tmp_path) -> None:
+    class BrokenAgent:
+        def stream(self, query, tenant="default"):
+            raise RuntimeError("boom")
+            yield
+
+    store = get_job_store(offline_settings(tmp_path))
+    job_id = store.submit("anything")
+    Worker(store, lambda workflow: BrokenAgent()).run(threading.Event(), max_jobs=1)
+
+    job = store.get(job_id)
+    assert job.status == FAILED
+    assert "boom" in job.error
+    assert list(store.follow(job_id)) == []
+
+
+def test_default_worker_name_belongs_to_the_running_thread(tmp_path) -> None:
+    store = get_job_store(offline_settings(tmp_path))
+    # Built on the main thread, run on others: each must claim under its own thread's name.
+    workers = [Worker(store, offline_agent(offline_settings(tmp_path))) for _ in range(2)]
+    threads = [threading.Thread(target=worker.run, args=(threading.Event(), 0)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(worker.name.endswith(f":{thread.ident}") for worker, thread in zip(workers, threads))
+
+
+def test_worker_processes_share_the_queue(tmp_path) -> None:
+    active = offline_settings(tmp_path)
+    store = get_job_store(active)
+    job_ids = [store.submit(f"query {i}", workflow="basic") for i in range(6)]
+
+    context = multiprocessing.get_context("spawn")
+    children = [context.Process(target=_worker_main, args=(active, 1)) for _ in range(2)]
+    for child in children:
+        child.start()
+    try:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline and any(not store.get(job_id).finished for job_id in job_ids):
+            time.sleep(0.1)
+    finally:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join(10)
+
+    jobs = [store.get(job_id) for job_id in job_ids]
+    assert [job.status for job in jobs] == [SUCCEEDED] * 6
+    assert all(job.attempts == 1 for job in jobs)
+    assert [child.exitcode for child in children] == [0, 0]
+
+
+def test_server_submits_jobs_and_streams_their_progress(tmp_path) -> None:
+    active = offline_settings(tmp_path)
+    store = get_job_store(active)
+    app = create_app(active, agent_factory=lambda: build_agents(active, 1, "basic"), job_store=store)
+
+    with TestClient(app) as client:
+        submitted = client.post("/jobs", json={"query": "python web frameworks"})
+        job_id = submitted.json()["id"]
+        assert submitted.status_code == 202
+        assert client.get(f"/jobs/{job_id}").json()["status"] == "queued"
+
+        Worker(store, offline_agent(active)).run(threading.Event(), max_jobs=1)
+
+        job = client.get(f"/jobs/{job_id}").json()
+        stream = client.get(f"/jobs/{job_id}/events")
+        resumed = client.get(f"/jobs/{job_id}/events", headers={"Last-Event-ID": "1"})
+        missing = client.get("/jobs/unknown")
+
+    assert job["status"] == "succeeded"
+    assert job["workflow"] == "production"
+    assert job["result"]["query"] == "python web frameworks"
+    frames = [frame for frame in stream.text.split("\n\n") if frame]
+    assert frames[0].startswith("id: 1\nevent: plan")
+    assert frames[-1].startswith("event: job")
+    assert not resumed.text.startswith("id: 1\n")
+    assert missing.status_code == 404
@@ -1,5 +1,15 @@
-from deep_search_agent.models.base import ChatMessage
-from deep_search_agent.models.local_backend import LocalLLM
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import REGISTRY
+
+from deep_search_agent.config import settings
+from deep_search_agent.infra.cache import TTLCache
+from deep_search_agent.infra.disk_cache import JSONSerializer, SQLiteBackend
+from deep_search_agent.models.base import ChatMessage, LLMResponse
+from deep_search_agent.models.cached import CachedLLM, get_llm_cache
+from deep_search_agent.models.local_backend import AsyncLocalLLM, LocalLLM
 
 
 def test_local_llm_generate() -> None:
@@ -12,3 +22,101 @@ def test_local_llm_chat() -> None:
     llm = LocalLLM(seed=2)
     response = llm.chat([ChatMessage(role="user", content="Hi"), ChatMessage(role="assistant", content="Hello")])
     assert "Synthesized answer" in response.text
+
+
+async def test_async_local_llm_generate() -> None:
+    llm = AsyncLocalLLM(seed=3)
+    response = await llm.generate("Hello world")
+    assert "Synthesized answer" in response.text
+
+
+class CountingLLM:
+    model = "counting"
+
+    def __init__(self, temperature: float = 0.0) -> None:
+        self.temperature = temperature
+        self.calls = 0
+
+    def generate(self, prompt: str) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(text=f"answer to {prompt}")
+
+    def chat(self, messages):
+        return self.generate(messages[-1].content)
+
+
+def test_cached_llm_memoizes_deterministic_prompts() -> None:
+    llm = CountingLLM()
+    cached = CachedLLM(llm, TTLCache(ttl_seconds=60))
+    before = REGISTRY.get_sample_value("deepsearch_llm_tokens_saved_total", {"model": "counting"}) or 0
+    assert cached.generate("plan this").text == "answer to plan this"
+    assert cached.generate("plan this").text == "answer to plan this"
+    assert "".join(cached.stream("plan this")) == "answer to plan this"
+    assert llm.calls == 1
+    stats = cached.stats()
+    assert (stats.hits, stats.misses) == (2, 1)
+    assert stats.tokens_saved > 0
+    exported = REGISTRY.get_sample_value("deepsearch_llm_tokens_saved_total", {"model": "counting"})
+    assert exported - before == stats.tokens_saved
+
+
+def test_cached_llm_counts_each_lookup_once_and_shared_loads_as_hits() -> None:
+    class SlowLLM(CountingLLM):
+        def generate(self, prompt: str) -> LLMResponse:
+            time.sleep(0.05)
+            return super().generate(prompt)
+
+    def lookups(result: str) -> float:
+        labels = {"cache": "llm-test", "result": result}
+        return REGISTRY.get_sample_value("deepsearch_cache_lookups_total", labels) or 0
+
+    llm = SlowLLM()
+    cache = TTLCache(ttl_seconds=60, name="llm-test")
+    cached = CachedLLM(llm, cache)
+    before = (lookups("hit"), lookups("miss"))
+    cached.generate("q")
+    cached.generate("q")
+    assert (lookups("hit") - before[0], lookups("miss") - before[1]) == (1, 1)
+    assert (cache.stats().hits, cache.stats().misses) == (1, 1)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(cached.generate, ["shared"] * 4))
+    stats = cached.stats()
+    assert llm.calls == 2
+    assert (stats.hits, stats.misses) == (1 + 3, 1 + 1)
+
+
+def test_cached_llm_skips_nondeterministic_temperatures_unless_configured() -> None:
+    cache = TTLCache(ttl_seconds=60)
+    llm = CountingLLM(temperature=0.7)
+    CachedLLM(llm, cache).generate("q")
+    CachedLLM(llm, cache).generate("q")
+    assert llm.calls == 2
+    forced = CachedLLM(llm, cache, cache_nondeterministic=True)
+    forced.generate("q")
+    forced.generate("q")
+    assert llm.calls == 3
+
+
+def test_cached_llm_responses_persist_in_sqlite(tmp_path) -> None:
+    def open_cache() -> TTLCache:
+        serializer = JSONSerializer(
+            encode=lambda response: response.text, decode=lambda text: LLMResponse(text=text)
+        )
+        backend = SQLiteBackend(str(tmp_path / "llm.sqlite3"), serializer, namespace="llm")
+        return TTLCache(ttl_seconds=60, backend=backend)
+
+    CachedLLM(CountingLLM(), open_cache()).generate("q")
+    llm = CountingLLM()
+    assert CachedLLM(llm, open_cache()).generate("q").text == "answer to q"
+    assert llm.calls == 0
+
+
+def test_llm_cache_follows_cache_backend(tmp_path) -> None:
+    in_memory = get_llm_cache(settings.with_overrides(cache_backend="memory", cache_dir=str(tmp_path / "memory")))
+    on_disk = get_llm_cache(settings.with_overrides(cache_backend="sqlite", cache_dir=str(tmp_path / "sqlite")))
+
+    in_memory.set("k", LLMResponse(text="v"))
+    on_disk.set("k", LLMResponse(text="v"))
+    assert not os.path.exists(tmp_path / "memory")
+    assert os.path.exists(tmp_path / "sqlite" / "cache.sqlite3")
@@ -1,5 +1,22 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import numpy as np
+import pytest
+
 from deep_search_agent.retrieval.base import WebDocument
+from deep_search_agent.retrieval.crawler import AsyncSimpleCrawler, SimpleCrawler, UnsupportedContentType
+from deep_search_agent.retrieval.embeddings import SentenceTransformerEmbedder
+from deep_search_agent.retrieval.extract import extract_readable_text
+from deep_search_agent.retrieval.federated import FederatedRetriever
 from deep_search_agent.retrieval.rag import score_documents
+from deep_search_agent.retrieval.rerank import EmbeddingReranker
+from deep_search_agent.retrieval.search_providers import BraveRetriever, TavilyRetriever
+from deep_search_agent.retrieval.vector_store import FaissVectorStore, VectorStoreRetriever
+from deep_search_agent.retrieval.web_search import DuckDuckGoRetriever
 
 
 def test_score_documents_orders_by_overlap() -> None:
@@ -10,3 +27,432 @@ def test_score_documents_orders_by_overlap() -> None:
     ]
     ranked = score_documents(query, documents)
     assert ranked[0].document.title == "Django"
+
+
+DDG_HTML = """
+<html><body>
+<a href="https://fastapi.tiangolo.com">FastAPI</a><span>modern python framework</span>
+<a href="https://flask.palletsprojects.com">Flask</a>
+</body></html>
+"""
+
+
+def _counting_handler(calls: list, delay: float = 0.05):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        time.sleep(delay)
+        return httpx.Response(200, text=DDG_HTML)
+
+    return handler
+
+
+def test_duckduckgo_coalesces_concurrent_identical_searches() -> None:
+    calls: list = []
+    retriever = DuckDuckGoRetriever(max_results=2)
+    retriever.client = httpx.Client(transport=httpx.MockTransport(_counting_handler(calls)))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: retriever.search("python frameworks"), range(8)))
+    assert len(calls) == 1
+    assert all(batch[0].url == "https://fastapi.tiangolo.com" for batch in results)
+
+
+def test_duckduckgo_stops_reading_once_target_results_are_parsed() -> None:
+    pulled: list = []
+
+    def body():
+        for i in range(50):
+            pulled.append(i)
+            yield f'<a href="https://example.com/{i}">Result {i}</a><span>snippet</span>\n'.encode()
+
+    retriever = DuckDuckGoRetriever(max_results=3)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body()))
+    retriever.client = httpx.Client(transport=transport)
+    results = retriever.search("early stop")
+    assert [doc.url for doc in results] == [f"https://example.com/{i}" for i in range(3)]
+    assert len(pulled) < 10
+
+
+def test_duckduckgo_falls_back_when_page_has_no_results() -> None:
+    retriever = DuckDuckGoRetriever(max_results=3)
+    retriever.client = httpx.Client(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, text="<p>no results</p>"))
+    )
+    results = retriever.search("nothing")
+    assert results[0].url == "https://duckduckgo.com/"
+    assert results[0].content == "<p>no results</p>"
+
+
+async def test_async_crawler_coalesces_concurrent_fetches() -> None:
+    calls: list = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, text="<p>body</p>")
+
+    crawler = AsyncSimpleCrawler()
+    crawler.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    pages = await asyncio.gather(*(crawler.fetch("https://example.com/a") for _ in range(10)))
+    assert len(calls) == 1
+    assert set(pages) == {"<p>body</p>"}
+
+
+ARTICLE_HTML = """
+<html><head><title>t</title><script>var tracking = 1;</script></head>
+<body><nav>Home | About</nav>
+<article><h1>Borrowing in Rust</h1><p>References let you use a value
+without taking ownership.</p><p>%s</p></article>
+<footer>Copyright</footer></body></html>
+""" % ("Lifetimes describe how long references stay valid. " * 5)
+
+
+def test_extract_readable_text_keeps_article_body_only() -> None:
+    text = extract_readable_text(ARTICLE_HTML, max_chars=5000)
+    assert text.startswith("Borrowing in Rust\nReferences let you use a value without taking ownership.")
+    assert "tracking" not in text and "Home" not in text and "Copyright" not in text
+    assert len(extract_readable_text(ARTICLE_HTML, max_chars=40)) == 40
+
+
+def _html_crawler(handler, **kwargs) -> SimpleCrawler:
+    crawler = SimpleCrawler(**kwargs)
+    crawler.client = httpx.Client(transport=httpx.MockTransport(handler))
+    return crawler
+
+
+def test_crawler_caches_extracted_text_and_rejects_binary_pages() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith(".png"):
+            return httpx.Response(200, headers={"content-type": "image/png"}, content=b"\x89PNG")
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, text=ARTICLE_HTML)
+
+    crawler = _html_crawler(handler, max_chars=60)
+    text = crawler.fetch("https://example.com/rust")
+    assert text == "Borrowing in Rust\nReferences let you use a value without tak"
+    assert crawler.cache.get("https://example.com/rust") == text
+    with pytest.raises(UnsupportedContentType):
+        crawler.fetch("https://example.com/logo.png")
+
+
+def test_crawler_stops_downloading_at_byte_cap() -> None:
+    pulled: list = []
+
+    def body():
+        for i in range(100):
+            pulled.append(i)
+            yield f"<p>paragraph {i}</p>".encode() * 10
+
+    crawler = _html_crawler(
+        lambda request: httpx.Response(200, headers={"content-type": "text/html"}, content=body()), max_bytes=500
+    )
+    assert crawler.fetch("https://example.com/huge").startswith("paragraph 0")
+    assert len(pulled) < 5
+
+
+def _site_handler(starts: list, delay: float = 0.0):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/robots.txt":
+            return httpx.Response(200, text="User-agent: *\nDisallow: /private\n")
+        starts.append((request.url.host, time.monotonic()))
+        time.sleep(delay)
+        if request.url.path == "/broken":
+            return httpx.Response(500)
+        return httpx.Response(200, headers={"content-type": "text/html"}, text=f"<p>{request.url.path}</p>")
+
+    return handler
+
+
+def test_fetch_many_returns_partial_results_in_order() -> None:
+    starts: list = []
+    crawler = _html_crawler(_site_handler(starts))
+    crawler.politeness.delay = 0.0
+    urls = [
+        "https://a.example/two",
+        "https://a.example/private",
+        "https://b.example/broken",
+        "https://b.example/one",
+    ]
+    pages = crawler.fetch_many(urls)
+    assert pages == {"https://a.example/two": "/two", "https://b.example/one": "/one"}
+    assert sorted(host for host, _ in starts) == ["a.example", "b.example", "b.example"]
+
+
+def test_fetch_many_spaces_requests_per_host_and_honours_deadline() -> None:
+    starts: list = []
+    crawler = _html_crawler(_site_handler(starts))
+    crawler.politeness.delay = 0.1
+    pages = crawler.fetch_many([f"https://a.example/{i}" for i in range(3)] + ["https://b.example/0"])
+    assert len(pages) == 4
+    host_a = sorted(start for host, start in starts if host == "a.example")
+    assert all(later - earlier >= 0.09 for earlier, later in zip(host_a, host_a[1:]))
+
+    slow = _html_crawler(_site_handler([], delay=0.5))
+    slow.politeness.delay = 0.0
+    started = time.monotonic()
+    assert slow.fetch_many(["https://c.example/slow"], deadline=0.1) == {}
+    assert time.monotonic() - started < 0.4
+
+
+async def test_async_fetch_many_skips_disallowed_and_failed_urls() -> None:
+    starts: list = []
+    sync_handler = _site_handler(starts)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return sync_handler(request)
+
+    crawler = AsyncSimpleCrawler()
+    crawler.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    crawler.politeness.delay = 0.0
+    pages = await crawler.fetch_many(
+        ["https://a.example/private", "https://a.example/ok", "https://a.example/broken"]
+    )
+    assert pages == {"https://a.example/ok": "/ok"}
+
+
+def test_crawler_host_state_stays_bounded() -> None:
+    crawler = _html_crawler(_site_handler([]))
+    crawler.politeness.delay = 0.0
+    crawler.politeness.max_hosts = crawler._hosts.max_hosts = 2
+    pages = crawler.fetch_many([f"https://host{i}.example/page" for i in range(6)])
+    assert len(pages) == 6
+    assert len(crawler._hosts) == 2 and crawler._hosts._users == {}
+    assert len(crawler.politeness._robots) == 2
+    assert len(crawler.politeness._next_start) <= 3
+
+
+async def test_async_crawler_host_state_stays_bounded() -> None:
+    sync_handler = _site_handler([])
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return sync_handler(request)
+
+    crawler = AsyncSimpleCrawler()
+    crawler.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    crawler.politeness.delay = 0.0
+    crawler.politeness.max_hosts = crawler._hosts.max_hosts = 2
+    await crawler.fetch_many([f"https://host{i}.example/page" for i in range(3)])
+    slots = dict(crawler._hosts._slots)
+    await crawler.fetch_many([f"https://host{i}.example/other" for i in (1, 2)])
+    assert dict(crawler._hosts._slots) == slots and len(slots) == 2
+    assert len(crawler.politeness._robots) == 2
+
+
+def test_score_documents_uses_content_and_term_frequency() -> None:
+    documents = [
+        WebDocument(title="Intro", url="https://a.example", snippet="general notes", content="nothing relevant"),
+        WebDocument(title="Rust", url="https://b.example", snippet="systems", content="rust borrow checker rust"),
+        WebDocument(title="Rust book", url="https://c.example", snippet="rust", content="rust ownership"),
+    ]
+    ranked = score_documents("rust ownership", documents)
+    assert [rank.document.url for rank in ranked] == ["https://c.example", "https://b.example", "https://a.example"]
+    assert ranked[-1].score == 0.0
+
+
+def test_score_documents_top_k_matches_full_sort() -> None:
+    documents = [
+        WebDocument(
+            title=f"doc {i}", url=f"https://example.com/{i}", snippet=" ".join(["python"] * (i % 7)), content=""
+        )
+        for i in range(2000)
+    ]
+    full = score_documents("python", documents)
+    top = score_documents("python", documents, top_k=10)
+    assert [rank.document.url for rank in top] == [rank.document.url for rank in full[:10]]
+    assert top[0].document.url == "https://example.com/6"
+
+
+class KeywordModel:
+    """Stands in for a SentenceTransformer: one axis per keyword."""
+
+    keywords = ("python", "rust", "cooking")
+
+    def __init__(self) -> None:
+        self.encoded: list = []
+
+    def encode(self, texts, batch_size, convert_to_numpy, normalize_embeddings, show_progress_bar):
+        self.encoded.extend(texts)
+        vectors = np.array([[text.lower().count(word) for word in self.keywords] for text in texts], dtype=float)
+        vectors[vectors.sum(axis=1) == 0] = 1.0
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_embedder_caches_by_content_hash() -> None:
+    model = KeywordModel()
+    embedder = SentenceTransformerEmbedder(model=model, batch_size=4)
+    first = embedder.encode(["python tips", "rust tips"])
+    second = embedder.encode(["rust tips", "python tips", "cooking"])
+    assert model.encoded == ["python tips", "rust tips", "cooking"]
+    assert np.allclose(second[1], first[0])
+
+
+def test_embedder_loads_model_lazily() -> None:
+    assert SentenceTransformerEmbedder()._model is None
+
+
+def test_reranker_reorders_and_drops_dissimilar_candidates() -> None:
+    documents = [
+        WebDocument(title="Cooking", url="https://cook.example", snippet="cooking python-shaped pasta", content=""),
+        WebDocument(title="Python", url="https://py.example", snippet="python python guide", content=""),
+        WebDocument(title="Rust", url="https://rs.example", snippet="rust guide", content=""),
+    ]
+    reranker = EmbeddingReranker(SentenceTransformerEmbedder(model=KeywordModel()), similarity_threshold=0.4)
+    ranked = reranker.rerank("python", score_documents("python guide", documents))
+    assert [rank.document.url for rank in ranked] == ["https://py.example", "https://cook.example"]
+
+
+VECTOR_DOCS = [
+    WebDocument(title="Python", url="https://py.example", snippet="python guide", content=""),
+    WebDocument(title="Rust", url="https://rs.example", snippet="rust guide", content=""),
+]
+
+
+def test_vector_store_persists_and_deduplicates_by_url(tmp_path) -> None:
+    embedder = SentenceTransformerEmbedder(model=KeywordModel())
+    store = FaissVectorStore(str(tmp_path), embedder, flush_every=1)
+    assert store.add(VECTOR_DOCS) == 2
+    assert store.add(VECTOR_DOCS[:1]) == 0
+
+    reopened = FaissVectorStore(str(tmp_path), embedder)
+    assert len(reopened) == 2
+    assert reopened.add([VECTOR_DOCS[0]]) == 0
+    reopened.add([WebDocument(title="Pasta", url="https://cook.example", snippet="cooking", content="")])
+    hits = reopened.search("rust", k=2, min_score=0.5)
+    assert [hit.document.url for hit in hits] == ["https://rs.example"]
+    assert reopened.search("cooking", k=1)[0].document.url == "https://cook.example"
+
+
+def test_vector_store_ignores_rows_left_by_an_interrupted_flush(tmp_path) -> None:
+    embedder = SentenceTransformerEmbedder(model=KeywordModel())
+    orphan = json.dumps(["Orphan", "https://orphan", "cooking", ""]) + "\n"
+    # Rows written by a flush that crashed before its index was swapped in.
+    (tmp_path / "documents.jsonl").write_text(orphan)
+    FaissVectorStore(str(tmp_path), embedder, flush_every=1).add(VECTOR_DOCS[:1])
+    with open(tmp_path / "documents.jsonl", "a", encoding="utf-8") as handle:
+        handle.write(orphan)
+
+    reopened = FaissVectorStore(str(tmp_path), embedder, flush_every=1)
+    reopened.add([WebDocument(title="Pasta", url="https://cook.example", snippet="cooking", content="")])
+    reloaded = FaissVectorStore(str(tmp_path), embedder)
+
+    assert len(reloaded) == 2
+    assert reloaded.search("cooking", k=1)[0].document.url == "https://cook.example"
+    assert "orphan" not in (tmp_path / "documents.jsonl").read_text()
+
+
+def test_vector_store_retriever_serves_repeat_queries_locally(tmp_path) -> None:
+    class CountingRetriever:
+        calls = 0
+
+        def search(self, query, max_results=5):
+            self.calls += 1
+            return VECTOR_DOCS
+
+    fallback = CountingRetriever()
+    store = FaissVectorStore(str(tmp_path), SentenceTransformerEmbedder(model=KeywordModel()))
+    retriever = VectorStoreRetriever(fallback, store, min_score=0.6)
+    assert retriever.search("python", max_results=1) == VECTOR_DOCS
+    assert retriever.search("python", max_results=1) == VECTOR_DOCS[:1]
+    assert fallback.calls == 1
+    assert retriever.search("rust", max_results=2) == VECTOR_DOCS
+    assert fallback.calls == 2
+
+
+class FakeSearchProvider:
+    def __init__(
+        self, name: str, latency: float = 0.0, results: int = 5, fail: bool = False, prefix: str = ""
+    ) -> None:
+        self.name = name
+        self.latency = latency
+        self.results = results
+        self.fail = fail
+        self.prefix = prefix or name
+        self.calls = 0
+
+    def search(self, query: str, max_results: int = 5):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise httpx.ConnectError(f"{self.name} down")
+        return [
+            WebDocument(
+                title=f"{self.name} {i}", url=f"https://{self.prefix}.example/{i}", snippet=query, content=""
+            )
+            for i in range(min(self.results, max_results))
+        ]
+
+
+def test_federated_hedges_slow_provider_and_fastest_wins() -> None:
+    slow = FakeSearchProvider("slow", latency=0.5)
+    fast = FakeSearchProvider("fast", latency=0.01)
+    retriever = FederatedRetriever([slow, fast], hedge_delay=0.05)
+
+    started = time.perf_counter()
+    documents = retriever.search("vector databases", max_results=3)
+
+    assert time.perf_counter() - started < 0.3
+    assert [doc.title for doc in documents] == ["fast 0", "fast 1", "fast 2"]
+    assert slow.calls == fast.calls == 1
+    # The losing request still finishes in the background and is measured.
+    time.sleep(0.6)
+    assert retriever.snapshot()["slow"]["calls"] == 1
+    assert retriever.route()[0] is fast
+
+
+def test_federated_fails_over_and_routes_around_unhealthy_providers() -> None:
+    broken = FakeSearchProvider("broken", fail=True)
+    backup = FakeSearchProvider("backup", latency=0.01)
+    retriever = FederatedRetriever([broken, backup], hedge_delay=5.0)
+
+    started = time.perf_counter()
+    assert len(retriever.search("query")) == 5
+    assert time.perf_counter() - started < 1.0
+    assert retriever.snapshot()["broken"]["error_rate"] == 1.0
+    assert [provider.name for provider in retriever.route()] == ["backup", "broken"]
+
+    broken_only = FederatedRetriever([FakeSearchProvider("broken", fail=True)])
+    with pytest.raises(httpx.ConnectError):
+        broken_only.search("query")
+
+
+def test_federated_merges_short_answers_without_duplicate_urls() -> None:
+    first = FakeSearchProvider("first", results=2, prefix="shared")
+    second = FakeSearchProvider("second", results=3, prefix="shared")
+    third = FakeSearchProvider("third", results=2)
+    retriever = FederatedRetriever([first, second, third], hedge_delay=5.0)
+
+    documents = retriever.search("query", max_results=5)
+
+    assert [doc.url for doc in documents] == [
+        "https://shared.example/0",
+        "https://third.example/0",
+        "https://shared.example/1",
+        "https://third.example/1",
+        "https://shared.example/2",
+    ]
+
+
+def test_api_search_providers_parse_and_cache_responses() -> None:
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.host == "api.tavily.com":
+            hit = {"title": "T", "url": "https://t.example", "content": "tavily"}
+            return httpx.Response(200, json={"results": [hit]})
+        assert request.headers["X-Subscription-Token"] == "brave-key"
+        assert request.url.params["count"] == "5"
+        return httpx.Response(
+            200, json={"web": {"results": [{"title": "B", "url": "https://b.example", "description": "brave"}]}}
+        )
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    tavily = TavilyRetriever("tavily-key", client=client)
+    brave = BraveRetriever("brave-key", client=client)
+    tavily.cache.clear()
+    brave.cache.clear()
+
+    assert [(doc.url, doc.content) for doc in tavily.search("q")] == [("https://t.example", "tavily")]
+    assert [(doc.url, doc.content) for doc in brave.search("q", max_results=2)] == [("https://b.example", "brave")]
+    # Repeats are answered from each provider's own cache, not the paid API.
+    tavily.search("q")
+    brave.search("q", max_results=1)
+    assert len(requests) == 2
@@ -0,0 +1,126 @@
+import asyncio
+import contextlib
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from deep_search_agent.agents.deep_search_agent import AgentDependencies, DeepSearchAgent
+from deep_search_agent.config import settings
+from deep_search_agent.infra.rate_limiter import AdmissionController, AdmissionRejected
+from deep_search_agent.models.local_backend import LocalLLM
+from deep_search_agent.retrieval.stub import StubRetriever
+from deep_search_agent.server.app import AgentPool, build_agents, create_app
+
+
+OFFLINE = settings.with_overrides(offline=True, server_pool_size=2, server_max_queue=1, server_queue_timeout=1.0)
+
+
+def test_server_answers_json_and_reuses_warm_agents() -> None:
+    built = []
+
+    def factory():
+        built.append(1)
+        return build_agents(OFFLINE, 2, "production")
+
+    with TestClient(create_app(OFFLINE, agent_factory=factory)) as client:
+        first = client.post("/search", json={"query": "python web frameworks"})
+        second = client.post("/search", json={"query": "rust web frameworks"})
+        health = client.get("/healthz").json()
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["query"] == "python web frameworks"
+    assert first.json()["sources"]
+    assert built == [1]
+    assert health == {"status": "ok", "pool_size": 2, "in_flight": 0, "queued": 0}
+
+
+def test_server_streams_agent_events_as_sse() -> None:
+    with TestClient(create_app(OFFLINE, agent_factory=lambda: build_agents(OFFLINE, 1, "basic"))) as client:
+        response = client.post("/search/stream", json={"query": "python web frameworks"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = [frame for frame in response.text.split("\n\n") if frame]
+    kinds = [frame.splitlines()[0].removeprefix("event: ") for frame in frames]
+    assert kinds[0] == "plan" and kinds[-1] == "result"
+    result = json.loads(frames[-1].splitlines()[1].removeprefix("data: "))
+    assert result["query"] == "python web frameworks"
+
+
+def test_stream_returns_its_agent_when_the_client_leaves_before_the_body() -> None:
+    app = create_app(OFFLINE, agent_factory=lambda: build_agents(OFFLINE, 1, "basic"))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/search/stream",
+        "raw_path": b"/search/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("testclient", 1),
+        "server": ("testserver", 80),
+    }
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": json.dumps({"query": "python"}).encode(), "more_body": False}
+
+    async def send(message: dict) -> None:
+        # The connection is gone before the response starts, so the body is never iterated.
+        raise OSError("client went away")
+
+    async def request() -> int:
+        with contextlib.suppress(Exception):
+            await app(scope, receive, send)
+        # Checked before yielding to the loop, so garbage collection cannot have returned the agent instead.
+        return app.state.pool.in_flight
+
+    with TestClient(app) as client:
+        assert client.portal.call(request) == 0
+        assert client.post("/search/stream", json={"query": "python"}).status_code == 200
+
+
+def test_server_rejects_with_429_when_admission_is_full() -> None:
+    admission = AdmissionController(1, max_wait=0)
+
+    def factory():
+        deps = AgentDependencies(llm=LocalLLM(), retriever=StubRetriever(), settings=OFFLINE, admission=admission)
+        return [DeepSearchAgent(deps)]
+
+    with TestClient(create_app(OFFLINE, agent_factory=factory)) as client:
+        with admission.admit():
+            response = client.post("/search", json={"query": "python"})
+            streamed = client.post("/search/stream", json={"query": "python"})
+        ok = client.post("/search", json={"query": "python"})
+
+    assert response.status_code == streamed.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert ok.status_code == 200
+
+
+async def test_agent_pool_bounds_queue_and_sheds_load() -> None:
+    agent = DeepSearchAgent(AgentDependencies(llm=LocalLLM(), retriever=StubRetriever(), settings=OFFLINE))
+    pool = AgentPool([agent], max_queue=1, queue_timeout=0.05)
+
+    async with pool.checkout():
+        waiter = asyncio.create_task(_hold(pool))
+        await asyncio.sleep(0.01)
+        assert pool.queued == 1
+        # The only agent is busy and the queue is full: rejected without waiting.
+        with pytest.raises(AdmissionRejected):
+            async with pool.checkout():
+                pass
+        # The queued request gives up once it has waited queue_timeout.
+        with pytest.raises(AdmissionRejected):
+            await waiter
+
+    assert pool.in_flight == 0 and pool.queued == 0
+    async with pool.checkout() as checked_out:
+        assert checked_out is agent
+
+
+async def _hold(pool: AgentPool) -> None:
+    async with pool.checkout():
+        pass